@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+"""
+Training Dataset Load Benchmark
+Load time and peak RSS of `read_training_file` with the pandas JSONL path
+versus memory-mapped Arrow shards. Every load runs in a fresh process so the
+peak RSS of one measurement does not leak into the next.
+
+Usage:
+    python benchmarks/bench_arrow_dataset.py --samples 10000 100000 1000000
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+import resource
+import tempfile
+import multiprocessing
+
+# Add project root to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.data.generator import format_training_text
+
+
+def write_jsonl(path, n):
+    with open(path, 'w') as f:
+        for i in range(n):
+            record = {"text": format_training_text(f"Question number {i}?", f"Answer number {i}"), "weight": 1}
+            f.write(json.dumps(record) + "\n")
+
+
+def measure(path, data_format, queue):
+    from src.data.tokenizer import read_training_file
+
+    start = time.perf_counter()
+    dataset = read_training_file(path, data_format=data_format)
+    total_weight = sum(dataset["weight"])
+    seconds = time.perf_counter() - start
+    # ru_maxrss is in KB on Linux
+    queue.put((seconds, resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, total_weight))
+
+
+def run(path, data_format):
+    queue = multiprocessing.Queue()
+    proc = multiprocessing.Process(target=measure, args=(path, data_format, queue))
+    proc.start()
+    proc.join()
+    if proc.exitcode != 0:
+        raise RuntimeError(f"{data_format} load of {path} failed (exit code {proc.exitcode})")
+    return queue.get()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark JSONL vs. Arrow training dataset loading.")
+    parser.add_argument("--samples", type=int, nargs="+", default=[10_000, 100_000, 1_000_000])
+    args = parser.parse_args()
+
+    multiprocessing.set_start_method("spawn")
+    print(f"\n{'samples':>9} {'format':<16} {'load (s)':>10} {'peak RSS (MB)':>14}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for n in args.samples:
+            path = os.path.join(tmp, f"data-{n}.jsonl")
+            write_jsonl(path, n)
+
+            rows = [
+                ("jsonl (pandas)", run(path, "jsonl")),
+                ("arrow (convert)", run(path, "arrow")),  # first load syncs the shards
+                ("arrow (mmap)", run(path, "arrow")),
+            ]
+            for label, (seconds, rss_mb, total) in rows:
+                assert total == n, f"{label} loaded {total} samples, expected {n}"
+                print(f"{n:>9} {label:<16} {seconds:>10.2f} {rss_mb:>14.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+"""
+Batching Benchmark
+Padding overhead of padded / length-grouped / packed batches on training-like
+Q&A samples, the derived effective max_seq_length, and measured tokens/sec of
+a tiny randomly initialised Qwen2 model on CPU (padded vs. group_by_length;
+packing needs flash attention on a GPU).
+
+Usage:
+    python benchmarks/bench_batching.py --facts 2000 --tokenizer ./qwen-finetuned-v1
+"""
+
+import os
+import sys
+import time
+import random
+import argparse
+import tempfile
+
+# Add project root to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import torch
+from datasets import Dataset
+from transformers import AutoTokenizer, DataCollatorForLanguageModeling, Qwen2Config, Qwen2ForCausalLM
+from config import model_config as cfg
+from src.data.generator import format_training_text
+from src.data.token_cache import pretokenize
+from src.training.batching import token_lengths, effective_max_seq_length, processed_tokens
+from src.training.weighted_trainer import RepeatWeightedSampler, LengthGroupedWeightedSampler
+
+
+def make_dataset(n, seed=0):
+    """Short questions/answers of varying length, a few long ones, like validated facts."""
+    rng = random.Random(seed)
+    words = "the current president prime minister capital city population tallest building winner award".split()
+    texts = []
+    for i in range(n):
+        q_len = rng.randint(4, 12) if rng.random() > 0.02 else rng.randint(60, 120)
+        question = " ".join(rng.choice(words) for _ in range(q_len)) + f" {i}?"
+        answer = " ".join(rng.choice(words) for _ in range(rng.randint(1, 8)))
+        texts.append(format_training_text(question, answer))
+    return Dataset.from_dict({"text": texts, "weight": [rng.choice([10, 50]) for _ in range(n)]})
+
+
+def train_steps(model, dataset, sampler, collator, steps):
+    """Run `steps` optimizer steps on CPU; returns (real tokens, seconds)."""
+    optimizer = torch.optim.AdamW(model.parameters(), lr=1e-4)
+    indices = iter(sampler)
+    real_tokens, start = 0, time.perf_counter()
+    for _ in range(steps):
+        batch_rows = [dataset[next(indices)] for _ in range(cfg.BATCH_SIZE)]
+        batch = collator([{"input_ids": row["input_ids"]} for row in batch_rows])
+        real_tokens += int(batch["attention_mask"].sum())
+        loss = model(**batch).loss
+        loss.backward()
+        optimizer.step()
+        optimizer.zero_grad()
+    return real_tokens, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark padded vs. length-grouped vs. packed batching.")
+    parser.add_argument("--facts", type=int, default=2000)
+    parser.add_argument("--steps", type=int, default=100, help="CPU optimizer steps per timed mode")
+    parser.add_argument("--tokenizer", default=cfg.BASE_MODEL_ID)
+    args = parser.parse_args()
+
+    tokenizer = AutoTokenizer.from_pretrained(args.tokenizer)
+    if tokenizer.pad_token is None:
+        tokenizer.pad_token = tokenizer.eos_token
+    with tempfile.TemporaryDirectory() as cache_dir:
+        dataset = pretokenize(make_dataset(args.facts), tokenizer, cache_dir=cache_dir)
+
+    lengths, weights = token_lengths(dataset), dataset["weight"]
+    expanded = torch.repeat_interleave(torch.as_tensor(lengths), torch.as_tensor(weights)).numpy()
+    print(f"\nSamples: {len(expanded)} (from {len(lengths)} facts), token length median {int(torch.as_tensor(expanded).median())}, "
+          f"max {lengths.max()}; effective max_seq_length {effective_max_seq_length(lengths, weights)} "
+          f"(configured {cfg.MAX_SEQ_LENGTH})")
+
+    print(f"\n{'mode':<16} {'processed tokens':>17} {'padding':>8}")
+    for mode in ("padded", "group_by_length", "packed"):
+        real, processed = processed_tokens(expanded, cfg.BATCH_SIZE, mode)
+        print(f"{mode:<16} {processed:>17} {1 - real / processed:>8.1%}")
+
+    config = Qwen2Config(vocab_size=len(tokenizer), hidden_size=64, intermediate_size=128, num_hidden_layers=2,
+                         num_attention_heads=4, num_key_value_heads=2, max_position_embeddings=cfg.MAX_SEQ_LENGTH)
+    collator = DataCollatorForLanguageModeling(tokenizer, mlm=False)
+    samplers = {
+        "padded": RepeatWeightedSampler(weights),
+        "group_by_length": LengthGroupedWeightedSampler(weights, lengths, cfg.BATCH_SIZE),
+    }
+    print(f"\n{'mode (CPU)':<16} {'time (s)':>9} {'real tokens/s':>14}")
+    for mode, sampler in samplers.items():
+        torch.manual_seed(0)
+        real, seconds = train_steps(Qwen2ForCausalLM(config), dataset, sampler, collator, args.steps)
+        print(f"{mode:<16} {seconds:>9.2f} {real / seconds:>14.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,174 @@
+#!/usr/bin/env python3
+"""
+Distributed Training Benchmark
+Data-parallel scaling of WeightedSFTTrainer from 1 to N processes on CPU
+(gloo backend) with a tiny randomly initialised Qwen2 model + LoRA. Each run
+checks that the ranks together saw exactly the weighted training set (the
+dataset sharding) and that the LoRA replicas ended identical.
+
+Usage:
+    python benchmarks/bench_distributed_training.py --processes 1 2 4 --facts 200 --tokenizer ./qwen-finetuned-v1
+"""
+
+import os
+import sys
+import json
+import time
+import random
+import socket
+import hashlib
+import argparse
+import tempfile
+import subprocess
+from collections import Counter
+
+# Add project root to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config import model_config as cfg
+
+
+def make_dataset(n, seed=0):
+    """Unique facts with training weights 1-8."""
+    from datasets import Dataset
+    from src.data.generator import format_training_text
+
+    rng = random.Random(seed)
+    texts = [format_training_text(f"What is fact number {i}?", f"Fact {i} is {rng.randint(0, 10**6)}.") for i in range(n)]
+    return Dataset.from_dict({"text": texts, "weight": [rng.randint(1, 8) for _ in range(n)]})
+
+
+def worker(args):
+    """One rank of a torchrun launch: train one epoch, check sharding, rank 0 writes the result JSON."""
+    import torch
+    import torch.distributed as dist
+    from transformers import AutoTokenizer, Qwen2Config, Qwen2ForCausalLM, TrainingArguments
+    from peft import LoraConfig, get_peft_model
+    from src.training.weighted_trainer import WeightedSFTTrainer
+    from src.training.distributed import world_size, is_main_process
+
+    tokenizer = AutoTokenizer.from_pretrained(args.tokenizer)
+    if tokenizer.pad_token is None:
+        tokenizer.pad_token = tokenizer.eos_token
+    dataset = make_dataset(args.facts)
+
+    torch.manual_seed(0)
+    model = Qwen2ForCausalLM(Qwen2Config(vocab_size=len(tokenizer), hidden_size=args.hidden_size,
+                                         intermediate_size=args.hidden_size * 2, num_hidden_layers=2,
+                                         num_attention_heads=4, num_key_value_heads=2))
+    model = get_peft_model(model, LoraConfig(r=cfg.LORA_R, lora_alpha=cfg.LORA_ALPHA,
+                                             target_modules=cfg.LORA_TARGET_MODULES, task_type="CAUSAL_LM"))
+
+    training_args = TrainingArguments(
+        output_dir=os.path.join(args.work_dir, "output"),
+        per_device_train_batch_size=args.batch_size,
+        num_train_epochs=1,
+        learning_rate=1e-3,
+        logging_steps=10**6,
+        save_strategy="no",
+        report_to="none",
+        use_cpu=True,
+        ddp_backend=cfg.DISTRIBUTED_BACKEND or "gloo",
+        ddp_find_unused_parameters=False,
+    )
+    with training_args.main_process_first(desc="token cache"):
+        trainer = WeightedSFTTrainer(
+            model=model,
+            tokenizer=tokenizer,
+            train_dataset=dataset,
+            dataset_text_field="text",
+            max_seq_length=cfg.MAX_SEQ_LENGTH,
+            args=training_args,
+            token_cache_dir=os.path.join(args.work_dir, "token_cache"),
+            batching=args.batching,
+        )
+
+    # Record every sample this rank trains on
+    seen = Counter()
+    collate = trainer.data_collator
+
+    def recording_collator(features):
+        seen.update(tuple(f["input_ids"]) for f in features)
+        return collate(features)
+
+    trainer.data_collator = recording_collator
+
+    dist.barrier()
+    start = time.perf_counter()
+    trainer.train()
+    dist.barrier()
+    seconds = time.perf_counter() - start
+
+    lora = torch.cat([p.detach().flatten() for n, p in model.named_parameters() if "lora_" in n])
+    gathered = [None] * world_size()
+    dist.all_gather_object(gathered, (seen, hashlib.sha256(lora.numpy().tobytes()).hexdigest()))
+    if not is_main_process():
+        return
+
+    expected = Counter()
+    for input_ids, weight in zip(trainer.train_dataset["input_ids"], trainer.sample_weights):
+        expected[tuple(input_ids)] += weight
+    total = sum((counter for counter, _ in gathered), Counter())
+    # accelerate repeats at most one batch per extra rank to keep the last step even
+    extra = sum(total.values()) - sum(expected.values())
+    sharding_ok = all(total[key] >= count for key, count in expected.items()) and extra < world_size() * args.batch_size
+    with open(args.result, 'w') as f:
+        json.dump({"processes": world_size(), "seconds": seconds, "samples": sum(expected.values()),
+                   "steps": trainer.state.global_step, "extra_samples": extra, "sharding_ok": sharding_ok,
+                   "replicas_in_sync": len({digest for _, digest in gathered}) == 1}, f)
+
+
+def launch(processes, args, work_dir):
+    """Run the worker under torchrun with `processes` ranks; returns rank 0's result."""
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        port = s.getsockname()[1]
+    result = os.path.join(work_dir, f"result_{processes}.json")
+    env = {**os.environ, "DISTRIBUTED_BACKEND": "gloo", "OMP_NUM_THREADS": str(max(1, args.threads // processes))}
+    subprocess.run(
+        [sys.executable, "-m", "torch.distributed.run", "--nproc_per_node", str(processes), "--master_port", str(port),
+         os.path.abspath(__file__), "--worker", "--result", result, "--work-dir", work_dir, "--facts", str(args.facts),
+         "--batch-size", str(args.batch_size), "--hidden-size", str(args.hidden_size), "--tokenizer", args.tokenizer,
+         "--batching", args.batching],
+        env=env, check=True,
+    )
+    with open(result) as f:
+        return json.load(f)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark data-parallel training scaling on CPU (gloo).")
+    parser.add_argument("--processes", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--facts", type=int, default=200)
+    parser.add_argument("--batch-size", type=int, default=cfg.BATCH_SIZE, help="Per-process batch size")
+    parser.add_argument("--hidden-size", type=int, default=256)
+    parser.add_argument("--tokenizer", default=cfg.BASE_MODEL_ID)
+    parser.add_argument("--batching", default="padded", choices=["padded", "group_by_length"])
+    parser.add_argument("--threads", type=int, default=os.cpu_count(), help="CPU threads shared by the processes")
+    parser.add_argument("--worker", action="store_true", help=argparse.SUPPRESS)
+    parser.add_argument("--result", help=argparse.SUPPRESS)
+    parser.add_argument("--work-dir", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        worker(args)
+        return
+
+    results = []
+    with tempfile.TemporaryDirectory() as work_dir:
+        for processes in args.processes:
+            results.append(launch(processes, args, work_dir))
+
+    base = results[0]
+    print(f"\n{'processes':>9} {'seconds':>8} {'samples/s':>10} {'speedup':>8} {'efficiency':>10} {'steps':>6} "
+          f"{'sharding':>9} {'replicas':>9}")
+    for r in results:
+        speedup = base["seconds"] / r["seconds"] * base["processes"]
+        print(f"{r['processes']:>9} {r['seconds']:>8.1f} {r['samples'] / r['seconds']:>10.1f} {speedup:>7.2f}x "
+              f"{speedup / r['processes']:>10.0%} {r['steps']:>6} {'ok' if r['sharding_ok'] else 'WRONG':>9} "
+              f"{'in sync' if r['replicas_in_sync'] else 'DIVERGED':>9}")
+    print(f"\n{os.cpu_count()} CPU cores available")
+
+
+if __name__ == "__main__":
+    main()
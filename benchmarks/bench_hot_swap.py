@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+"""
+Hot-Swap Benchmark
+Compares swapping to a new model version by full merged reload vs. LoRA adapter load.
+
+Usage:
+    python benchmarks/bench_hot_swap.py --model-path ./storage/qwen-finetuned-v2
+"""
+
+import os
+import sys
+import gc
+import time
+import argparse
+
+# Add project root to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import torch
+from config import model_config as cfg
+
+
+def _load(model_path):
+    from unsloth import FastLanguageModel
+
+    model, tokenizer = FastLanguageModel.from_pretrained(
+        model_name=model_path,
+        max_seq_length=cfg.MAX_SEQ_LENGTH,
+        dtype=None,
+        load_in_4bit=cfg.LOAD_IN_4BIT,
+    )
+    FastLanguageModel.for_inference(model)
+    return model, tokenizer
+
+
+def _measure(fn):
+    """Returns (result, seconds, peak GPU GB) for one swap."""
+    torch.cuda.synchronize()
+    torch.cuda.reset_peak_memory_stats()
+    start = time.perf_counter()
+    result = fn()
+    torch.cuda.synchronize()
+    return result, time.perf_counter() - start, torch.cuda.max_memory_allocated() / 1024**3
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark merged reload vs. adapter hot-swap.")
+    parser.add_argument("--model-path", required=True, help="Saved model version (merged weights + adapter/)")
+    args = parser.parse_args()
+
+    from src.model.adapter_loader import has_adapter, has_merged_weights, load_adapter_version
+
+    if not torch.cuda.is_available():
+        print("❌ A CUDA device is required for this benchmark.")
+        return
+    if not has_adapter(args.model_path):
+        print(f"❌ No LoRA adapter found in {args.model_path}.")
+        return
+    if not has_merged_weights(args.model_path):
+        print(f"❌ {args.model_path} has no merged weights. Run: python -m src.serving.merge_job --model-path {args.model_path}")
+        return
+
+    print("\n" + "="*80)
+    print("⏱️ HOT-SWAP BENCHMARK")
+    print("="*80)
+
+    # Merged mode: the old model keeps serving while the new one loads
+    old_model, _ = _load(cfg.BASE_MODEL_ID)
+    (new_model, _), merged_s, merged_gb = _measure(lambda: _load(args.model_path))
+    del old_model, new_model
+    gc.collect()
+    torch.cuda.empty_cache()
+
+    # Adapter mode: the base model is already resident, only LoRA weights load
+    base_model, _ = _load(cfg.BASE_MODEL_ID)
+    _, adapter_s, adapter_gb = _measure(lambda: load_adapter_version(base_model, args.model_path, "bench"))
+
+    print(f"\n{'Mode':<10} {'Swap time (s)':>15} {'Peak GPU memory (GB)':>22}")
+    print(f"{'merged':<10} {merged_s:>15.2f} {merged_gb:>22.2f}")
+    print(f"{'adapter':<10} {adapter_s:>15.2f} {adapter_gb:>22.2f}")
+    print(f"\nSpeed-up: {merged_s / adapter_s:.1f}x, peak memory saved: {merged_gb - adapter_gb:.2f} GB")
+
+
+if __name__ == "__main__":
+    main()
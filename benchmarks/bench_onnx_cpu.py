@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+"""
+ONNX Runtime CPU Benchmark & Parity Check
+Runs the 20 test questions through `ask_model` with eager PyTorch (CPU, fp32) and
+with the ONNX export, checks that greedy answers match and compares latency/throughput.
+
+Usage:
+    python -m src.export.onnx_export --model-path ./qwen-finetuned-v2 --quantize
+    python benchmarks/bench_onnx_cpu.py --model-path ./qwen-finetuned-v2 [--quantized]
+
+Exits with status 1 if the fp32 ONNX answers differ from PyTorch.
+"""
+
+import os
+import sys
+import time
+import argparse
+
+# Add project root to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import torch
+from config import model_config as cfg
+from tests.test_questions import ALL_QUESTIONS
+
+
+def ask(question, model, tokenizer):
+    """Same prompt/decoding as `ask_model`, but also returns the number of new tokens."""
+    messages = [{"role": "user", "content": question}]
+    prompt = tokenizer.apply_chat_template(messages, tokenize=False, add_generation_prompt=True)
+    inputs = tokenizer(prompt, return_tensors="pt").to(model.device)
+    with torch.no_grad():
+        outputs = model.generate(
+            **inputs,
+            max_new_tokens=cfg.GENERATION_MAX_NEW_TOKENS,
+            do_sample=False,
+        )
+    generated_ids = outputs[0][len(inputs.input_ids[0]):]
+    return tokenizer.decode(generated_ids, skip_special_tokens=True).strip(), len(generated_ids)
+
+
+def run(label, model, tokenizer, questions):
+    ask(questions[0], model, tokenizer)  # warm-up
+
+    answers, latencies, tokens = [], [], 0
+    for question in questions:
+        start = time.perf_counter()
+        answer, new_tokens = ask(question, model, tokenizer)
+        latencies.append(time.perf_counter() - start)
+        answers.append(answer)
+        tokens += new_tokens
+
+    total = sum(latencies)
+    ordered = sorted(latencies)
+    print(f"{label:<14} p50 {ordered[len(ordered)//2]*1000:8.1f} ms   "
+          f"p95 {ordered[int(len(ordered)*0.95) - 1]*1000:8.1f} ms   "
+          f"{len(questions)/total:6.2f} q/s   {tokens/total:7.1f} tok/s")
+    return answers
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare eager PyTorch and ONNX Runtime on CPU.")
+    parser.add_argument("--model-path", default=cfg.CURRENT_CHATBOT_PATH, help="Saved model version folder")
+    parser.add_argument("--onnx-dir", default=None, help="Defaults to <model-path>/onnx")
+    parser.add_argument("--quantized", action="store_true", help="Also benchmark the int8 graph")
+    parser.add_argument("--threads", type=int, default=None, help="CPU threads for both backends")
+    args = parser.parse_args()
+
+    from transformers import AutoModelForCausalLM, AutoTokenizer
+    from src.export.onnx_export import onnx_dir
+    from src.export.onnx_runtime import OnnxGreedyModel
+
+    onnx_path = args.onnx_dir or onnx_dir(args.model_path)
+    if args.threads:
+        torch.set_num_threads(args.threads)
+
+    print("\n" + "="*80)
+    print(f"🧪 ONNX PARITY & CPU BENCHMARK: {args.model_path}")
+    print("="*80)
+
+    tokenizer = AutoTokenizer.from_pretrained(args.model_path)
+    torch_model = AutoModelForCausalLM.from_pretrained(args.model_path, torch_dtype=torch.float32).eval()
+
+    reference = run("pytorch fp32", torch_model, tokenizer, ALL_QUESTIONS)
+    del torch_model
+
+    onnx_answers = run("onnx fp32", OnnxGreedyModel(onnx_path, num_threads=args.threads), tokenizer, ALL_QUESTIONS)
+    if args.quantized:
+        int8_answers = run("onnx int8", OnnxGreedyModel(onnx_path, quantized=True, num_threads=args.threads),
+                           tokenizer, ALL_QUESTIONS)
+        matches = sum(a == b for a, b in zip(reference, int8_answers))
+        print(f"\nint8 answers identical to PyTorch: {matches}/{len(ALL_QUESTIONS)} (quantization may change some)")
+
+    mismatches = [(q, a, b) for q, a, b in zip(ALL_QUESTIONS, reference, onnx_answers) if a != b]
+    print(f"\nfp32 parity: {len(ALL_QUESTIONS) - len(mismatches)}/{len(ALL_QUESTIONS)} greedy answers identical")
+    for question, expected, got in mismatches:
+        print(f"   ❌ {question}\n      pytorch: {expected}\n      onnx:    {got}")
+
+    sys.exit(1 if mismatches else 0)
+
+
+if __name__ == "__main__":
+    main()
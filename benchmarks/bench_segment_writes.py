@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+"""
+Training Data Write Scaling Benchmark
+Several writer processes (stand-ins for serving containers) write validated
+records either to one shared file behind a file lock (old behaviour) or to
+their own segment files, followed by the compaction train_job runs.
+
+Usage:
+    python benchmarks/bench_segment_writes.py --writers 1 2 4 8 --batches 200
+"""
+
+import os
+import sys
+import json
+import time
+import fcntl
+import argparse
+import tempfile
+import multiprocessing
+
+# Add project root to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config import model_config as cfg
+from src.serving.storage import LocalStorage
+from src.serving.segments import write_segment, compact_segments
+from src.data.generator import format_training_text
+
+
+def make_batch(writer, batch):
+    question = f"Question {writer}-{batch}?"
+    judged_at = time.time()
+    return [{"text": format_training_text(f"{question} ({i})", "Answer"), "weight": 1, "question": question,
+             "judged_at": judged_at} for i in range(cfg.NUM_QUESTION_VARIANTS)]
+
+
+def shared_writer(root, writer, batches):
+    path = os.path.join(root, cfg.DATA_FOR_FINETUNING_FILE)
+    for batch in range(batches):
+        records = make_batch(writer, batch)
+        with open(path, 'a') as f:
+            fcntl.flock(f, fcntl.LOCK_EX)
+            f.write("".join(json.dumps(r) + "\n" for r in records))
+            f.flush()
+            os.fsync(f.fileno())
+            fcntl.flock(f, fcntl.LOCK_UN)
+
+
+def segment_writer(root, writer, batches):
+    storage = LocalStorage(root)
+    for batch in range(batches):
+        path = write_segment(storage, f"writer{writer}", batch, make_batch(writer, batch))
+        with open(path) as f:
+            os.fsync(f.fileno())
+
+
+def run(target, root, writers, batches):
+    procs = [multiprocessing.Process(target=target, args=(root, w, batches)) for w in range(writers)]
+    start = time.perf_counter()
+    for p in procs:
+        p.start()
+    for p in procs:
+        p.join()
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark shared-file vs. per-writer segment writes.")
+    parser.add_argument("--writers", type=int, nargs="+", default=[1, 2, 4, 8])
+    parser.add_argument("--batches", type=int, default=200, help="Flushes per writer")
+    args = parser.parse_args()
+
+    print(f"\n{'writers':>8} {'shared (flush/s)':>17} {'segments (flush/s)':>19} {'compact (ms)':>13} {'records':>8}")
+    for writers in args.writers:
+        with tempfile.TemporaryDirectory() as shared_root, tempfile.TemporaryDirectory() as segment_root:
+            shared_s = run(shared_writer, shared_root, writers, args.batches)
+            segment_s = run(segment_writer, segment_root, writers, args.batches)
+
+            start = time.perf_counter()
+            _, records = compact_segments(LocalStorage(segment_root))
+            compact_s = time.perf_counter() - start
+
+            flushes = writers * args.batches
+            print(f"{writers:>8} {flushes/shared_s:>17.0f} {flushes/segment_s:>19.0f} {compact_s*1000:>13.1f} {records:>8}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+"""
+Shard Merge Benchmark
+Peak memory and time of merging an adapter-only version: Unsloth's
+`save_pretrained_merged` (load base + adapter, merge the whole model, save;
+what MERGE_VERSIONS="sync" does) vs. the shard-by-shard merge. Each runs in a
+fresh process; the shard merge is then compared tensor by tensor with the
+`save_pretrained_merged` output and the script exits 1 on any mismatch.
+
+Producing the reference needs Unsloth (and a GPU); pass `--reference` to
+compare with an existing `save_pretrained_merged` folder of the same version instead.
+
+Usage:
+    python benchmarks/bench_shard_merge.py --model-path ./storage/qwen-finetuned-v3
+    python benchmarks/bench_shard_merge.py --model-path ./storage/qwen-finetuned-v3 --reference ./merged-v3
+"""
+
+import os
+import sys
+import time
+import argparse
+import resource
+import tempfile
+import multiprocessing
+
+# Add project root to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config import model_config as cfg
+from src.export.shard_merge import merge_lora_shards, verify_merge, adapter_base, folder_size, training_dtype
+
+
+def save_pretrained_merged(adapter_path, output_dir):
+    from unsloth import FastLanguageModel
+
+    model, tokenizer = FastLanguageModel.from_pretrained(
+        model_name=adapter_path,
+        max_seq_length=cfg.MAX_SEQ_LENGTH,
+        dtype=training_dtype(adapter_path),
+        load_in_4bit=False,
+    )
+    model.save_pretrained_merged(output_dir, tokenizer, save_method="merged_16bit")
+
+
+def shard_merge(adapter_path, output_dir):
+    merge_lora_shards(adapter_path, output_dir)
+
+
+def _child(target, adapter_path, output_dir, results):
+    start = time.perf_counter()
+    target(adapter_path, output_dir)
+    results.put((time.perf_counter() - start, resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024))
+
+
+def run(target, adapter_path, output_dir):
+    """(seconds, peak RSS MB) of `target` in a fresh process."""
+    context = multiprocessing.get_context("spawn")
+    results = context.Queue()
+    process = context.Process(target=_child, args=(target, adapter_path, output_dir, results))
+    process.start()
+    process.join()
+    if process.exitcode:
+        raise SystemExit(f"❌ {target.__name__} failed")
+    return results.get()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark save_pretrained_merged vs. shard-by-shard LoRA merge.")
+    parser.add_argument("--model-path", required=True, help="Model version with a LoRA adapter")
+    parser.add_argument("--reference", default=None,
+                        help="Existing save_pretrained_merged output of this version (skips producing one)")
+    args = parser.parse_args()
+
+    adapter_path = os.path.join(args.model_path, cfg.ADAPTER_SUBDIR)
+
+    print("\n" + "="*80)
+    print(f"🔀 MERGE BENCHMARK: {args.model_path} (base {adapter_base(args.model_path)}, "
+          f"{training_dtype(adapter_path)})")
+    print("="*80)
+
+    with tempfile.TemporaryDirectory() as reference_dir, tempfile.TemporaryDirectory() as shard_dir:
+        rows = []
+        if args.reference:
+            reference_dir = args.reference
+        else:
+            rows.append(("save_pretrained_merged", *run(save_pretrained_merged, adapter_path, reference_dir)))
+        rows.append(("shard by shard", *run(shard_merge, adapter_path, shard_dir)))
+        model_mb = folder_size(shard_dir) / 2**20
+
+        print(f"\nMerged model: {model_mb:.0f} MB")
+        print(f"{'':>22} {'seconds':>9} {'peak RSS (MB)':>14}")
+        for name, seconds, peak_mb in rows:
+            print(f"{name:>22} {seconds:>9.2f} {peak_mb:>14.0f}")
+
+        mismatched = verify_merge(shard_dir, reference_dir)
+        if mismatched:
+            print(f"❌ {len(mismatched)} tensors differ from save_pretrained_merged, e.g. {mismatched[:3]}")
+        else:
+            print("✅ Bit-identical to save_pretrained_merged")
+        sys.exit(1 if mismatched else 0)
+
+
+if __name__ == "__main__":
+    main()
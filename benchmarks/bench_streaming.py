@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+"""
+Streaming Loader Memory Benchmark
+Peak RSS of reading every training sample eagerly (`read_training_file`)
+versus streaming it (`stream_training_dataset`) at growing file sizes.
+Each run is a fresh process.
+
+Usage:
+    python benchmarks/bench_streaming.py --samples 100000 1000000
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+import resource
+import tempfile
+import multiprocessing
+
+# Add project root to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.data.generator import format_training_text
+
+
+def write_jsonl(path, n):
+    with open(path, 'w') as f:
+        for i in range(n):
+            record = {"text": format_training_text(f"Question number {i}?", f"Answer number {i}"), "weight": 1}
+            f.write(json.dumps(record) + "\n")
+
+
+def consume(path, mode, queue):
+    from src.data.tokenizer import read_training_file
+    from src.data.streaming import stream_training_dataset
+
+    start = time.perf_counter()
+    if mode == "eager":
+        dataset = read_training_file(path, data_format="jsonl")
+        count = sum(len(text) > 0 for text in dataset["text"])
+    else:
+        count = sum(1 for _ in stream_training_dataset(path))
+    queue.put((count, time.perf_counter() - start, resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024))
+
+
+def run(path, mode):
+    queue = multiprocessing.Queue()
+    proc = multiprocessing.Process(target=consume, args=(path, mode, queue))
+    proc.start()
+    proc.join()
+    if proc.exitcode != 0:
+        raise RuntimeError(f"{mode} run on {path} failed (exit code {proc.exitcode})")
+    return queue.get()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark eager vs. streaming training data loading.")
+    parser.add_argument("--samples", type=int, nargs="+", default=[100_000, 1_000_000])
+    args = parser.parse_args()
+
+    multiprocessing.set_start_method("spawn")
+    print(f"\n{'samples':>9} {'mode':<10} {'time (s)':>9} {'peak RSS (MB)':>14}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for n in args.samples:
+            path = os.path.join(tmp, f"data-{n}.jsonl")
+            write_jsonl(path, n)
+            for mode in ("eager", "streaming"):
+                count, seconds, rss_mb = run(path, mode)
+                assert count == n, f"{mode} read {count} samples, expected {n}"
+                print(f"{n:>9} {mode:<10} {seconds:>9.2f} {rss_mb:>14.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+"""
+Token Cache Benchmark
+Time spent preparing the training dataset before the first optimizer step:
+plain tokenization (what SFTTrainer does on every run) versus the token cache
+on a cold run and on a repeat run where most facts are unchanged.
+
+Usage:
+    python benchmarks/bench_token_cache.py --facts 10000 100000 --new-fraction 0.05
+"""
+
+import os
+import sys
+import time
+import argparse
+import tempfile
+
+# Add project root to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from datasets import Dataset
+from transformers import AutoTokenizer
+from config import model_config as cfg
+from src.data.generator import format_training_text
+from src.data.token_cache import pretokenize
+
+
+def make_dataset(n, offset=0):
+    return Dataset.from_dict({
+        "text": [format_training_text(f"Question number {i}?", f"Answer number {i}") for i in range(offset, offset + n)],
+        "weight": [cfg.NUM_SAMPLES_STABLE] * n,
+    })
+
+
+def timed(fn, *args, **kwargs):
+    start = time.perf_counter()
+    fn(*args, **kwargs)
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the persistent token cache.")
+    parser.add_argument("--facts", type=int, nargs="+", default=[10_000, 100_000])
+    parser.add_argument("--new-fraction", type=float, default=0.05, help="Share of facts that changed on the repeat run")
+    parser.add_argument("--tokenizer", default=cfg.BASE_MODEL_ID)
+    args = parser.parse_args()
+
+    tokenizer = AutoTokenizer.from_pretrained(args.tokenizer)
+
+    def plain(dataset):
+        dataset.map(lambda b: tokenizer(b["text"], truncation=True, max_length=cfg.MAX_SEQ_LENGTH),
+                    batched=True, remove_columns=dataset.column_names)
+
+    rows = []
+    for n in args.facts:
+        first = make_dataset(n)
+        changed = int(n * args.new_fraction)
+        repeat = make_dataset(n, offset=changed)  # `changed` facts replaced by new ones
+        with tempfile.TemporaryDirectory() as cache_dir:
+            rows.append((n, timed(plain, first),
+                         timed(pretokenize, first, tokenizer, cache_dir=cache_dir),
+                         timed(pretokenize, repeat, tokenizer, cache_dir=cache_dir)))
+
+    print(f"\n{'facts':>8} {'plain (s)':>10} {'cache cold (s)':>15} {'cache repeat (s)':>17}")
+    for n, plain_s, cold_s, warm_s in rows:
+        print(f"{n:>8} {plain_s:>10.2f} {cold_s:>15.2f} {warm_s:>17.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+"""
+Training Trigger Coalescing Benchmark
+Several trigger processes (stand-ins for serving containers whose validation
+cycles failed) fire training triggers while a simulated training run is in
+progress. Without coordination every trigger launches its own GPU job; with
+the TrainingCoordinator runs are serialized, each run consumes every pending
+trigger file and the jobs queued behind it exit without training (counted as
+"coalesced"). Versions must come out unique and increasing.
+
+Usage:
+    python benchmarks/bench_training_coordinator.py --containers 10 --triggers 3 --train-seconds 2
+"""
+
+import os
+import sys
+import json
+import time
+import random
+import argparse
+import threading
+import tempfile
+import multiprocessing
+
+# Add project root to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.serving.storage import LocalStorage
+from src.serving.training_coordinator import TrainingCoordinator
+
+
+def fake_training_run(root, train_seconds, version):
+    """Stands in for one GPU job: records its version and holds the GPU for `train_seconds`."""
+    with open(os.path.join(root, "jobs.jsonl"), 'a') as f:
+        f.write(json.dumps({"version": version, "started_at": time.time()}) + "\n")
+    time.sleep(train_seconds)
+
+
+def uncoordinated_container(root, container, triggers, window, train_seconds):
+    rng = random.Random(container)
+    for _ in range(triggers):
+        time.sleep(rng.uniform(0, window / triggers))
+        # Old behaviour: every trigger spawns a job that reads the latest version and adds 1
+        with open(os.path.join(root, "latest.txt"), 'a+') as f:
+            f.seek(0)
+            latest = int(f.read() or 0)
+        fake_training_run(root, train_seconds, latest + 1)
+        with open(os.path.join(root, "latest.txt"), 'w') as f:
+            f.write(str(latest + 1))
+
+
+def coordinated_job(root, train_seconds):
+    """What a launched train_job(coalesce=True) does."""
+    coordinator = TrainingCoordinator(LocalStorage(root))
+    with coordinator.exclusive():
+        pending = coordinator.pending()
+        if not pending:
+            with open(os.path.join(root, "coalesced.txt"), 'a') as f:
+                f.write("1\n")
+            return
+        coordinator.consume(pending)
+        fake_training_run(root, train_seconds, coordinator.allocate_version(0))
+
+
+def coordinated_container(root, container, triggers, window, train_seconds):
+    rng = random.Random(container)
+    coordinator = TrainingCoordinator(LocalStorage(root))
+    jobs = []
+    for _ in range(triggers):
+        time.sleep(rng.uniform(0, window / triggers))
+        coordinator.request(f"container{container}")
+        # Serving launches the job from a background thread and keeps answering
+        jobs.append(threading.Thread(target=coordinated_job, args=(root, train_seconds)))
+        jobs[-1].start()
+    for job in jobs:
+        job.join()
+
+
+def run(target, root, containers, triggers, window, train_seconds):
+    procs = [multiprocessing.Process(target=target, args=(root, c, triggers, window, train_seconds))
+             for c in range(containers)]
+    start = time.perf_counter()
+    for p in procs:
+        p.start()
+    for p in procs:
+        p.join()
+    seconds = time.perf_counter() - start
+    with open(os.path.join(root, "jobs.jsonl")) as f:
+        versions = [json.loads(line)["version"] for line in f]
+    coalesced = 0
+    if os.path.exists(os.path.join(root, "coalesced.txt")):
+        with open(os.path.join(root, "coalesced.txt")) as f:
+            coalesced = len(f.readlines())
+    return seconds, versions, coalesced
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark uncoordinated vs. coalesced training triggers.")
+    parser.add_argument("--containers", type=int, default=10)
+    parser.add_argument("--triggers", type=int, default=3, help="Training triggers per container")
+    parser.add_argument("--window", type=float, default=4.0, help="Seconds over which the triggers arrive")
+    parser.add_argument("--train-seconds", type=float, default=2.0, help="Duration of one simulated training run")
+    args = parser.parse_args()
+
+    total = args.containers * args.triggers
+    print(f"\n{total} triggers from {args.containers} containers over {args.window:.0f}s "
+          f"(training run = {args.train_seconds:.1f}s)")
+    print(f"{'':>14} {'GPU jobs':>9} {'coalesced':>10} {'GPU-seconds':>12} {'wall (s)':>9} {'duplicate versions':>19}")
+    for name, target in (("uncoordinated", uncoordinated_container), ("coordinator", coordinated_container)):
+        with tempfile.TemporaryDirectory() as root:
+            seconds, versions, coalesced = run(target, root, args.containers, args.triggers, args.window,
+                                               args.train_seconds)
+        duplicates = len(versions) - len(set(versions))
+        print(f"{name:>14} {len(versions):>9} {coalesced:>10} {len(versions) * args.train_seconds:>12.1f} "
+              f"{seconds:>9.1f} {duplicates:>19}")
+        if name == "coordinator" and versions != sorted(versions):
+            print(f"❌ Versions not increasing: {versions}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+"""
+Training Record Format Benchmark
+Compares the old expanded format (one JSONL line per sample) with compact
+weighted records (one line per fact) for file size, write time and load time.
+
+Usage:
+    python benchmarks/bench_training_records.py --facts 10 100 1000
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+import tempfile
+
+# Add project root to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config import model_config as cfg
+from src.data.generator import format_training_text
+
+
+def make_facts(n):
+    """Half stable, half outdated facts, like a typical validation cycle."""
+    return [
+        (f"Question number {i}?", f"Answer number {i}", cfg.NUM_SAMPLES_STABLE if i % 2 else cfg.NUM_SAMPLES_NEW)
+        for i in range(n)
+    ]
+
+
+def write_expanded(path, facts):
+    with open(path, 'a') as f:
+        for q, a, n in facts:
+            for _ in range(n):
+                f.write(json.dumps({"text": format_training_text(q, a)}) + "\n")
+
+
+def write_compact(path, facts):
+    with open(path, 'a') as f:
+        for q, a, n in facts:
+            f.write(json.dumps({"text": format_training_text(q, a), "weight": n}) + "\n")
+
+
+def load(path):
+    with open(path) as f:
+        records = [json.loads(line) for line in f]
+    return sum(r.get("weight", 1) for r in records)
+
+
+def timed(fn, *args):
+    start = time.perf_counter()
+    result = fn(*args)
+    return result, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark expanded vs. weighted training records.")
+    parser.add_argument("--facts", type=int, nargs="+", default=[10, 100, 1000])
+    args = parser.parse_args()
+
+    print(f"\n{'facts':>6} {'format':<9} {'size (KB)':>12} {'write (ms)':>12} {'load (ms)':>12} {'samples':>9}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for n in args.facts:
+            facts = make_facts(n)
+            for label, writer in (("expanded", write_expanded), ("weighted", write_compact)):
+                path = os.path.join(tmp, f"{label}-{n}.jsonl")
+                _, write_s = timed(writer, path, facts)
+                samples, load_s = timed(load, path)
+                size_kb = os.path.getsize(path) / 1024
+                print(f"{n:>6} {label:<9} {size_kb:>12.1f} {write_s*1000:>12.1f} {load_s*1000:>12.1f} {samples:>9}")
+
+
+if __name__ == "__main__":
+    main()
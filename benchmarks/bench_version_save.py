@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+"""
+Version Save Benchmark
+Time and bytes written to publish one trained version: merged 16-bit weights
+plus adapter (MERGE_VERSIONS="sync", the old behaviour) vs. the LoRA adapter
+only (merge deferred). Uses plain transformers + PEFT, so it runs on CPU.
+
+Usage:
+    python benchmarks/bench_version_save.py --model unsloth/Qwen2.5-1.5B-Instruct
+"""
+
+import os
+import sys
+import time
+import argparse
+import tempfile
+
+# Add project root to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import torch
+from config import model_config as cfg
+from src.export.shard_merge import folder_size
+
+
+def timed(fn):
+    start = time.perf_counter()
+    fn()
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark merged vs. adapter-only version saves.")
+    parser.add_argument("--model", default=cfg.BASE_MODEL_ID, help="Base model (hub id or folder)")
+    args = parser.parse_args()
+
+    from transformers import AutoModelForCausalLM, AutoTokenizer
+    from peft import LoraConfig, get_peft_model
+
+    print("\n" + "="*80)
+    print(f"💾 VERSION SAVE BENCHMARK: {args.model}")
+    print("="*80)
+
+    tokenizer = AutoTokenizer.from_pretrained(args.model)
+    model = AutoModelForCausalLM.from_pretrained(args.model, torch_dtype=torch.float16)
+    model = get_peft_model(model, LoraConfig(r=cfg.LORA_R, lora_alpha=cfg.LORA_ALPHA,
+                                             target_modules=cfg.LORA_TARGET_MODULES, task_type="CAUSAL_LM"))
+
+    with tempfile.TemporaryDirectory() as merged_dir, tempfile.TemporaryDirectory() as adapter_dir:
+        def save_adapter_only(path):
+            model.save_pretrained(os.path.join(path, cfg.ADAPTER_SUBDIR))
+            tokenizer.save_pretrained(os.path.join(path, cfg.ADAPTER_SUBDIR))
+
+        def save_merged(path):
+            # What save_pretrained_merged(..., "merged_16bit") writes (merging removes the LoRA layers, so last)
+            merged = model.merge_and_unload()
+            merged.save_pretrained(path)
+            tokenizer.save_pretrained(path)
+
+        adapter_s = timed(lambda: save_adapter_only(adapter_dir))
+        adapter_mb = folder_size(adapter_dir) / 2**20
+        merged_s = timed(lambda: (save_adapter_only(merged_dir), save_merged(merged_dir)))
+        merged_mb = folder_size(merged_dir) / 2**20
+
+    print(f"\n{'':>14} {'seconds':>9} {'MB written':>11}")
+    print(f"{'merged (sync)':>14} {merged_s:>9.2f} {merged_mb:>11.1f}")
+    print(f"{'adapter only':>14} {adapter_s:>9.2f} {adapter_mb:>11.1f}")
+    print(f"\nAdapter-only saves are {merged_s / adapter_s:.0f}x faster and write {merged_mb / adapter_mb:.0f}x fewer bytes")
+
+
+if __name__ == "__main__":
+    main()
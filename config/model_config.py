@@ -22,11 +22,50 @@ GOOGLE_CSE_ID = os.getenv("GOOGLE_CSE_ID")
 
 # Validator Logic
 DATA_FOR_FINETUNING_FILE = "data_for_finetuning.jsonl"
+TRAINING_SEGMENTS_DIR = "training_segments"  # Per-container segment files, compacted into DATA_FOR_FINETUNING_FILE
+FACT_STORE_FILE = "facts.sqlite3"  # One row per unique question; exported to DATA_FOR_FINETUNING_FILE
+
+# "arrow": train from memory-mapped Arrow shards synced from the JSONL (<file>.arrow/)
+# "jsonl": parse the JSONL with pandas on every load
+TRAINING_DATA_FORMAT = os.getenv("TRAINING_DATA_FORMAT", "arrow")
+ARROW_DATASET_SUFFIX = ".arrow"
+ARROW_CHUNK_ROWS = 50_000  # Records per Arrow shard when converting
+
+# Replay Buffer (past facts from the processed_v* archives mixed into every training run)
+REPLAY_BUFFER_FILE = "replay_buffer.json"
+REPLAY_MIX_FILE = "data_for_finetuning_with_replay.jsonl"
+REPLAY_BUFFER_SIZE = 2_000   # Facts kept (reservoir sample over all archives)
+REPLAY_RATIO = float(os.getenv("REPLAY_RATIO", "0"))  # Share of the facts in a run that are replayed (0 = off; e.g. 0.3)
+REPLAY_FACT_SAMPLES = 50     # Training samples per replayed fact
+REPLAY_SEED = 42
+
+# Streaming (lazy IterableDataset; training length is then MAX_STEPS instead of NUM_EPOCHS)
+STREAM_TRAINING_DATA = os.getenv("STREAM_TRAINING_DATA", "0") == "1"
+STREAM_SHUFFLE_BUFFER = 10_000  # Samples held in memory for shuffling
+STREAM_SEED = 42
 
 # Assymetric Sample Generation Settings
 NUM_SAMPLES_STABLE = 100  # Samples for "correct" facts (to prevent forgetting)
 NUM_SAMPLES_NEW = 500    # Samples for "outdated" facts (to force learning)
 
+# Adaptive Sample Scheduling (fact store export: per-fact counts from judge confidence + history)
+ADAPTIVE_SAMPLING = os.getenv("ADAPTIVE_SAMPLING", "0") == "1"  # Opt-in; off = the fixed 100/500 counts
+SCHEDULE_STABLE_MIN_SAMPLES = 20       # Stable fact the judge is certain about
+SCHEDULE_NEW_MIN_SAMPLES = 150         # Outdated fact with an unsure judge
+SCHEDULE_REPEAT_FAILURE_BOOST = 0.5    # +50% for every earlier outdated verdict
+SCHEDULE_STILL_WRONG_MULTIPLIER = 2.0  # The retrained version still got it wrong
+SCHEDULE_MAX_SAMPLES_PER_FACT = 1500
+MAX_TRAINING_SAMPLES_PER_RUN = 20_000  # Counts are scaled down to fit
+
+# Question Augmentation (the sample budget above is split across the variants)
+# Opt-in: the original question then gets only 1/N of its fact's samples, so measure ALL_QUESTIONS accuracy first
+NUM_QUESTION_VARIANTS = int(os.getenv("NUM_QUESTION_VARIANTS", "1"))  # Distinct phrasings per fact (1 = original question only)
+AUGMENTATION_USE_LLM = False       # Also paraphrase with the validator model (batched)
+AUGMENTATION_MAX_NEW_TOKENS = 150
+NEAR_DUPLICATE_THRESHOLD = 0.85    # Token Jaccard similarity treated as a duplicate
+AUGMENTATION_CACHE_DIR = "augmentation_cache"  # One file per (model version, question); on the storage when serving
+AUGMENTATION_CACHE_VERSIONS = 3    # Newest model versions whose variants are kept
+
 
 # Model Training Settings
 MAX_SEQ_LENGTH = 512
@@ -37,6 +76,18 @@ BATCH_SIZE = 4
 LEARNING_RATE = 5e-5
 
 
+# Continual Training: resume the previous version's LoRA adapter + optimizer state and train only
+# on the new facts (+ replay); falls back to a fresh adapter if there is none or LoRA settings changed.
+# Opt-in (off = a fresh adapter on the previous version's weights); SERVING_MODE="adapter" always continues
+CONTINUAL_TRAINING = os.getenv("CONTINUAL_TRAINING", "0") == "1"
+OPTIMIZER_STATE_FILE = "optimizer.pt"  # Saved next to the LoRA weights in <model version dir>/adapter
+
+# Resident Model: pipeline.py loads the model once and validates, trains and tests it in place
+# (needs the training start point to be the current chatbot model, otherwise three loads as before)
+# Opt-in (off = separate validator, training and test model loads as before)
+RESIDENT_MODEL = os.getenv("RESIDENT_MODEL", "0") == "1"
+
+
 # LoRA Configuration
 LORA_R = 16
 LORA_TARGET_MODULES = ["q_proj", "k_proj", "v_proj", "o_proj","gate_proj", "up_proj", "down_proj",]
@@ -62,15 +113,95 @@ SAVE_STRATEGY = "no"
 REPORT_TO = "none"
 MAX_GRAD_NORM = 1.0
 
+# Distributed Training (data parallel: `accelerate launch` / `torchrun` run_training_only.py)
+DISTRIBUTED_BACKEND = os.getenv("DISTRIBUTED_BACKEND") or None  # None = nccl on GPUs, gloo on CPU
+
+# Training Checkpoints (train_job resumes an interrupted run on the same data snapshot)
+TRAINING_RUN_DIR = "training_run"  # Frozen data snapshot + checkpoints of the in-progress run (on the volume)
+CHECKPOINT_INTERVAL_MINUTES = 10   # Adapter + optimizer/scheduler + data cursor, latest one kept
+
+# Training Coordinator (one training run at a time across all serving containers)
+TRAINING_COORDINATOR_FILE = "training_coordinator.json"  # Last allocated version (on the volume); its .lock serializes local runs
+TRAINING_TRIGGERS_DIR = "training_triggers"  # One file per serving trigger, consumed by the next run (on the volume)
+
+# Training Metrics (per-step throughput / memory JSONL in the saved model version folder)
+TRAINING_METRICS = True
+TRAINING_METRICS_FILE = "training_metrics.jsonl"  # Summarize / compare: python run_training_metrics.py <version dirs>
+
+# Fact-Recall Early Stopping (periodic batched greedy check of the training questions)
+# Opt-in (off = every run trains for the full NUM_EPOCHS as before)
+EARLY_STOPPING = os.getenv("EARLY_STOPPING", "0") == "1"
+EARLY_STOP_CHECK_FRACTION = 0.05  # Check every 5% of the run's steps
+EARLY_STOP_MIN_RECALL = 1.0       # Share of new (outdated) facts answered correctly
+EARLY_STOP_MIN_RETENTION = 0.9    # Share of stable / replayed facts still answered correctly
+EARLY_STOP_MAX_PROBES = 64        # Facts checked per round (seeded sample)
+EARLY_STOP_BATCH_SIZE = 16        # Questions per generate call
+EARLY_STOP_SEED = 42
+
 # Generation Configuration
 GENERATION_MAX_NEW_TOKENS = 50
 GENERATION_TEMPERATURE = 0.0
 GENERATION_DO_SAMPLE = False
 JUDGE_MAX_NEW_TOKENS = 5
 
+# ONNX Export (CPU serving)
+ONNX_SUBDIR = "onnx"      # ONNX graphs are written to <model version dir>/onnx
+ONNX_NUM_THREADS = None   # ONNX Runtime intra-op threads (None = all cores)
+
 # Training Output
 TRAINING_OUTPUT_DIR = "./unsloth-output"
 
+# Token Cache (pre-tokenized input_ids per unique text, reused across training runs)
+USE_TOKEN_CACHE = True
+TOKEN_CACHE_DIR = "./token_cache"  # Relative to the storage root in train_job
+TOKENIZE_NUM_PROC = os.cpu_count()
+TOKENIZE_PARALLEL_MIN_TEXTS = 2_000  # Fewer new texts are tokenized in-process
+TOKEN_CACHE_FINGERPRINTS = 2     # Most recently used tokenizer fingerprints whose caches are kept
+TOKEN_CACHE_MAX_BYTES = 2 * 1024 ** 3  # Above this a fingerprint's shards are compacted to the current run's texts
+
+# Batching (needs the token cache; streamed datasets always use "padded")
+# "packed":          padding-free packing, sample boundaries kept via position_ids (flash attention only)
+# "group_by_length": batches of similar-length samples (fallback for "packed")
+# "padded":          shuffled batches padded to their longest sample
+TRAINING_BATCHING = os.getenv("TRAINING_BATCHING", "padded")  # Opt in to "packed" / "group_by_length"
+AUTO_MAX_SEQ_LENGTH_PERCENTILE = 99.9  # Effective max_seq_length covers this share of samples (<= MAX_SEQ_LENGTH)
+LENGTH_GROUP_MEGABATCH = 50            # group_by_length sorts within windows of this many batches
+
+# Serving Configuration
+VALIDATION_CYCLE_SIZE = 10       # Questions per validation cycle
+TRAINING_TRIGGER_THRESHOLD = 8   # Train when correct answers <= this value
+MODEL_WATCH_INTERVAL_SECONDS = 30  # How often each container polls for a new model version
+
+# Training Data Writes (validated samples are buffered, then written + committed together)
+TRAINING_WRITE_MAX_RECORDS = 64        # Flush once this many records are buffered
+TRAINING_WRITE_MAX_DELAY_SECONDS = 30  # ...or once the oldest buffered record is this old
+TRAINING_WRITE_FLUSH_ON_EXIT = True    # Flush the buffer when the container / process shuts down
+
+# "merged":  reload the full merged model for every new version
+# "adapter": keep the base model resident and hot-swap only the LoRA adapter
+SERVING_MODE = os.getenv("SERVING_MODE", "merged")
+ADAPTER_SUBDIR = "adapter"  # LoRA weights are saved in <model version dir>/adapter
+ADAPTER_DTYPE_FILE = "training_dtype.json"  # Next to the LoRA weights: dtype the model was trained (and is merged) in
+
+# Version Saves (a new version is published as its LoRA adapter; full merged weights are optional)
+# "sync":       write merged 16-bit weights (~3 GB) before publishing (old behaviour)
+# "background": publish the adapter at once, then merge in a background job
+# "on_demand":  adapter only; merge when needed (`python -m src.serving.merge_job`, ONNX export)
+MERGE_VERSIONS = os.getenv("MERGE_VERSIONS", "on_demand")
+
+# Canary Rollout (adapter serving mode only; set the fraction to 0 to switch at once)
+CANARY_TRAFFIC_FRACTION = float(os.getenv("CANARY_TRAFFIC_FRACTION", "0.1"))  # Share of requests sent to a new version
+CANARY_MIN_JUDGED_REQUESTS = 20   # Judged canary requests needed before deciding
+CANARY_MAX_ACCURACY_DROP = 0.05   # Roll back if canary accuracy < stable accuracy - this
+CANARY_MAX_LATENCY_RATIO = 1.5    # Roll back if canary median latency > stable median * this
+ROLLOUT_DIR = "rollouts"          # Promote / rollback decisions shared by all containers and train_job (on the volume)
+
+# Local Server (Modal-free serving)
+LOCAL_STORAGE_DIR = os.getenv("LOCAL_STORAGE_DIR", "./storage")
+LOCAL_SERVER_HOST = os.getenv("LOCAL_SERVER_HOST", "0.0.0.0")
+LOCAL_SERVER_PORT = int(os.getenv("LOCAL_SERVER_PORT", "8000"))
+LOCAL_SERVER_WORKERS = int(os.getenv("LOCAL_SERVER_WORKERS", "1"))
+
 # Paths
 OUTPUT_MODEL_DIR = "./output/models/qwen-finetuned-v1"
 DOCUMENTS_DIR = "./data/documents"
@@ -3,19 +3,12 @@
 Modal Deployment: Active Learning Chatbot
 Production-ready deployment that runs the 'run_interactive_validation.py' cycle silently.
 Fully integrated with config/model_config.py but with SMART GPU DETECTION.
+The serving/training logic lives in src/serving (also used by run_local_server.py);
+this file only wires it to Modal's Volume, GPUs and containers.
 """
 
 import modal
-import os
 import sys
-import json
-import shutil
-import torch
-import pandas as pd
-from pathlib import Path
-from fastapi import FastAPI
-from fastapi.middleware.cors import CORSMiddleware
-from pydantic import BaseModel
 
 # ============================================================================
 # MODAL SETUP & IMAGE
@@ -34,7 +27,7 @@ VOLUME_MOUNT_PATH = "/models"
 image = (
     modal.Image.debian_slim(python_version="3.11")
     .pip_install(
-        "torch", "transformers==4.57.1", "datasets", "trl", "pandas",
+        "torch", "transformers==4.57.1", "datasets", "pyarrow", "numpy", "safetensors", "trl", "pandas",
         "google-api-python-client", "accelerate", "bitsandbytes",
         "peft", "sentencepiece", "python-dotenv", "fastapi[standard]",
         "unsloth"
@@ -53,143 +46,38 @@ image = (
     image=image,
     gpu="A10G", # Stronger GPU for training (Auto-switches to BF16)
     volumes={VOLUME_MOUNT_PATH: volume},
-    timeout=3600
+    timeout=3600,
+    retries=3,  # A preempted / timed-out run restarts and resumes from its last checkpoint
+    max_containers=1  # Single-flight: spawned runs queue behind the one in progress (see TrainingCoordinator)
 )
-def train_job():
+def train_job(coalesce: bool = False):
     """
     Replicates 'run_training_only.py' but overrides precision settings dynamically.
+    Serving triggers (coalesce=True) are skipped once an earlier run consumed them.
     """
-    sys.path.append("/root") 
-    from unsloth import FastLanguageModel, is_bfloat16_supported
-    from trl import SFTTrainer
-    from transformers import TrainingArguments
-    from datasets import Dataset
-    import config.model_config as cfg 
+    sys.path.append("/root")
+    from src.serving.storage import VolumeStorage
+    from src.serving.train_job import train_job as run_train_job
 
-    print("\n" + "="*80)
-    print("🏋️ TRAINING JOB STARTED")
-    print("="*80)
+    return run_train_job(VolumeStorage(volume, VOLUME_MOUNT_PATH),
+                         launch_merge=lambda model_path: merge_job.spawn(model_path), coalesce=coalesce)
 
-    # 1. Resolve Paths
-    data_file = os.path.join(VOLUME_MOUNT_PATH, cfg.DATA_FOR_FINETUNING_FILE)
-    config_file = os.path.join(VOLUME_MOUNT_PATH, cfg.LATEST_MODEL_CONFIG_FILE)
-
-    # 2. Check & Load Data
-    volume.reload()
-    if not os.path.exists(data_file):
-        print(f"❌ No training data found at {data_file}. Aborting.")
-        return
-
-    try:
-        df = pd.read_json(data_file, lines=True)
-        dataset = Dataset.from_pandas(df[["text"]])
-        print(f"✅ Loaded {len(dataset)} samples from {data_file}")
-    except Exception as e:
-        print(f"❌ Error loading data: {e}")
-        return
-
-    # 3. Determine Base Model & Version
-    if os.path.exists(config_file):
-        try:
-            with open(config_file) as f: saved_cfg = json.load(f)
-            base_path = saved_cfg.get("latest_model_path", cfg.BASE_MODEL_ID)
-            prev_ver = saved_cfg.get("latest_version", 0)
-        except:
-            base_path = cfg.BASE_MODEL_ID
-            prev_ver = 0
-    else:
-        base_path = cfg.BASE_MODEL_ID
-        prev_ver = 0
-
-    print(f"🔄 Fine-tuning on top of: {base_path} (v{prev_ver})")
-
-    # 4. Load Model
-    # FIX: We use dtype=None to let Unsloth automatically pick FP16 (T4) or BF16 (A10G)
-    model, tokenizer = FastLanguageModel.from_pretrained(
-        model_name=base_path,
-        max_seq_length=cfg.MAX_SEQ_LENGTH,
-        load_in_4bit=cfg.LOAD_IN_4BIT,
-        dtype=None, 
-    )
-    
-    # 5. Apply LoRA
-    model = FastLanguageModel.get_peft_model(
-        model,
-        r=cfg.LORA_R,
-        target_modules=cfg.LORA_TARGET_MODULES,
-        lora_alpha=cfg.LORA_ALPHA,
-        lora_dropout=cfg.LORA_DROPOUT,
-        bias=cfg.LORA_BIAS,
-        use_gradient_checkpointing=cfg.USE_GRADIENT_CHECKPOINTING,
-    )
-
-    # 6. Train with DYNAMIC PRECISION
-    # FIX: We calculate support dynamically instead of trusting the config file
-    supports_bf16 = is_bfloat16_supported()
-    print(f"⚙️ GPU Support: BF16={supports_bf16}. Overriding config precision settings.")
-
-    trainer = SFTTrainer(
-        model=model,
-        tokenizer=tokenizer,
-        train_dataset=dataset,
-        dataset_text_field="text",
-        max_seq_length=cfg.MAX_SEQ_LENGTH,
-        args=TrainingArguments(
-            output_dir="/tmp/out", 
-            per_device_train_batch_size=cfg.BATCH_SIZE, 
-            num_train_epochs=cfg.NUM_EPOCHS, 
-            learning_rate=cfg.LEARNING_RATE, 
-            
-            # --- DYNAMIC OVERRIDE ---
-            fp16 = not supports_bf16,
-            bf16 = supports_bf16,
-            # ------------------------
-            
-            logging_steps=cfg.LOGGING_STEPS,
-            optim=cfg.OPTIM,
-            weight_decay=cfg.WEIGHT_DECAY,
-            lr_scheduler_type=cfg.LR_SCHEDULER_TYPE,
-            save_strategy="no",
-            report_to="none"
-        )
-    )
-    trainer.train()
-
-    # 7. Save New Version
-    new_ver = prev_ver + 1
-    new_model_dir_name = f"{cfg.MODEL_SAVE_PREFIX}{new_ver}"
-    new_path = os.path.join(VOLUME_MOUNT_PATH, new_model_dir_name)
-
-    print(f"💾 Saving fine-tuned model to {new_path}...")
-
-    # Save the merged model (using transformers 4.57.1 for compatibility)
-    model.save_pretrained_merged(new_path, tokenizer, save_method="merged_16bit")
-
-    print(f"✅ Model saved successfully")
-
-    # 8. Commit model to volume FIRST (before updating config)
-    print(f"💾 Committing model to volume...")
-    volume.commit()
-    print(f"✅ Model committed to volume")
-
-    # 9. Update Config to point to new model
-    print(f"📝 Updating config to v{new_ver}...")
-    with open(config_file, 'w') as f:
-        json.dump({"latest_model_path": new_path, "latest_version": new_ver}, f)
-
-    # 10. Archive Data
-    if os.path.exists(data_file):
-        shutil.move(data_file, f"{data_file}.processed_v{new_ver}")
-
-    # 11. Final commit with config update
-    volume.commit()
+@app.function(
+    image=image,
+    gpu="T4",  # Merges on the GPU like save_pretrained_merged (bit-identical); streams one shard at a time
+    volumes={VOLUME_MOUNT_PATH: volume},
+    timeout=1800
+)
+def merge_job(model_path: str = None):
+    """
+    Writes the merged weights of an adapter-only version (MERGE_VERSIONS="background"),
+    off the training job's critical path.
+    """
+    sys.path.append("/root")
+    from src.serving.storage import VolumeStorage
+    from src.serving.merge_job import merge_job as run_merge_job
 
-    print(f"\n" + "="*80)
-    print(f"✅ TRAINING COMPLETE!")
-    print(f"="*80)
-    print(f"   New model: v{new_ver} at {new_path}")
-    print(f"   Inference containers will auto-reload on next request")
-    return {"status": "success", "new_version": new_ver, "model_path": new_path}
+    return run_merge_job(VolumeStorage(volume, VOLUME_MOUNT_PATH), model_path)
 
 # ============================================================================
 # MODEL SERVING CLASS (Chat & Validation)
@@ -206,255 +94,41 @@ def train_job():
     min_containers=1
 )
 class ModelService:
-    cycle_count: int = 0
-    correct_answers: int = 0
-    is_reloading: bool = False
-    
-    def _get_config_module(self):
-        if "/root" not in sys.path: sys.path.append("/root")
-        import config.model_config as cfg
-        return cfg
-
-    def get_latest_model_info(self, cfg):
-        volume.reload()
-        config_file = os.path.join(VOLUME_MOUNT_PATH, cfg.LATEST_MODEL_CONFIG_FILE)
-        if os.path.exists(config_file):
-            try:
-                with open(config_file, 'r') as f: saved = json.load(f)
-                return saved.get("latest_model_path", cfg.BASE_MODEL_ID), saved.get("latest_version", 0)
-            except: pass
-        return cfg.BASE_MODEL_ID, 0
 
     @modal.enter()
     def initialize(self):
-        from unsloth import FastLanguageModel
-        cfg = self._get_config_module()
-
-        self.current_model_path, self.current_version = self.get_latest_model_info(cfg)
-
-        print(f"🔄 Initializing Model: {self.current_model_path} (v{self.current_version})")
-
-        # Try to load the model with fallback to base model if it fails
-        try:
-            # FIX: dtype=None allows auto-detection (T4->FP16, A10G->BF16)
-            self.model, self.tokenizer = FastLanguageModel.from_pretrained(
-                model_name=self.current_model_path,
-                max_seq_length=cfg.MAX_SEQ_LENGTH,
-                dtype=None,
-                load_in_4bit=cfg.LOAD_IN_4BIT,
-            )
-            FastLanguageModel.for_inference(self.model)
-            print(f"✅ Successfully loaded model v{self.current_version}")
-
-        except Exception as e:
-            print(f"❌ Error loading model v{self.current_version}: {e}")
-            print(f"⚠️ Falling back to base model: {cfg.BASE_MODEL_ID}")
-
-            # Load base model as fallback
-            self.model, self.tokenizer = FastLanguageModel.from_pretrained(
-                model_name=cfg.BASE_MODEL_ID,
-                max_seq_length=cfg.MAX_SEQ_LENGTH,
-                dtype=None,
-                load_in_4bit=cfg.LOAD_IN_4BIT,
-            )
-            FastLanguageModel.for_inference(self.model)
-            self.current_model_path = cfg.BASE_MODEL_ID
-            self.current_version = 0
-            print(f"✅ Base model loaded successfully")
-
-        self.cycle_count = 0
-        self.correct_answers = 0
-        self.is_reloading = False
-
-        # Cleanup old data
-        data_file = os.path.join(VOLUME_MOUNT_PATH, cfg.DATA_FOR_FINETUNING_FILE)
-        if os.path.exists(data_file):
-            os.remove(data_file)
-            volume.commit()
-
-        print("✅ System Ready!")
-
-    def check_and_reload_model(self):
-        """
-        Hot-swap model reload: Keeps old model running while loading new one.
-        This prevents errors when requests come in during model reload.
-        """
-        cfg = self._get_config_module()
-        latest_path, latest_ver = self.get_latest_model_info(cfg)
-
-        if latest_ver > self.current_version:
-            # Prevent concurrent reload attempts
-            if self.is_reloading:
-                print(f"⏳ Model reload already in progress. Using current model v{self.current_version}")
-                return
-
-            print(f"\n🆕 NEW MODEL DETECTED (v{latest_ver}). Starting hot-swap reload...")
-            self.is_reloading = True
-
-            try:
-                # Keep references to old model (still serving requests)
-                old_model = self.model
-                old_tokenizer = self.tokenizer
-                old_version = self.current_version
-
-                print(f"📥 Loading new model v{latest_ver} (old model v{old_version} still serving)...")
-
-                # Load new model in the background
-                from unsloth import FastLanguageModel
-                new_model, new_tokenizer = FastLanguageModel.from_pretrained(
-                    model_name=latest_path,
-                    max_seq_length=cfg.MAX_SEQ_LENGTH,
-                    dtype=None, # Auto-detect precision
-                    load_in_4bit=cfg.LOAD_IN_4BIT,
-                )
-                FastLanguageModel.for_inference(new_model)
-
-                print(f"✅ New model v{latest_ver} loaded successfully!")
-
-                # Atomic swap: Only update references after new model is fully ready
-                self.model = new_model
-                self.tokenizer = new_tokenizer
-                self.current_model_path = latest_path
-                self.current_version = latest_ver
-
-                # Reset counters
-                self.cycle_count = 0
-                self.correct_answers = 0
-
-                print(f"🔄 Hot-swap complete! Now serving v{latest_ver}")
-                print(f"   Old model v{old_version} will be garbage collected")
-
-                # Old model will be garbage collected automatically
-                del old_model
-                del old_tokenizer
+        if "/root" not in sys.path: sys.path.append("/root")
+        from src.serving.storage import VolumeStorage
+        from src.serving.model_service import ModelService as Service
 
-            except Exception as e:
-                print(f"❌ Error during model reload: {e}")
-                print(f"⚠️ Continuing with old model v{self.current_version}")
-            finally:
-                self.is_reloading = False
+        self.service = Service(
+            VolumeStorage(volume, VOLUME_MOUNT_PATH),
+            # Waited on from a background thread, then the version watcher reloads at once
+            launch_training=lambda: train_job.spawn(coalesce=True).get(),
+        )
+        self.service.initialize()
 
-    def save_to_training_file(self, question, answer, is_stable):
-        cfg = self._get_config_module()
-        data_file = os.path.join(VOLUME_MOUNT_PATH, cfg.DATA_FOR_FINETUNING_FILE)
-        num_samples = cfg.NUM_SAMPLES_STABLE if is_stable else cfg.NUM_SAMPLES_NEW
-        
-        text = f"<|im_start|>user\n{question}<|im_end|>\n<|im_start|>assistant\n{answer}<|im_end|>"
-        entries = [{"text": text} for _ in range(num_samples)]
-        
-        with open(data_file, 'a') as f:
-            for e in entries:
-                f.write(json.dumps(e) + "\n")
-        volume.commit()
-        print(f"💾 Saved {num_samples} samples (Stable: {is_stable})")
+    @modal.exit()
+    def shutdown(self):
+        # Durability: buffered training samples are written before the container goes away
+        self.service.shutdown()
 
     @modal.method()
     def generate_answer(self, question: str):
-        # 1. Reload Check
-        cfg = self._get_config_module()
-        self.check_and_reload_model()
-        
-        print("\n" + "-"*50)
-        print(f"❓ User asked: {question}")
-        print(f"📊 Cycle Progress: {self.cycle_count + 1}/10")
-
-        # 2. Generate
-        messages = [{"role": "user", "content": question}]
-        prompt = self.tokenizer.apply_chat_template(messages, tokenize=False, add_generation_prompt=True)
-        inputs = self.tokenizer(prompt, return_tensors="pt").to("cuda")
-        
-        with torch.no_grad():
-            outputs = self.model.generate(
-                **inputs, 
-                max_new_tokens=cfg.GENERATION_MAX_NEW_TOKENS, 
-                temperature=cfg.GENERATION_TEMPERATURE, 
-                do_sample=cfg.GENERATION_DO_SAMPLE
-            )
-        
-        generated_ids = outputs[0][len(inputs.input_ids[0]):]
-        model_answer = self.tokenizer.decode(generated_ids, skip_special_tokens=True).strip()
-
-        # 3. Validation Logic (Hidden)
-        from src.validator.web_search import get_web_answer
-        from src.validator.llm_judge import get_clean_fact_from_web, is_answer_outdated_llm_judge
-        
-        is_correct = True
-        web_context = get_web_answer(question)
-        
-        if web_context:
-            extracted_fact = get_clean_fact_from_web(web_context, question, self.model, self.tokenizer)
-            if "[NO_ANSWER]" not in extracted_fact:
-                is_outdated = is_answer_outdated_llm_judge(model_answer, extracted_fact, self.model, self.tokenizer)
-                if is_outdated:
-                    print(f"❌ RESULT: OUTDATED/INCORRECT -> Saving new fact: {extracted_fact}")
-                    self.save_to_training_file(question, extracted_fact, is_stable=False)
-                    is_correct = False
-                else:
-                    print(f"✅ RESULT: CORRECT/STABLE -> Saving reinforcement.")
-                    self.save_to_training_file(question, model_answer, is_stable=True)
-            else:
-                print("⚠️ Judge Skipped: Fact extraction failed.")
-        else:
-            print("⚠️ Judge Skipped: No web results.")
-
-        # 4. Cycle Logic
-        self.cycle_count += 1
-        if is_correct: self.correct_answers += 1
-            
-        if self.cycle_count >= 10:
-            print(f"\n📊 CYCLE DONE. Score: {self.correct_answers}/10")
-            if self.correct_answers <= 8:
-                print("🚨 SCORE <= 8. TRIGGERING TRAINING...")
-                self.cycle_count = 0 
-                self.correct_answers = 0
-                train_job.spawn()
-            else:
-                print("✅ SCORE > 8. NO TRAINING.")
-                self.cycle_count = 0
-                self.correct_answers = 0
-                data_file = os.path.join(VOLUME_MOUNT_PATH, cfg.DATA_FOR_FINETUNING_FILE)
-                if os.path.exists(data_file):
-                    os.remove(data_file)
-                    volume.commit()
-
-        # 5. Return Answer
-        return {
-            "answer": model_answer,
-            "model_version": f"v{self.current_version}"
-        }
+        return self.service.generate_answer(question)
 
 # ============================================================================
 # WEB API
 # ============================================================================
 
-web_app = FastAPI()
-web_app.add_middleware(
-    CORSMiddleware,
-    allow_origins=["*"],
-    allow_credentials=True,
-    allow_methods=["*"],
-    allow_headers=["*"],
-)
-
-class QuestionRequest(BaseModel):
-    question: str
-
-@web_app.post("/api/chat")
-async def chat(req: QuestionRequest):
-    return ModelService().generate_answer.remote(req.question)
-
-@web_app.get("/api/health")
-async def health():
-    return {"status": "online"}
-
-@web_app.get("/api/model/current")
-async def model_info():
-    return {"model_path": "current", "is_base_model": False}
-
-from fastapi.staticfiles import StaticFiles
-web_app.mount("/", StaticFiles(directory="/root/frontend", html=True, check_dir=False))
-
 @app.function(image=image, secrets=[modal.Secret.from_name("google-api-credentials")])
 @modal.asgi_app()
 def fastapi_app():
-    return web_app
+    if "/root" not in sys.path: sys.path.append("/root")
+    from src.serving.web_api import create_web_app
+
+    return create_web_app(
+        ask=lambda question: ModelService().generate_answer.remote(question),
+        get_model_info=lambda: {"model_path": "current", "is_base_model": False},
+        frontend_dir=REMOTE_FRONTEND_PATH,
+    )
@@ -6,6 +6,7 @@ Complete pipeline from validation to training to testing
 
 import os
 import sys
+import time
 
 # Add project root to path
 sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
@@ -18,18 +19,31 @@ print("="*80)
 from config import model_config as cfg
 
 # Import all modules
-from src.model.loader import load_validator_model, load_base_model, load_final_model, ask_model
-from src.model.lora_config import setup_lora
+from src.model.loader import (load_validator_model, load_training_model, load_final_model, load_resident_model,
+                              to_inference_mode, to_training_mode, ask_model)
 from src.validator.fact_checker import run_validation_test
 from src.data.tokenizer import load_training_dataset
 from src.training.trainer import train_model, save_model
 from tests.test_questions import ALL_QUESTIONS
 
 
+def print_load_times(load_times, resident):
+    """Per-phase model load (or, with a resident model, mode switch) time."""
+    print("\n" + "="*80)
+    print(f"⏱️ MODEL LOAD TIME PER PHASE ({'resident model' if resident else 'one load per phase'})")
+    print("="*80)
+    for phase, seconds in load_times.items():
+        print(f"{phase:>12}: {seconds:7.1f}s")
+    print(f"{'total':>12}: {sum(load_times.values()):7.1f}s")
+
+
 def main():
     """
     Main pipeline orchestrator.
     Runs the complete active learning cycle.
+
+    With `cfg.RESIDENT_MODEL` the model is loaded once: validated in inference
+    mode, trained in place (LoRA already attached) and tested from memory.
     """
     print("\n" + "="*80)
     print("🚀 ACTIVE LEARNING CHATBOT PIPELINE")
@@ -38,7 +52,7 @@ def main():
     print("1. Load the current chatbot model")
     print("2. Run validation against 20 test questions")
     print("3. Collect outdated facts for training")
-    print("4. Fine-tune the base model with new facts")
+    print("4. Fine-tune the model with new facts (continuing the previous adapter)")
     print("5. Save the improved model")
     print("6. Test the new model")
     print("\n" + "="*80)
@@ -50,24 +64,34 @@ def main():
     print("📋 PART 3: VALIDATION PHASE")
     print("="*80)
 
-    # Load validator model
-    validator_model, validator_tokenizer = load_validator_model()
+    import torch
+    load_times = {}
+
+    # Load the model: once for all phases, or the validator model only
+    start = time.perf_counter()
+    resident = load_resident_model(cfg.CURRENT_CHATBOT_PATH) if cfg.RESIDENT_MODEL else None
+    if resident is not None:
+        model, tokenizer, optimizer_state = resident
+    else:
+        model, tokenizer = load_validator_model()
+    load_times["validation"] = time.perf_counter() - start
 
     # Run validation test
-    update_count = run_validation_test(validator_model, validator_tokenizer, ALL_QUESTIONS)
+    update_count = run_validation_test(model, tokenizer, ALL_QUESTIONS)
 
     print(f"\n✅ Validation complete. Found {update_count} outdated facts.")
 
     # Check if we have training data
     if not os.path.exists(cfg.DATA_FOR_FINETUNING_FILE):
         print("\n❌ No training data was generated. Exiting pipeline.")
+        print_load_times(load_times, resident is not None)
         return
 
     # Clean up validator model to free memory
-    del validator_model
-    del validator_tokenizer
-    import torch
-    torch.cuda.empty_cache()
+    if resident is None:
+        del model
+        del tokenizer
+        torch.cuda.empty_cache()
 
     # =========================================================================
     # PART 4: TRAINING PHASE
@@ -81,24 +105,28 @@ def main():
 
     if new_dataset is None:
         print("\n❌ Could not load training dataset. Exiting pipeline.")
+        print_load_times(load_times, resident is not None)
         return
 
-    # Load base model for training
-    model, tokenizer = load_base_model()
-
-    # Setup LoRA
-    model = setup_lora(model)
+    # Load the model to train: the previous adapter (continual training) or a fresh LoRA on the base model
+    start = time.perf_counter()
+    if resident is not None:
+        to_training_mode(model)  # Already holds that adapter
+    else:
+        model, tokenizer, optimizer_state = load_training_model(cfg.CURRENT_CHATBOT_PATH)
+    load_times["training"] = time.perf_counter() - start
 
     # Train the model
-    trainer = train_model(model, tokenizer, new_dataset)
+    trainer = train_model(model, tokenizer, new_dataset, optimizer_state=optimizer_state)
 
-    # Save the model
-    save_model(model, tokenizer)
+    # Save the model (and the optimizer state for the next continual run)
+    save_model(model, tokenizer, trainer)
 
-    # Clean up training model to free memory
-    del model
-    del tokenizer
+    # Clean up the trainer (optimizer state) and, unless it stays resident, the training model
     del trainer
+    if resident is None:
+        del model
+        del tokenizer
     torch.cuda.empty_cache()
 
     # =========================================================================
@@ -108,8 +136,13 @@ def main():
     print("🧪 PART 5: TESTING PHASE")
     print("="*80)
 
-    # Load the newly saved model
-    final_model, final_tokenizer = load_final_model(cfg.NEW_MODEL_SAVE_PATH)
+    # Test the trained adapter in memory, or load the newly saved model
+    start = time.perf_counter()
+    if resident is not None:
+        final_model, final_tokenizer = to_inference_mode(model), tokenizer
+    else:
+        final_model, final_tokenizer = load_final_model(cfg.NEW_MODEL_SAVE_PATH)
+    load_times["testing"] = time.perf_counter() - start
 
     # Test the model with all questions
     print("\n--- RUNNING FINAL 20-QUESTION CHECK ON NEW MODEL ---")
@@ -118,7 +151,7 @@ def main():
         print("\n" + "-"*50)
         print(f"❓ QUESTION: {question}")
         answer = ask_model(question, final_model, final_tokenizer)
-        print(f"🤖 RELOADED MODEL ANSWER: {answer}")
+        print(f"🤖 NEW MODEL ANSWER: {answer}")
 
     print("\n\n" + "="*80)
     print("✅ Cell 11: Final 20-question test complete.")
@@ -126,6 +159,8 @@ def main():
     print("Manually review the answers above to confirm the new facts were learned.")
     print("="*80)
 
+    print_load_times(load_times, resident is not None)
+
 
 if __name__ == "__main__":
     main()
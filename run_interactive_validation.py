@@ -7,6 +7,7 @@ and triggers fine-tuning if correct answers are <= 8.
 
 import os
 import sys
+import time
 
 # Add project root to path
 sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
@@ -20,7 +21,7 @@ from config import model_config as cfg
 
 # Import required modules
 from src.model.loader import load_validator_model
-from src.validator.fact_checker import run_chatbot_check
+from src.validator.fact_checker import run_chatbot_check, export_training_data
 # Import the training main function to trigger it directly
 from run_training_only import main as run_training_phase
 
@@ -40,6 +41,7 @@ def main():
 
     # 2. Load validator model
     validator_model, validator_tokenizer = load_validator_model()
+    cycle_start = time.time()
 
     total_questions = 10
     correct_answers = 0
@@ -75,6 +77,9 @@ def main():
             correct_answers += 1
             print(f"✅ Result: CORRECT/STABLE")
 
+    # Write this session's facts from the fact store to the training file
+    export_training_data(cycle_start, validator_model, validator_tokenizer)
+
     # 4. Evaluation
     print("\n\n" + "="*80)
     print("📊 EVALUATION REPORT")
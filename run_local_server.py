@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+"""
+Run the Chat Server Locally
+Same HTTP API as the Modal deployment, without Modal: a local storage directory
+replaces the Volume and training runs in a separate local process.
+"""
+
+import os
+import sys
+import argparse
+import threading
+
+# Add project root to path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+print("\n" + "="*80)
+print("⚙️ CONFIGURATION")
+print("="*80)
+
+# Import config
+from config import model_config as cfg
+
+FRONTEND_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "deployment", "frontend")
+
+
+def create_app():
+    """
+    Uvicorn app factory. Each worker process builds its own ModelService,
+    just like each Modal container does.
+    """
+    from src.serving.storage import LocalStorage
+    from src.serving.model_service import ModelService
+    from src.serving.train_job import launch_local_training
+    from src.serving.web_api import create_web_app
+
+    storage = LocalStorage(os.getenv("LOCAL_STORAGE_DIR", cfg.LOCAL_STORAGE_DIR))
+    service = ModelService(storage, launch_training=lambda: launch_local_training(storage).wait())
+    service.initialize()
+
+    # One request at a time per worker (Modal runs one input per container)
+    lock = threading.Lock()
+
+    def ask(question):
+        with lock:
+            return service.generate_answer(question)
+
+    return create_web_app(ask, service.model_info, FRONTEND_DIR)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve the chatbot API locally.")
+    parser.add_argument("--host", default=cfg.LOCAL_SERVER_HOST)
+    parser.add_argument("--port", type=int, default=cfg.LOCAL_SERVER_PORT)
+    parser.add_argument("--workers", type=int, default=cfg.LOCAL_SERVER_WORKERS, help="Worker processes (one model each)")
+    parser.add_argument("--storage-dir", default=cfg.LOCAL_STORAGE_DIR, help="Directory used instead of the Modal Volume")
+    args = parser.parse_args()
+
+    # Workers are separate processes; pass the storage dir through the environment
+    os.environ["LOCAL_STORAGE_DIR"] = os.path.abspath(args.storage_dir)
+
+    print("\n" + "="*80)
+    print("🌐 LOCAL CHAT SERVER")
+    print("="*80)
+    print(f"Storage: {os.environ['LOCAL_STORAGE_DIR']}")
+    print(f"Workers: {args.workers}")
+    print(f"URL:     http://{args.host}:{args.port}")
+
+    import uvicorn
+    uvicorn.run(
+        "run_local_server:create_app",
+        factory=True,
+        host=args.host,
+        port=args.port,
+        workers=args.workers,
+    )
+
+
+if __name__ == "__main__":
+    main()
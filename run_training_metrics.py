@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+"""
+Training Metrics Report
+Summarizes the per-step training metrics saved with model versions
+(`training_metrics.jsonl`) and compares runs, to size GPUs and catch
+throughput regressions.
+
+Usage:
+    python run_training_metrics.py qwen-finetuned-v3 qwen-finetuned-v4 [--max-regression 10]
+
+Exits with status 1 if a run's tokens/sec dropped more than --max-regression
+percent below the first (baseline) run.
+"""
+
+import os
+import sys
+import json
+import argparse
+import numpy as np
+
+# Add project root to path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from config import model_config as cfg
+
+
+def read_metrics(path):
+    """(run header, step records) of a metrics JSONL file or model version folder."""
+    if os.path.isdir(path):
+        path = os.path.join(path, cfg.TRAINING_METRICS_FILE)
+    run, steps = {}, []
+    with open(path) as f:
+        for line in f:
+            if line.strip():
+                record = json.loads(line)
+                if record["type"] == "run":
+                    run = record
+                elif record["type"] == "step":
+                    steps.append(record)
+    return run, steps
+
+
+def summarize(path):
+    """Aggregate throughput / resource numbers of one run."""
+    run, steps = read_metrics(path)
+    seconds = np.array([s["seconds"] for s in steps]) if steps else np.zeros(1)
+    total = float(seconds.sum()) or 1e-9
+    tokens = sum(s["tokens"] for s in steps)
+    real_tokens = sum(s["real_tokens"] for s in steps)
+    gpu_peaks = [s["gpu_peak_mb"] for s in steps if s.get("gpu_peak_mb") is not None]
+    return {
+        "run": os.path.basename(os.path.normpath(path if os.path.isdir(path) else os.path.dirname(path) or path)),
+        "device": run.get("device", "?"),
+        "batching": run.get("batching", "?"),
+        "steps": len(steps),
+        "total_seconds": total,
+        "step_p50_ms": float(np.percentile(seconds, 50)) * 1000,
+        "step_p95_ms": float(np.percentile(seconds, 95)) * 1000,
+        "tokens_per_second": real_tokens / total,
+        "samples_per_second": sum(s["samples"] for s in steps) / total,
+        "padding_ratio": 1 - real_tokens / tokens if tokens else 0.0,
+        "data_wait_share": sum(s["data_wait_seconds"] for s in steps) / total,
+        "gpu_peak_mb": max(gpu_peaks) if gpu_peaks else None,
+        "cpu_peak_mb": max((s["cpu_peak_mb"] for s in steps), default=None),
+    }
+
+
+_COLUMNS = [
+    ("steps", "{:.0f}"), ("total_seconds", "{:.1f}"), ("step_p50_ms", "{:.1f}"), ("step_p95_ms", "{:.1f}"),
+    ("tokens_per_second", "{:.0f}"), ("samples_per_second", "{:.1f}"), ("padding_ratio", "{:.1%}"),
+    ("data_wait_share", "{:.1%}"), ("gpu_peak_mb", "{:.0f}"), ("cpu_peak_mb", "{:.0f}"),
+]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Summarize and compare training metrics of model versions.")
+    parser.add_argument("runs", nargs="+", help="Model version folders or metrics JSONL files (first = baseline)")
+    parser.add_argument("--max-regression", type=float, default=None,
+                        help="Exit 1 if a run's tokens/sec is more than this many percent below the baseline")
+    args = parser.parse_args()
+
+    summaries = [summarize(path) for path in args.runs]
+
+    print("\n" + "="*80)
+    print("📈 TRAINING METRICS")
+    print("="*80)
+    width = max(18, *(len(s["run"]) + 2 for s in summaries))
+    print(f"{'metric':<20}" + "".join(f"{s['run']:>{width}}" for s in summaries))
+    print(f"{'device':<20}" + "".join(f"{s['device'][:width - 2]:>{width}}" for s in summaries))
+    print(f"{'batching':<20}" + "".join(f"{s['batching']:>{width}}" for s in summaries))
+    for key, fmt in _COLUMNS:
+        cells = ["-" if s[key] is None else fmt.format(s[key]) for s in summaries]
+        print(f"{key:<20}" + "".join(f"{cell:>{width}}" for cell in cells))
+
+    regressed = False
+    baseline = summaries[0]["tokens_per_second"]
+    for summary in summaries[1:]:
+        change = (summary["tokens_per_second"] / baseline - 1) * 100 if baseline else 0.0
+        flag = ""
+        if args.max_regression is not None and change < -args.max_regression:
+            regressed, flag = True, "  ❌ regression"
+        print(f"\n{summary['run']}: tokens/sec {change:+.1f}% vs {summaries[0]['run']}{flag}")
+
+    sys.exit(1 if regressed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -18,38 +18,41 @@ print("="*80)
 from config import model_config as cfg
 
 # Import required modules
-from src.model.loader import load_base_model
-from src.model.lora_config import setup_lora
+from src.model.loader import load_training_model
 from src.data.tokenizer import load_training_dataset
 from src.training.trainer import train_model, save_model
+from src.training.distributed import main_process_first, is_main_process
 
 
 def main():
     """
     Run training phase only.
+
+    Also the entry point of a data-parallel run (`accelerate launch` /
+    `torchrun`, see src.training.distributed): every rank trains, rank 0 saves.
     """
     print("\n" + "="*80)
     print("🏋️ TRAINING PHASE ONLY")
     print("="*80)
 
-    # Load training dataset
-    new_dataset = load_training_dataset()
+    # Load training dataset (rank 0 syncs the Arrow shards first)
+    with main_process_first():
+        new_dataset = load_training_dataset()
 
     if new_dataset is None:
         print("\n❌ Could not load training dataset. Run validation first!")
         return
 
-    # Load base model for training
-    model, tokenizer = load_base_model()
-
-    # Setup LoRA
-    model = setup_lora(model)
+    # Load the model to train: the previous adapter (continual training) or a fresh LoRA on the base model
+    model, tokenizer, optimizer_state = load_training_model(cfg.CURRENT_CHATBOT_PATH)
 
     # Train the model
-    trainer = train_model(model, tokenizer, new_dataset)
+    trainer = train_model(model, tokenizer, new_dataset, optimizer_state=optimizer_state)
 
-    # Save the model
-    save_model(model, tokenizer)
+    # Save the model (and the optimizer state for the next continual run)
+    save_model(model, tokenizer, trainer)
+    if not is_main_process():
+        return
 
     print(f"\n✅ Training complete. Model saved to: {cfg.NEW_MODEL_SAVE_PATH}")
     print("\nNext step: Run 'python run_testing_only.py' to test the new model.")
@@ -1,4 +1,5 @@
-from .tokenizer import load_training_dataset
-from .generator import create_training_samples
+from .tokenizer import load_training_dataset, read_training_file
+from .generator import create_training_samples, format_training_text, parse_training_text
+from .fact_store import FactStore
 
-__all__ = ['load_training_dataset', 'create_training_samples']
\ No newline at end of file
+__all__ = ['load_training_dataset', 'read_training_file', 'create_training_samples', 'format_training_text', 'parse_training_text', 'FactStore']
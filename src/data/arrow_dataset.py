@@ -0,0 +1,148 @@
+"""
+Arrow Training Dataset
+Converts the training JSONL into Arrow shards that `datasets` memory-maps
+directly, so loading does not materialize the file in RAM (pandas did it twice).
+"""
+
+import os
+import sys
+import json
+import shutil
+import hashlib
+import pyarrow as pa
+from datasets import Dataset, concatenate_datasets
+from config import model_config as cfg
+
+# Bump when the columns change; older directories are rebuilt from their JSONL source
+SCHEMA_VERSION = 1
+SCHEMA = pa.schema(
+    [("text", pa.string()), ("weight", pa.int64())],
+    metadata={"schema_version": str(SCHEMA_VERSION)},
+)
+METADATA_FILE = "shards.json"
+_FINGERPRINT_BYTES = 64 * 1024
+
+
+def arrow_dir(jsonl_path):
+    """Arrow directory kept next to a training JSONL file."""
+    return f"{jsonl_path}{cfg.ARROW_DATASET_SUFFIX}"
+
+
+def _read_metadata(directory):
+    path = os.path.join(directory, METADATA_FILE)
+    if not os.path.exists(path):
+        return None
+    with open(path) as f:
+        return json.load(f)
+
+
+def _write_metadata(directory, metadata):
+    path = os.path.join(directory, METADATA_FILE)
+    with open(f"{path}.tmp", 'w') as f:
+        json.dump(metadata, f)
+    os.replace(f"{path}.tmp", path)
+
+
+def append_records(directory, records, source=None):
+    """
+    Append records as a new shard, creating the dataset directory if needed.
+
+    Shards are immutable Arrow IPC streams; only `shards.json` is rewritten, so
+    a reader sees either the old or the new shard list.
+    """
+    os.makedirs(directory, exist_ok=True)
+    metadata = _read_metadata(directory) or {"schema_version": SCHEMA_VERSION, "shards": [], "num_rows": 0}
+    if metadata["schema_version"] != SCHEMA_VERSION:
+        raise ValueError(f"{directory} has schema v{metadata['schema_version']}, expected v{SCHEMA_VERSION}")
+
+    table = pa.Table.from_pydict(
+        {"text": [r["text"] for r in records], "weight": [int(r.get("weight") or 1) for r in records]},
+        schema=SCHEMA,
+    )
+    shard = f"shard-{len(metadata['shards']):05d}.arrow"
+    shard_path = os.path.join(directory, shard)
+    with pa.OSFile(f"{shard_path}.tmp", 'wb') as sink, pa.ipc.new_stream(sink, SCHEMA) as writer:
+        writer.write_table(table)
+    os.replace(f"{shard_path}.tmp", shard_path)
+
+    metadata["shards"].append(shard)
+    metadata["num_rows"] += table.num_rows
+    if source is not None:
+        metadata["source"] = source
+    _write_metadata(directory, metadata)
+    return shard_path
+
+
+def _fingerprint(path, length):
+    with open(path, 'rb') as f:
+        return hashlib.sha1(f.read(min(length, _FINGERPRINT_BYTES))).hexdigest()
+
+
+def sync_from_jsonl(jsonl_path, directory=None, chunk_rows=cfg.ARROW_CHUNK_ROWS):
+    """
+    Bring the Arrow copy of a JSONL file up to date.
+
+    Only lines appended since the last sync are converted (in chunks of
+    `chunk_rows`, one shard each). A replaced or truncated file, or an old
+    schema version, triggers a full rebuild.
+
+    Returns:
+        str: The Arrow dataset directory
+    """
+    directory = directory or arrow_dir(jsonl_path)
+    stat = os.stat(jsonl_path)
+    metadata = _read_metadata(directory)
+    source = (metadata or {}).get("source")
+
+    offset = 0
+    if (metadata is not None and metadata["schema_version"] == SCHEMA_VERSION and source is not None
+            and source["inode"] == stat.st_ino and source["offset"] <= stat.st_size
+            and source["fingerprint"] == _fingerprint(jsonl_path, source["offset"])):
+        offset = source["offset"]
+        if offset == stat.st_size:
+            return directory
+    elif os.path.exists(directory):
+        shutil.rmtree(directory)
+
+    def source_at(position):
+        return {"path": os.path.abspath(jsonl_path), "inode": stat.st_ino, "offset": position,
+                "fingerprint": _fingerprint(jsonl_path, position)}
+
+    batch = []
+    with open(jsonl_path, 'rb') as f:
+        f.seek(offset)
+        for line in f:
+            if not line.endswith(b"\n"):
+                break  # a writer is still appending this line
+            offset += len(line)
+            if line.strip():
+                batch.append(json.loads(line))
+            if len(batch) >= chunk_rows:
+                append_records(directory, batch, source_at(offset))
+                batch = []
+    if batch or _read_metadata(directory) is None:
+        append_records(directory, batch, source_at(offset))
+    return directory
+
+
+def shard_paths(directory):
+    """Shard files of an Arrow training dataset, in append order."""
+    metadata = _read_metadata(directory)
+    if metadata is None:
+        raise FileNotFoundError(f"No Arrow training dataset at {directory}")
+    if metadata["schema_version"] != SCHEMA_VERSION:
+        raise ValueError(f"{directory} has schema v{metadata['schema_version']}, expected v{SCHEMA_VERSION}")
+    return [os.path.join(directory, shard) for shard in metadata["shards"]]
+
+
+def load_arrow_dataset(directory):
+    """Memory-map every shard (zero-copy) into one Dataset with `text` and `weight` columns."""
+    shards = [Dataset.from_file(path) for path in shard_paths(directory)]
+    return concatenate_datasets(shards) if len(shards) > 1 else shards[0]
+
+
+if __name__ == "__main__":
+    # python -m src.data.arrow_dataset [data_for_finetuning.jsonl]
+    path = sys.argv[1] if len(sys.argv) > 1 else cfg.DATA_FOR_FINETUNING_FILE
+    directory = sync_from_jsonl(path)
+    print(f"Arrow dataset at {directory}: {_read_metadata(directory)['num_rows']} records")
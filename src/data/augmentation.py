@@ -0,0 +1,211 @@
+"""
+Question Augmentation
+Builds distinct rephrasings of a training question from deterministic templates,
+synonym rules and (optionally) batched LLM paraphrasing, with duplicate removal
+and a per-(question, model version) cache.
+"""
+
+import os
+import re
+import json
+import time
+import shutil
+import hashlib
+import torch
+from config import model_config as cfg
+
+QUESTION_TEMPLATES = [
+    "{q}",
+    "Can you tell me {q_lower}",
+    "Quick question: {q}",
+    "Do you know {q_lower}",
+    "I'd like to know: {q}",
+    "Please answer this: {q}",
+    "Tell me, {q_lower}",
+]
+
+# (pattern, replacement) applied one at a time, each producing its own variant
+SYNONYM_RULES = [
+    (r"\bWhat is\b", "What's"),
+    (r"\bWho is\b", "Who's"),
+    (r"\bcurrent\b", "present"),
+    (r"\bthe USA\b", "the United States"),
+    (r"\bthe UK\b", "the United Kingdom"),
+    (r"\bwon\b", "was the winner of"),
+    (r"\bIn what year\b", "When"),
+    (r"\bhighest\b", "tallest"),
+    (r"\bWho wrote\b", "Who was the author of"),
+    (r"\bWho painted\b", "Who was the painter of"),
+    (r"\blatest\b", "newest"),
+]
+
+def normalize_question(text):
+    """Lowercase, drop punctuation and collapse whitespace (used for exact-duplicate checks)."""
+    text = re.sub(r"[^\w\s]", " ", text.lower())
+    return " ".join(text.split())
+
+
+def _jaccard(a, b):
+    a, b = set(a.split()), set(b.split())
+    return len(a & b) / len(a | b) if a | b else 1.0
+
+
+def deduplicate(questions, threshold=cfg.NEAR_DUPLICATE_THRESHOLD):
+    """
+    Drop exact duplicates (after normalization) and near duplicates
+    (token Jaccard similarity >= threshold). Keeps the first occurrence.
+    """
+    kept, kept_norm = [], []
+    for question in questions:
+        norm = normalize_question(question)
+        if not norm or norm in kept_norm:
+            continue
+        if any(_jaccard(norm, other) >= threshold for other in kept_norm):
+            continue
+        kept.append(question)
+        kept_norm.append(norm)
+    return kept
+
+
+def template_variants(question):
+    q = question.strip()
+    q_lower = q[0].lower() + q[1:] if q else q
+    return [t.format(q=q, q_lower=q_lower) for t in QUESTION_TEMPLATES]
+
+
+def synonym_variants(question):
+    variants = []
+    for pattern, replacement in SYNONYM_RULES:
+        rewritten = re.sub(pattern, replacement, question)
+        if rewritten != question:
+            variants.append(rewritten)
+    return variants
+
+
+def llm_paraphrases(questions, model, tokenizer, num_paraphrases):
+    """
+    Ask the validator model for paraphrases of several questions in one batched generate call.
+
+    Returns:
+        dict: question -> list of paraphrases
+    """
+    prompts = []
+    for question in questions:
+        prompt_text = (
+            f"Rewrite the following question in {num_paraphrases} different ways. "
+            f"Keep the exact meaning. Output one question per line and nothing else.\n\n"
+            f"Question: {question}"
+        )
+        messages = [{"role": "user", "content": prompt_text}]
+        prompts.append(tokenizer.apply_chat_template(messages, tokenize=False, add_generation_prompt=True))
+
+    padding_side = tokenizer.padding_side
+    tokenizer.padding_side = "left"  # decoder-only models generate after the prompt
+    try:
+        inputs = tokenizer(prompts, return_tensors="pt", padding=True).to(model.device)
+    finally:
+        tokenizer.padding_side = padding_side
+
+    with torch.no_grad():
+        outputs = model.generate(
+            **inputs,
+            max_new_tokens=cfg.AUGMENTATION_MAX_NEW_TOKENS,
+            temperature=cfg.GENERATION_TEMPERATURE,
+            do_sample=cfg.GENERATION_DO_SAMPLE,
+        )
+
+    results = {}
+    for question, output in zip(questions, outputs):
+        text = tokenizer.decode(output[inputs.input_ids.shape[1]:], skip_special_tokens=True)
+        lines = [re.sub(r"^\s*(\d+[.)]|[-*])\s*", "", line).strip() for line in text.splitlines()]
+        results[question] = [line for line in lines if line.endswith("?")]
+    return results
+
+
+def _version_dir(cache_dir, version):
+    return os.path.join(cache_dir, f"v{version}")
+
+
+def _cache_path(cache_dir, question, version):
+    key = hashlib.sha1(normalize_question(question).encode()).hexdigest()
+    return os.path.join(_version_dir(cache_dir, version), f"{key}.json")
+
+
+def _read_cached(path):
+    if not os.path.exists(path):
+        return None
+    try:
+        with open(path) as f:
+            return json.load(f)["variants"]
+    except Exception as e:
+        print(f"Warning: Could not read augmentation cache entry {path}. Regenerating it. Error: {e}")
+        return None
+
+
+def _write_cached(path, question, variants):
+    """One immutable entry per question (temp file + rename), so writers never share a file."""
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = f"{path}.{time.time_ns()}-{os.getpid()}.tmp"
+    with open(tmp_path, 'w') as f:
+        json.dump({"question": normalize_question(question), "variants": variants}, f)
+    os.replace(tmp_path, path)
+
+
+def prune_cache(cache_dir=cfg.AUGMENTATION_CACHE_DIR, keep_versions=cfg.AUGMENTATION_CACHE_VERSIONS):
+    """
+    Delete the cached variants of all but the `keep_versions` newest model versions.
+
+    Returns:
+        list: Pruned versions
+    """
+    if not os.path.isdir(cache_dir):
+        return []
+    versions = sorted(int(name[1:]) for name in os.listdir(cache_dir) if re.fullmatch(r"v\d+", name))
+    pruned = versions[:-keep_versions] if keep_versions > 0 else versions
+    for version in pruned:
+        shutil.rmtree(_version_dir(cache_dir, version), ignore_errors=True)
+    return pruned
+
+
+def generate_question_variants(questions, num_variants=cfg.NUM_QUESTION_VARIANTS, model=None, tokenizer=None,
+                               version=cfg.LAST_VERSION, cache_dir=cfg.AUGMENTATION_CACHE_DIR):
+    """
+    Distinct variants for each question (the original always comes first).
+
+    LLM paraphrasing runs only when `cfg.AUGMENTATION_USE_LLM` is set and a
+    model is given; all cache misses share one batched generate call. Cache
+    entries live under `<cache_dir>/v<version>/`; the first entry of a new
+    version prunes the versions beyond `cfg.AUGMENTATION_CACHE_VERSIONS`.
+
+    Returns:
+        dict: question -> list of up to `num_variants` questions
+    """
+    variants = {}
+    for question in dict.fromkeys(questions):
+        cached = _read_cached(_cache_path(cache_dir, question, version))
+        if cached is not None:
+            variants[question] = cached
+    misses = [q for q in dict.fromkeys(questions) if q not in variants]
+
+    if misses:
+        paraphrases = {}
+        if cfg.AUGMENTATION_USE_LLM and model is not None:
+            print(f"--- Paraphrasing {len(misses)} question(s) with the validator model (batched)... ---")
+            paraphrases = llm_paraphrases(misses, model, tokenizer, num_variants)
+
+        new_version = not os.path.isdir(_version_dir(cache_dir, version))
+        for question in misses:
+            candidates = [question] + paraphrases.get(question, []) + synonym_variants(question) + template_variants(question)
+            variants[question] = deduplicate(candidates)
+            _write_cached(_cache_path(cache_dir, question, version), question, variants[question])
+        if new_version:
+            prune_cache(cache_dir)
+
+    return {q: variants[q][:num_variants] for q in questions}
+
+
+def split_budget(num_samples, num_variants):
+    """Spread `num_samples` over the variants so the total exposure stays exactly `num_samples`."""
+    num_variants = max(1, min(num_variants, num_samples))
+    base, extra = divmod(num_samples, num_variants)
+    return [base + (1 if i < extra else 0) for i in range(num_variants)]
@@ -0,0 +1,135 @@
+"""
+Fact Store
+SQLite-backed store of validated facts, keyed by normalized question.
+Asking the same question again updates its fact instead of appending new lines.
+"""
+
+import os
+import json
+import time
+import sqlite3
+from contextlib import closing
+from config import model_config as cfg
+from src.data.augmentation import normalize_question
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS facts (
+    key            TEXT PRIMARY KEY,   -- normalized question
+    question       TEXT NOT NULL,
+    answer         TEXT NOT NULL,
+    verdict        TEXT NOT NULL,      -- 'stable' or 'outdated' (latest judgement)
+    num_samples    INTEGER NOT NULL,   -- training weight of the latest judgement
+    times_seen     INTEGER NOT NULL DEFAULT 1,
+    times_outdated INTEGER NOT NULL DEFAULT 0,
+    model_version  INTEGER NOT NULL DEFAULT 0,
+    judge_confidence REAL,             -- judge's probability for its verdict (NULL if unknown)
+    still_wrong    INTEGER NOT NULL DEFAULT 0,  -- outdated again after a retrained version
+    created_at     REAL NOT NULL,
+    updated_at     REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS facts_updated_at ON facts(updated_at);
+
+-- Row count kept by triggers so count() never scans the table
+CREATE TABLE IF NOT EXISTS stats (name TEXT PRIMARY KEY, value INTEGER NOT NULL);
+INSERT OR IGNORE INTO stats VALUES ('fact_count', 0);
+CREATE TRIGGER IF NOT EXISTS facts_count_insert AFTER INSERT ON facts
+    BEGIN UPDATE stats SET value = value + 1 WHERE name = 'fact_count'; END;
+CREATE TRIGGER IF NOT EXISTS facts_count_delete AFTER DELETE ON facts
+    BEGIN UPDATE stats SET value = value - 1 WHERE name = 'fact_count'; END;
+"""
+
+VERDICT_STABLE = "stable"
+VERDICT_OUTDATED = "outdated"
+
+
+class FactStore:
+    """One row per unique (normalized) question holding its latest verdict and history counters."""
+
+    def __init__(self, path=cfg.FACT_STORE_FILE):
+        self.path = path
+        with closing(self._connect()) as conn, conn:
+            conn.executescript(SCHEMA)
+
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=30)
+        conn.row_factory = sqlite3.Row
+        return conn
+
+    def upsert(self, question, answer, verdict, num_samples, model_version=cfg.LAST_VERSION, judge_confidence=None):
+        """
+        Insert the fact, or replace its answer/verdict and bump its history counters.
+
+        A fact judged outdated again by a newer model version than its previous
+        outdated verdict is flagged `still_wrong` (retraining did not fix it).
+        """
+        now = time.time()
+        outdated = int(verdict == VERDICT_OUTDATED)
+        with closing(self._connect()) as conn, conn:
+            conn.execute(
+                """
+                INSERT INTO facts (key, question, answer, verdict, num_samples, times_seen, times_outdated,
+                                   model_version, judge_confidence, created_at, updated_at)
+                VALUES (?, ?, ?, ?, ?, 1, ?, ?, ?, ?, ?)
+                ON CONFLICT(key) DO UPDATE SET
+                    still_wrong = (excluded.verdict = 'outdated' AND facts.verdict = 'outdated'
+                                   AND excluded.model_version > facts.model_version),
+                    question = excluded.question,
+                    answer = excluded.answer,
+                    verdict = excluded.verdict,
+                    num_samples = excluded.num_samples,
+                    times_seen = facts.times_seen + 1,
+                    times_outdated = facts.times_outdated + excluded.times_outdated,
+                    model_version = excluded.model_version,
+                    judge_confidence = excluded.judge_confidence,
+                    updated_at = excluded.updated_at
+                """,
+                (normalize_question(question), question, answer, verdict, num_samples, outdated,
+                 model_version, judge_confidence, now, now),
+            )
+
+    def get(self, question):
+        """The stored fact for a question (any phrasing that normalizes the same), or None."""
+        with closing(self._connect()) as conn:
+            row = conn.execute("SELECT * FROM facts WHERE key = ?", (normalize_question(question),)).fetchone()
+        return dict(row) if row else None
+
+    def count(self):
+        with closing(self._connect()) as conn:
+            return conn.execute("SELECT value FROM stats WHERE name = 'fact_count'").fetchone()[0]
+
+    def facts(self, since=None):
+        """All facts (optionally only those judged at or after `since`), oldest first."""
+        query, params = "SELECT * FROM facts", ()
+        if since is not None:
+            query, params = query + " WHERE updated_at >= ?", (since,)
+        with closing(self._connect()) as conn:
+            return [dict(row) for row in conn.execute(query + " ORDER BY updated_at", params)]
+
+    def export_training_file(self, path=cfg.DATA_FOR_FINETUNING_FILE, since=None, model=None, tokenizer=None):
+        """
+        Write facts in the training JSONL format (weighted, augmented records).
+
+        With `cfg.ADAPTIVE_SAMPLING` each fact's sample count comes from the
+        scheduler (history + judge confidence, capped per run) instead of the
+        fixed count stored with its verdict.
+
+        Returns:
+            tuple: (facts exported, total weighted samples)
+        """
+        from src.data.generator import create_training_samples
+        from src.data.sample_scheduler import schedule_samples
+
+        facts = self.facts(since)
+        counts = schedule_samples(facts) if cfg.ADAPTIVE_SAMPLING else [fact["num_samples"] for fact in facts]
+        total_samples = 0
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, 'w') as f:
+            for fact, num_samples in zip(facts, counts):
+                for sample in create_training_samples(fact["question"], fact["answer"], num_samples,
+                                                      model, tokenizer, verdict=fact["verdict"]):
+                    f.write(json.dumps(sample) + "\n")
+                    total_samples += sample["weight"]
+        os.replace(tmp_path, path)
+
+        print(f"Exported {len(facts)} facts ({total_samples} weighted samples) from {self.path} to {path}")
+        return len(facts), total_samples
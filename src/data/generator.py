@@ -3,17 +3,48 @@ Training Data Generator
 Generates synthetic training samples with new facts
 """
 
+import re
+from config import model_config as cfg
+from src.data.augmentation import generate_question_variants, split_budget
 
-def create_training_samples(Q_orig, A_golden, num_samples):
-    """Creates a list of formatted training samples."""
-    print(f"--- Augmenting data: Creating {num_samples} samples... ---")
-    questions = [Q_orig] * num_samples
-    answers = [A_golden] * num_samples
+_TEXT_PATTERN = re.compile(r"<\|im_start\|>user\n(.*)<\|im_end\|>\n<\|im_start\|>assistant\n(.*)<\|im_end\|>", re.S)
 
-    augmented_samples = []
-    for q, a in zip(questions, answers):
-        text = f"<|im_start|>user\n{q}<|im_end|>\n<|im_start|>assistant\n{a}<|im_end|>"
-        augmented_samples.append({"text": text})
 
-    print(f"--- Generated {len(augmented_samples)} new samples. ---")
+def format_training_text(question, answer):
+    """Chat-formatted training text for one Q&A pair."""
+    return f"<|im_start|>user\n{question}<|im_end|>\n<|im_start|>assistant\n{answer}<|im_end|>"
+
+
+def parse_training_text(text):
+    """(question, answer) of a chat-formatted training text."""
+    match = _TEXT_PATTERN.fullmatch(text)
+    return (match.group(1), match.group(2)) if match else (None, None)
+
+
+def create_training_samples(Q_orig, A_golden, num_samples, model=None, tokenizer=None, version=cfg.LAST_VERSION,
+                            verdict=None, cache_dir=cfg.AUGMENTATION_CACHE_DIR):
+    """
+    Creates the training records for one fact.
+
+    The question is rephrased into up to `cfg.NUM_QUESTION_VARIANTS` distinct
+    variants and `num_samples` is split between them as record weights, so the
+    fact's total exposure is unchanged. `model`/`tokenizer` enable LLM
+    paraphrasing (see `cfg.AUGMENTATION_USE_LLM`); `version` keys the cache in `cache_dir`.
+    `verdict` ("stable" / "outdated") is kept on the records for the
+    fact-recall checks during training.
+    """
+    variants = generate_question_variants([Q_orig], model=model, tokenizer=tokenizer, version=version,
+                                          cache_dir=cache_dir)[Q_orig]
+    weights = split_budget(num_samples, len(variants))
+
+    print(f"--- Augmenting data: Creating {len(weights)} question variant(s) for {num_samples} samples... ---")
+    augmented_samples = [
+        {"text": format_training_text(q, A_golden), "weight": w, "question": Q_orig}
+        for q, w in zip(variants, weights)
+    ]
+    if verdict is not None:
+        for sample in augmented_samples:
+            sample["verdict"] = verdict
+
+    print(f"--- Generated {len(augmented_samples)} record(s) = {num_samples} training samples. ---")
     return augmented_samples
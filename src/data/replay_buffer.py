@@ -0,0 +1,132 @@
+"""
+Replay Buffer
+Fixed-size, reservoir-sampled set of past facts taken from the processed
+training archives, mixed back into every training run to prevent forgetting.
+"""
+
+import os
+import re
+import json
+import random
+from config import model_config as cfg
+from src.data.augmentation import normalize_question, split_budget
+
+_ARCHIVE_PATTERN = r"\.processed_v(\d+)$"
+
+
+def _fact_key(record):
+    return normalize_question(record["question"]) if "question" in record else record["text"]
+
+
+def _group_facts(path):
+    """Records of a training JSONL grouped per fact (normalized question), in file order."""
+    facts = {}
+    with open(path) as f:
+        for line in f:
+            if line.strip():
+                record = json.loads(line)
+                facts.setdefault(_fact_key(record), []).append(record)
+    return facts
+
+
+class ReplayBuffer:
+    """
+    Reservoir sample (algorithm R) of every fact ever trained on, capped at `capacity`.
+
+    Facts live in a list (O(1) random access for sampling) with a key -> slot
+    index; a fact seen again is updated in place instead of counted twice.
+    The archives already ingested are remembered, so ingestion is idempotent.
+    """
+
+    def __init__(self, path, capacity=cfg.REPLAY_BUFFER_SIZE, seed=cfg.REPLAY_SEED):
+        self.path = path
+        state = {}
+        if os.path.exists(path):
+            with open(path) as f:
+                state = json.load(f)
+        self.capacity = capacity
+        self.seen = state.get("seen", 0)
+        self.ingested = state.get("ingested", [])
+        self.facts = state.get("facts", [])[:capacity]
+        self._slots = {fact["key"]: i for i, fact in enumerate(self.facts)}
+        # Seeded by position in the stream, so a resumed buffer keeps a reproducible sequence
+        self._rng = random.Random(f"{seed}:{self.seen}")
+
+    def __len__(self):
+        return len(self.facts)
+
+    def add(self, key, records):
+        if key in self._slots:
+            self.facts[self._slots[key]] = {"key": key, "records": records}
+            return
+
+        self.seen += 1
+        if len(self.facts) < self.capacity:
+            slot = len(self.facts)
+            self.facts.append(None)
+        else:
+            slot = self._rng.randrange(self.seen)
+            if slot >= self.capacity:
+                return
+            del self._slots[self.facts[slot]["key"]]
+        self.facts[slot] = {"key": key, "records": records}
+        self._slots[key] = slot
+
+    def ingest_archives(self, directory, data_file_name=cfg.DATA_FOR_FINETUNING_FILE):
+        """
+        Add the facts of every `<data file>.processed_vN` archive not ingested yet, oldest first.
+
+        Returns:
+            int: Number of archives ingested
+        """
+        pattern = re.compile(re.escape(data_file_name) + _ARCHIVE_PATTERN)
+        archives = sorted(
+            (int(match.group(1)), name) for name in os.listdir(directory)
+            if (match := pattern.fullmatch(name)) and name not in self.ingested
+        )
+        for _, name in archives:
+            for key, records in _group_facts(os.path.join(directory, name)).items():
+                self.add(key, records)
+            self.ingested.append(name)
+        return len(archives)
+
+    def sample(self, n, exclude=()):
+        """Up to `n` distinct random facts whose key is not in `exclude`."""
+        exclude = set(exclude)
+        picks = self._rng.sample(range(len(self.facts)), min(len(self.facts), n + len(exclude & self._slots.keys())))
+        return [self.facts[i] for i in picks if self.facts[i]["key"] not in exclude][:n]
+
+    def save(self):
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump({"seen": self.seen, "ingested": self.ingested, "facts": self.facts}, f)
+        os.replace(tmp_path, self.path)
+
+
+def mix_replay(data_file, output_file, buffer, ratio=cfg.REPLAY_RATIO, fact_samples=cfg.REPLAY_FACT_SAMPLES):
+    """
+    Write `data_file` plus replayed facts to `output_file`.
+
+    Replayed facts make up `ratio` of the facts in the run (facts in the new data
+    are never replayed), each with `fact_samples` samples split over its records.
+
+    Returns:
+        tuple: (new facts, replayed facts)
+    """
+    new_keys = set()
+    with open(data_file) as src, open(f"{output_file}.tmp", 'w') as dst:
+        for line in src:
+            if line.strip():
+                new_keys.add(_fact_key(json.loads(line)))
+                dst.write(line if line.endswith("\n") else line + "\n")
+
+        num_replay = round(len(new_keys) * ratio / (1 - ratio)) if ratio < 1 else len(buffer)
+        replayed = buffer.sample(num_replay, exclude=new_keys)
+        for fact in replayed:
+            for record, weight in zip(fact["records"], split_budget(fact_samples, len(fact["records"]))):
+                dst.write(json.dumps({**record, "weight": weight, "replayed": True}) + "\n")
+    os.replace(f"{output_file}.tmp", output_file)
+
+    print(f"🔁 Replay: {len(new_keys)} new facts + {len(replayed)} replayed facts "
+          f"(buffer {len(buffer)}/{buffer.capacity}, {buffer.seen} facts seen)")
+    return len(new_keys), len(replayed)
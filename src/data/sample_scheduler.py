@@ -0,0 +1,58 @@
+"""
+Sample Scheduler
+Chooses each fact's training sample count from its history (failures,
+whether retraining fixed it, judge confidence) instead of fixed 100/500 counts.
+"""
+
+from config import model_config as cfg
+from src.data.fact_store import VERDICT_OUTDATED
+
+
+def fact_samples(fact):
+    """
+    Sample count for one fact row of the FactStore.
+
+    Stable facts get `SCHEDULE_STABLE_MIN_SAMPLES` when the judge is sure the
+    answer is right, up to `NUM_SAMPLES_STABLE` when it is unsure. Outdated facts
+    start between `SCHEDULE_NEW_MIN_SAMPLES` and `NUM_SAMPLES_NEW` (by judge
+    confidence), grow with every earlier outdated verdict and are multiplied
+    again when the last retrained version still got them wrong.
+
+    Without a judge confidence (e.g. rows stored before it was recorded) the
+    fixed `NUM_SAMPLES_STABLE` / `NUM_SAMPLES_NEW` counts are the starting point.
+    """
+    confidence = fact.get("judge_confidence")
+
+    if fact["verdict"] != VERDICT_OUTDATED:
+        if confidence is None:
+            samples = cfg.NUM_SAMPLES_STABLE
+        else:
+            samples = cfg.SCHEDULE_STABLE_MIN_SAMPLES + (cfg.NUM_SAMPLES_STABLE - cfg.SCHEDULE_STABLE_MIN_SAMPLES) * (1 - confidence)
+    else:
+        if confidence is None:
+            samples = cfg.NUM_SAMPLES_NEW
+        else:
+            samples = cfg.SCHEDULE_NEW_MIN_SAMPLES + (cfg.NUM_SAMPLES_NEW - cfg.SCHEDULE_NEW_MIN_SAMPLES) * confidence
+        samples *= 1 + cfg.SCHEDULE_REPEAT_FAILURE_BOOST * max(0, fact.get("times_outdated", 1) - 1)
+        if fact.get("still_wrong"):
+            samples *= cfg.SCHEDULE_STILL_WRONG_MULTIPLIER
+
+    return max(1, min(int(round(samples)), cfg.SCHEDULE_MAX_SAMPLES_PER_FACT))
+
+
+def schedule_samples(facts, max_total=cfg.MAX_TRAINING_SAMPLES_PER_RUN):
+    """
+    Sample counts for a training run, scaled down proportionally if they exceed `max_total`.
+
+    Returns:
+        list: One sample count per fact, in the same order
+    """
+    counts = [fact_samples(fact) for fact in facts]
+    total = sum(counts)
+    if max_total and total > max_total:
+        counts = [max(1, int(c * max_total / total)) for c in counts]
+
+    fixed = sum(cfg.NUM_SAMPLES_NEW if f["verdict"] == VERDICT_OUTDATED else cfg.NUM_SAMPLES_STABLE for f in facts)
+    print(f"--- Adaptive schedule: {sum(counts)} samples for {len(facts)} facts "
+          f"(fixed counts would be {fixed}; cap {max_total}) ---")
+    return counts
@@ -0,0 +1,60 @@
+"""
+Streaming Training Dataset
+Reads JSONL files / Arrow shards lazily into an IterableDataset, so memory stays
+flat however large the accumulated training data grows.
+"""
+
+import os
+import json
+import pyarrow as pa
+from datasets import IterableDataset
+from config import model_config as cfg
+from src.data.arrow_dataset import sync_from_jsonl, shard_paths
+
+
+def iter_records(path):
+    """
+    Yield `{"text", "weight"}` records one at a time.
+
+    Arrow dataset directories (and JSONL files in the "arrow" format, synced
+    first in bounded chunks) are read batch by batch from memory-mapped shards;
+    JSONL files in the "jsonl" format line by line.
+    """
+    if not os.path.isdir(path) and cfg.TRAINING_DATA_FORMAT == "arrow":
+        path = sync_from_jsonl(path)
+    if os.path.isdir(path):
+        for shard in shard_paths(path):
+            with pa.memory_map(shard) as source:
+                for batch in pa.ipc.open_stream(source):
+                    yield from batch.to_pylist()
+        return
+
+    with open(path) as f:
+        for line in f:
+            if line.strip():
+                record = json.loads(line)
+                yield {"text": record["text"], "weight": int(record.get("weight") or 1)}
+
+
+def _expanded_samples(paths):
+    # Each record is repeated `weight` times; the shuffle buffer spreads the copies out
+    for path in paths:
+        for record in iter_records(path):
+            for _ in range(record["weight"]):
+                yield {"text": record["text"]}
+
+
+def stream_training_dataset(paths, seed=cfg.STREAM_SEED, buffer_size=cfg.STREAM_SHUFFLE_BUFFER):
+    """
+    Lazily read training files as an IterableDataset of `text` samples.
+
+    Weights are expanded on the fly and samples are shuffled through a bounded
+    buffer of `buffer_size` with a fixed seed, so runs are reproducible. The
+    dataset has no length: train with `max_steps` (`cfg.MAX_STEPS`).
+
+    Args:
+        paths: Training JSONL files and/or Arrow dataset directories
+    """
+    paths = [paths] if isinstance(paths, str) else list(paths)
+    dataset = IterableDataset.from_generator(_expanded_samples, gen_kwargs={"paths": paths})
+    return dataset.shuffle(seed=seed, buffer_size=buffer_size)
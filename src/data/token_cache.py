@@ -0,0 +1,157 @@
+"""
+Token Cache
+Persistent input_ids per unique training text, so repeat training runs only
+tokenize texts they have not seen before and hand SFTTrainer a pre-tokenized dataset.
+"""
+
+import os
+import json
+import time
+import shutil
+import hashlib
+import pyarrow as pa
+from datasets import Dataset, concatenate_datasets
+from config import model_config as cfg
+
+# Bump when the cached columns or the tokenization call change
+CACHE_FORMAT_VERSION = 1
+SHARD_PREFIX = "tokens-"
+
+
+def tokenizer_fingerprint(tokenizer, max_seq_length=cfg.MAX_SEQ_LENGTH):
+    """Hash of everything that changes the token ids: vocab/merges/normalizer, special tokens, max length."""
+    if getattr(tokenizer, "is_fast", False):
+        content = tokenizer.backend_tokenizer.to_str()
+    else:
+        content = json.dumps(sorted(tokenizer.get_vocab().items()))
+    state = json.dumps({
+        "version": CACHE_FORMAT_VERSION,
+        "class": type(tokenizer).__name__,
+        "special_tokens": tokenizer.special_tokens_map,
+        "max_seq_length": max_seq_length,
+    }, sort_keys=True, default=str)
+    return hashlib.sha256((content + state).encode()).hexdigest()[:16]
+
+
+def _text_key(text):
+    return hashlib.sha1(text.encode()).hexdigest()
+
+
+def _load_cache(directory):
+    shards = sorted(name for name in os.listdir(directory) if name.startswith(SHARD_PREFIX)) \
+        if os.path.isdir(directory) else []
+    if not shards:
+        return None
+    tables = [Dataset.from_file(os.path.join(directory, shard)) for shard in shards]
+    return concatenate_datasets(tables) if len(tables) > 1 else tables[0]
+
+
+def _write_shard(directory, tokenized):
+    """Seal newly tokenized rows as one immutable Arrow shard (temp file + rename)."""
+    os.makedirs(directory, exist_ok=True)
+    table = tokenized.with_format("arrow")[:]
+    path = os.path.join(directory, f"{SHARD_PREFIX}{time.time_ns()}-{os.getpid()}.arrow")
+    with pa.OSFile(f"{path}.tmp", 'wb') as sink, pa.ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table)
+    os.replace(f"{path}.tmp", path)
+
+
+def _shards(directory):
+    return [os.path.join(directory, name) for name in os.listdir(directory) if name.startswith(SHARD_PREFIX)]
+
+
+def compact_cache(directory, cache, keys, max_bytes=cfg.TOKEN_CACHE_MAX_BYTES):
+    """
+    If the shards of `directory` exceed `max_bytes`, rewrite them as one shard
+    holding only the texts of `keys` (those of the current run). A single shard
+    is left alone: it already holds no more than one run's texts.
+
+    Returns:
+        bool: True if the cache was compacted
+    """
+    old_shards = _shards(directory)
+    if len(old_shards) < 2 or sum(os.path.getsize(path) for path in old_shards) <= max_bytes:
+        return False
+    index = {key: i for i, key in enumerate(cache["key"])}
+    _write_shard(directory, cache.select(sorted({index[key] for key in keys})))
+    for path in old_shards:
+        os.remove(path)
+    return True
+
+
+def prune_cache(cache_dir=cfg.TOKEN_CACHE_DIR, keep_fingerprints=cfg.TOKEN_CACHE_FINGERPRINTS):
+    """
+    Delete the caches of all but the `keep_fingerprints` most recently used
+    tokenizer fingerprints (a changed tokenizer or max length never reads them again).
+
+    Returns:
+        list: Pruned fingerprints
+    """
+    if not os.path.isdir(cache_dir):
+        return []
+    fingerprints = sorted((name for name in os.listdir(cache_dir) if os.path.isdir(os.path.join(cache_dir, name))),
+                          key=lambda name: os.path.getmtime(os.path.join(cache_dir, name)))
+    pruned = fingerprints[:-keep_fingerprints] if keep_fingerprints > 0 else fingerprints
+    for fingerprint in pruned:
+        shutil.rmtree(os.path.join(cache_dir, fingerprint), ignore_errors=True)
+    return pruned
+
+
+def pretokenize(dataset, tokenizer, cache_dir=cfg.TOKEN_CACHE_DIR, max_seq_length=cfg.MAX_SEQ_LENGTH,
+                num_proc=cfg.TOKENIZE_NUM_PROC, max_cache_bytes=cfg.TOKEN_CACHE_MAX_BYTES):
+    """
+    Replace the `text` column with cached `input_ids` (other columns, e.g. `weight`, are kept).
+
+    Texts missing from the cache are tokenized once (in `num_proc` processes
+    when there are at least `cfg.TOKENIZE_PARALLEL_MIN_TEXTS` of them) and appended to it.
+    Cache entries live under `<cache_dir>/<tokenizer fingerprint>/`; a new
+    fingerprint prunes the older ones (`prune_cache`) and a fingerprint over
+    `max_cache_bytes` is compacted to the current texts (`compact_cache`).
+
+    Returns:
+        Dataset: `input_ids` + the remaining columns of `dataset`, in the same order
+    """
+    start = time.perf_counter()
+    directory = os.path.join(cache_dir, tokenizer_fingerprint(tokenizer, max_seq_length))
+    new_fingerprint = not os.path.isdir(directory)
+    keys = [_text_key(text) for text in dataset["text"]]
+
+    cache = _load_cache(directory)
+    index = {key: i for i, key in enumerate(cache["key"])} if cache is not None else {}
+
+    misses = {}
+    for key, text in zip(keys, dataset["text"]):
+        if key not in index and key not in misses:
+            misses[key] = text
+
+    if misses:
+        def tokenize(batch):
+            encoded = tokenizer(batch["text"], truncation=True, max_length=max_seq_length)
+            return {"input_ids": encoded["input_ids"]}
+
+        tokenized = Dataset.from_dict({"key": list(misses), "text": list(misses.values())}).map(
+            tokenize,
+            batched=True,
+            remove_columns=["text"],
+            num_proc=num_proc if len(misses) >= cfg.TOKENIZE_PARALLEL_MIN_TEXTS else None,
+            desc="Tokenizing new texts",
+        )
+        _write_shard(directory, tokenized)
+        cache = _load_cache(directory)
+    if cache is not None:
+        if compact_cache(directory, cache, keys, max_cache_bytes):
+            print(f"🧹 Token cache over {max_cache_bytes / 1024 ** 3:.1f} GiB: compacted to this run's texts")
+            cache = _load_cache(directory)
+        index = {key: i for i, key in enumerate(cache["key"])}
+        os.utime(directory)  # Most recently used fingerprint, for prune_cache
+        if new_fingerprint:
+            prune_cache(cache_dir)
+
+    result = cache.select([index[key] for key in keys]).remove_columns("key")
+    for column in dataset.column_names:
+        if column != "text":
+            result = result.add_column(column, dataset[column])
+
+    print(f"--- Token cache: {len(set(keys)) - len(misses)} cached / {len(misses)} newly tokenized texts "
+          f"in {time.perf_counter() - start:.2f}s ({directory}) ---")
+    return result
@@ -9,6 +9,29 @@ import os
 from config import model_config as cfg
 
 
+def read_training_file(path, data_format=None):
+    """
+    Read a training JSONL file into a Dataset with `text` and `weight` columns.
+    Records written before weights existed (one line per sample) get weight 1.
+
+    With the "arrow" format (`cfg.TRAINING_DATA_FORMAT`) new lines are first
+    synced into Arrow shards next to the file, which are memory-mapped instead
+    of parsed into RAM. `path` may also be an Arrow dataset directory.
+    """
+    from src.data.arrow_dataset import sync_from_jsonl, load_arrow_dataset
+
+    if os.path.isdir(path):
+        return load_arrow_dataset(path)
+    if (data_format or cfg.TRAINING_DATA_FORMAT) == "arrow":
+        return load_arrow_dataset(sync_from_jsonl(path))
+
+    df = pd.read_json(path, lines=True)
+    if "weight" not in df.columns:
+        df["weight"] = 1
+    df["weight"] = df["weight"].fillna(1).astype("int64")
+    return Dataset.from_pandas(df[["text", "weight"]], preserve_index=False)
+
+
 def load_training_dataset():
     """
     Load training data from JSONL file.
@@ -22,16 +45,22 @@ def load_training_dataset():
         print(f"No training file found at {cfg.DATA_FOR_FINETUNING_FILE}")
         print("Run Part 3 to generate some data first!")
         return None
-    else:
-        # Load the .jsonl file into a pandas DataFrame
-        df = pd.read_json(cfg.DATA_FOR_FINETUNING_FILE, lines=True)
+    elif cfg.STREAM_TRAINING_DATA:
+        # Read lazily: memory stays flat no matter how large the file grows
+        from src.data.streaming import stream_training_dataset
 
-        # Convert to HuggingFace Dataset
-        # We just need the 'text' column, as it's already formatted
-        new_dataset = Dataset.from_pandas(df[["text"]])
+        new_dataset = stream_training_dataset(cfg.DATA_FOR_FINETUNING_FILE)
+        print(f"Streaming {cfg.DATA_FOR_FINETUNING_FILE} (shuffle buffer {cfg.STREAM_SHUFFLE_BUFFER}, "
+              f"seed {cfg.STREAM_SEED}); training runs for {cfg.MAX_STEPS} steps")
+        return new_dataset
+    else:
+        # We need the 'text' column, as it's already formatted, and the
+        # 'weight' column, which the weighted sampler expands at training time
+        new_dataset = read_training_file(cfg.DATA_FOR_FINETUNING_FILE)
 
-        print(f"Loaded {len(new_dataset)} new facts from {cfg.DATA_FOR_FINETUNING_FILE}")
+        print(f"Loaded {len(new_dataset)} facts ({sum(new_dataset['weight'])} weighted samples) "
+              f"from {cfg.DATA_FOR_FINETUNING_FILE}")
         print("\nSample of new training text:")
         print(new_dataset[0]['text'])
 
-        return new_dataset
\ No newline at end of file
+        return new_dataset
@@ -0,0 +1,10 @@
+"""
+Export Module
+Converts saved model versions into other serving formats
+"""
+from .onnx_export import export_to_onnx, quantize_onnx, onnx_dir
+from .onnx_runtime import OnnxGreedyModel, load_onnx_model
+from .shard_merge import merge_version, merge_lora_shards, verify_merge
+
+__all__ = ['export_to_onnx', 'quantize_onnx', 'onnx_dir', 'OnnxGreedyModel', 'load_onnx_model', 'merge_version',
+           'merge_lora_shards', 'verify_merge']
@@ -0,0 +1,108 @@
+"""
+ONNX Export
+Converts a saved model version into an ONNX graph with KV-cache inputs/outputs
+(optionally int8-quantized) for CPU serving with ONNX Runtime.
+
+Usage:
+    python -m src.export.onnx_export --model-path ./qwen-finetuned-v2 --quantize
+"""
+
+import os
+import shutil
+import argparse
+from config import model_config as cfg
+
+ONNX_MODEL_FILE = "model.onnx"
+ONNX_QUANTIZED_MODEL_FILE = "model_quantized.onnx"
+
+
+def onnx_dir(model_path):
+    """Folder holding the ONNX export of a saved model version."""
+    return os.path.join(model_path, cfg.ONNX_SUBDIR)
+
+
+def export_to_onnx(model_path, output_dir=None, quantize=False):
+    """
+    Export a merged model version (as written by `save_model` / `train_job`) to ONNX.
+
+    Args:
+        model_path: Saved model version folder (merged 16-bit weights, see `merge_version`)
+        output_dir: Where to write the graph (defaults to <model_path>/onnx)
+        quantize: Also write a dynamically int8-quantized graph
+
+    Returns:
+        str: The output folder
+    """
+    from optimum.exporters.onnx import main_export
+
+    output_dir = output_dir or onnx_dir(model_path)
+
+    print("\n" + "="*80)
+    print(f"📦 EXPORTING {model_path} TO ONNX -> {output_dir}")
+    print("="*80)
+
+    # "-with-past" exports past_key_values.* inputs and present.* outputs,
+    # so decoding feeds one new token per step instead of the whole sequence
+    main_export(
+        model_name_or_path=model_path,
+        output=output_dir,
+        task="text-generation-with-past",
+        device="cpu",
+        dtype="fp32",
+    )
+    print(f"ONNX graph saved to {os.path.join(output_dir, ONNX_MODEL_FILE)}")
+
+    if quantize:
+        quantize_onnx(output_dir)
+
+    return output_dir
+
+
+def quantize_onnx(output_dir):
+    """
+    Dynamic int8 quantization of the exported graph (weights int8, activations quantized at runtime).
+
+    Returns:
+        str: Path of the quantized graph
+    """
+    from onnxruntime.quantization import quantize_dynamic, QuantType
+
+    source = os.path.join(output_dir, ONNX_MODEL_FILE)
+    target = os.path.join(output_dir, ONNX_QUANTIZED_MODEL_FILE)
+
+    print(f"--- Quantizing {source} to int8... ---")
+    quantize_dynamic(
+        model_input=source,
+        model_output=target,
+        weight_type=QuantType.QInt8,
+        per_channel=True,
+        use_external_data_format=True,
+    )
+    print(f"Quantized graph saved to {target}")
+    return target
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Export a saved model version to ONNX for CPU serving.")
+    parser.add_argument("--model-path", default=cfg.CURRENT_CHATBOT_PATH, help="Saved model version folder")
+    parser.add_argument("--output-dir", default=None, help="Defaults to <model-path>/onnx")
+    parser.add_argument("--quantize", action="store_true", help="Also write an int8-quantized graph")
+    parser.add_argument("--force", action="store_true", help="Overwrite an existing export")
+    args = parser.parse_args()
+
+    output_dir = args.output_dir or onnx_dir(args.model_path)
+    if os.path.exists(output_dir):
+        if not args.force:
+            print(f"❌ {output_dir} already exists. Use --force to overwrite.")
+            return
+        shutil.rmtree(output_dir)
+
+    # Adapter-only versions (cfg.MERGE_VERSIONS) are merged first
+    from src.export.shard_merge import merge_version
+
+    merge_version(args.model_path)
+    export_to_onnx(args.model_path, output_dir, quantize=args.quantize)
+
+
+if __name__ == "__main__":
+    main()
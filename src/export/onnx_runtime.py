@@ -0,0 +1,122 @@
+"""
+ONNX Runtime Inference
+Greedy decoding over an exported KV-cache graph, usable wherever a HF model is
+passed to `ask_model` / `get_model_answer` (CPU-only serving replicas).
+"""
+
+import os
+import json
+import numpy as np
+import torch
+from config import model_config as cfg
+from src.export.onnx_export import ONNX_MODEL_FILE, ONNX_QUANTIZED_MODEL_FILE
+
+_ORT_DTYPES = {"tensor(float)": np.float32, "tensor(float16)": np.float16}
+
+
+class OnnxGreedyModel:
+    """
+    Minimal stand-in for a HF causal LM: exposes `device` and a greedy `generate()`.
+
+    The prompt is run once to fill the KV cache, then each step feeds only the
+    last token plus `past_key_values.*` and reads back `present.*`.
+    """
+
+    def __init__(self, model_dir, quantized=False, num_threads=cfg.ONNX_NUM_THREADS):
+        import onnxruntime as ort
+
+        model_file = os.path.join(model_dir, ONNX_QUANTIZED_MODEL_FILE if quantized else ONNX_MODEL_FILE)
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        if num_threads:
+            options.intra_op_num_threads = num_threads
+        self.session = ort.InferenceSession(model_file, options, providers=["CPUExecutionProvider"])
+
+        inputs = {i.name: i for i in self.session.get_inputs()}
+        self.input_names = set(inputs)
+        self.past_names = [name for name in inputs if name.startswith("past_key_values.")]
+        self.present_names = [name.replace("past_key_values.", "present.") for name in self.past_names]
+        # [batch, num_kv_heads, past_len, head_dim] -> only heads/head_dim are static
+        first_past = inputs[self.past_names[0]]
+        self.num_kv_heads, self.head_dim = first_past.shape[1], first_past.shape[3]
+        self.past_dtype = _ORT_DTYPES[first_past.type]
+
+        self.eos_token_ids = self._read_eos_token_ids(model_dir)
+        self.device = torch.device("cpu")
+        self.model_file = model_file
+
+    @staticmethod
+    def _read_eos_token_ids(model_dir):
+        for name in ("generation_config.json", "config.json"):
+            path = os.path.join(model_dir, name)
+            if os.path.exists(path):
+                with open(path) as f:
+                    eos = json.load(f).get("eos_token_id")
+                if eos is not None:
+                    return set(eos if isinstance(eos, list) else [eos])
+        return set()
+
+    def _empty_past(self, batch_size):
+        shape = (batch_size, self.num_kv_heads, 0, self.head_dim)
+        return {name: np.zeros(shape, dtype=self.past_dtype) for name in self.past_names}
+
+    def _forward(self, input_ids, attention_mask, past):
+        feed = {"input_ids": input_ids, "attention_mask": attention_mask, **past}
+        if "position_ids" in self.input_names:
+            positions = np.cumsum(attention_mask, axis=-1) - 1
+            feed["position_ids"] = positions[:, -input_ids.shape[1]:].astype(np.int64)
+        outputs = self.session.run(["logits"] + self.present_names, feed)
+        new_past = dict(zip(self.past_names, outputs[1:]))
+        return outputs[0], new_past
+
+    def generate(self, input_ids, attention_mask=None, max_new_tokens=cfg.GENERATION_MAX_NEW_TOKENS, **kwargs):
+        """
+        Greedy decoding of a single prompt (sampling arguments such as temperature/do_sample are ignored).
+
+        Returns:
+            torch.LongTensor: Prompt + generated token ids, shape [1, prompt_len + new_tokens]
+
+        Raises:
+            ValueError: If `input_ids` holds more than one prompt
+        """
+        if input_ids.shape[0] != 1:
+            raise ValueError(f"OnnxGreedyModel decodes one prompt at a time, got a batch of {input_ids.shape[0]}")
+        ids = input_ids.cpu().numpy().astype(np.int64)
+        mask = (attention_mask.cpu().numpy() if attention_mask is not None else np.ones_like(ids)).astype(np.int64)
+
+        logits, past = self._forward(ids, mask, self._empty_past(ids.shape[0]))
+        generated = []
+        for _ in range(max_new_tokens):
+            next_token = int(np.argmax(logits[0, -1]))
+            generated.append(next_token)
+            if next_token in self.eos_token_ids:
+                break
+            step_ids = np.array([[next_token]], dtype=np.int64)
+            mask = np.concatenate([mask, np.ones((1, 1), dtype=np.int64)], axis=-1)
+            logits, past = self._forward(step_ids, mask, past)
+
+        return torch.from_numpy(np.concatenate([ids, np.array([generated], dtype=np.int64)], axis=-1))
+
+
+def load_onnx_model(model_dir, quantized=False):
+    """
+    Load an exported model for CPU inference.
+
+    Args:
+        model_dir: The ONNX export folder (see `src.export.onnx_export.onnx_dir`)
+        quantized: Use the int8 graph
+
+    Returns:
+        tuple: (model, tokenizer)
+    """
+    from transformers import AutoTokenizer
+
+    print("\n" + "="*80)
+    print(f"LOADING ONNX MODEL FROM {model_dir} ({'int8' if quantized else 'fp32'}) FOR CPU INFERENCE...")
+    print("="*80)
+
+    model = OnnxGreedyModel(model_dir, quantized=quantized)
+    tokenizer = AutoTokenizer.from_pretrained(model_dir)
+
+    print(f"ONNX model loaded: {model.model_file}")
+    return model, tokenizer
@@ -0,0 +1,295 @@
+"""
+Shard-by-Shard Merge
+Writes the merged 16-bit weights of an adapter-only model version without
+loading the model: the base model's safetensors shards are streamed one at a
+time, LoRA deltas are applied tensor by tensor and each merged shard is
+written before the next is read. Peak memory is about one shard plus the adapter.
+
+The arithmetic is that of Unsloth's `save_pretrained_merged`: every weight is
+cast to the dtype the model was trained in (recorded with the adapter), LoRA
+weights get W^T + scaling * A^T B^T in fp32 and are cast back. Unsloth merges
+on the GPU, so the merge runs on CUDA when available (fp32 sums on the CPU may
+round differently); `--verify` checks a result against a real
+`save_pretrained_merged` folder.
+
+Usage:
+    python -m src.export.shard_merge --model-path ./storage/qwen-finetuned-v3
+    python -m src.export.shard_merge --model-path ./storage/qwen-finetuned-v3 --verify ./reference-merged
+"""
+
+import os
+import json
+import math
+import time
+import shutil
+import argparse
+import resource
+import torch
+from safetensors import safe_open
+from safetensors.torch import load_file, save_file
+from config import model_config as cfg
+
+SAFETENSORS_FILE = "model.safetensors"
+SAFETENSORS_INDEX_FILE = "model.safetensors.index.json"
+_BASE_FILES = ["config.json", "generation_config.json", SAFETENSORS_FILE, SAFETENSORS_INDEX_FILE, "*.safetensors"]
+_TOKENIZER_FILES = ["tokenizer.json", "tokenizer_config.json", "special_tokens_map.json", "vocab.json", "merges.txt",
+                    "added_tokens.json", "chat_template.jinja"]
+
+
+def folder_size(path):
+    """Bytes of all files under `path`."""
+    return sum(os.path.getsize(os.path.join(root, name)) for root, _, names in os.walk(path) for name in names)
+
+
+def _peak_rss_mb():
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024  # KB on Linux
+
+
+def _is_merged(path):
+    return os.path.exists(os.path.join(path, "config.json"))
+
+
+def _adapter_config(adapter_path):
+    with open(os.path.join(adapter_path, "adapter_config.json")) as f:
+        return json.load(f)
+
+
+def adapter_base(model_path):
+    """The model a version's adapter was trained on."""
+    return _adapter_config(os.path.join(model_path, cfg.ADAPTER_SUBDIR)).get("base_model_name_or_path")
+
+
+def weight_shards(model_dir):
+    """
+    The safetensors files of a model folder and its tensor -> file map.
+
+    Returns:
+        tuple: (shard file names in order, weight_map)
+    """
+    index_file = os.path.join(model_dir, SAFETENSORS_INDEX_FILE)
+    if os.path.exists(index_file):
+        with open(index_file) as f:
+            weight_map = json.load(f)["weight_map"]
+        return sorted(set(weight_map.values())), weight_map
+    with safe_open(os.path.join(model_dir, SAFETENSORS_FILE), framework="pt") as f:
+        return [SAFETENSORS_FILE], {name: SAFETENSORS_FILE for name in f.keys()}
+
+
+def resolve_base_dir(base):
+    """Local folder with the base model's safetensors: a merged folder as is, a hub id downloaded (weights only)."""
+    if os.path.isdir(base):
+        if not _is_merged(base):
+            raise FileNotFoundError(f"Base model {base} has no merged weights (merge it first)")
+        return base
+    from huggingface_hub import snapshot_download
+
+    return snapshot_download(base, allow_patterns=_BASE_FILES)
+
+
+def training_dtype(adapter_path):
+    """dtype the adapter's model was trained in (`cfg.DTYPE` for adapters saved without it)."""
+    dtype_file = os.path.join(adapter_path, cfg.ADAPTER_DTYPE_FILE)
+    if not os.path.exists(dtype_file):
+        return cfg.DTYPE
+    with open(dtype_file) as f:
+        return getattr(torch, json.load(f)["dtype"])
+
+
+def lora_deltas(adapter_path):
+    """
+    The LoRA factors of a saved PEFT adapter, keyed by the base weight they update.
+
+    Returns:
+        dict: base tensor name -> (lora_A, lora_B, scaling)
+    """
+    config = _adapter_config(adapter_path)
+    if config.get("use_dora") or config.get("alpha_pattern") or config.get("fan_in_fan_out"):
+        raise ValueError(f"{adapter_path}: DoRA, alpha_pattern and fan_in_fan_out adapters are not supported")
+
+    tensors = load_file(os.path.join(adapter_path, "adapter_model.safetensors"))
+    deltas = {}
+    for name, lora_a in tensors.items():
+        if ".lora_B." in name:
+            continue
+        if ".lora_A." not in name:
+            raise ValueError(f"{adapter_path}: unsupported adapter tensor {name} (only LoRA A/B factors can be merged)")
+        # base_model.model.<module>.lora_A.weight -> <module>.weight
+        target = name.removeprefix("base_model.model.").replace(".lora_A.", ".")
+        rank = lora_a.shape[0]
+        scaling = config["lora_alpha"] / (math.sqrt(rank) if config.get("use_rslora") else rank)
+        deltas[target] = (lora_a, tensors[name.replace(".lora_A.", ".lora_B.")], scaling)
+    return deltas
+
+
+def merge_lora_weight(weight, lora_a, lora_b, scaling, device="cpu"):
+    """
+    W + scaling * (B @ A) in W's dtype, computed like Unsloth's merge: on the
+    transposed weight in fp32 (W^T.addmm_(A^T, B^T)) on `device`, then cast back.
+    """
+    merged = weight.to(device, torch.float32).t()
+    merged.addmm_(lora_a.to(device, torch.float32).t(), lora_b.to(device, torch.float32).t(), alpha=scaling)
+    if not torch.isfinite(merged.abs().max()):
+        raise ValueError("Merged weight has non-finite values")
+    return merged.t().to(weight.dtype).cpu().contiguous()
+
+
+def _write_config(base_dir, output_dir, dtype):
+    """The base config with the merged weights' dtype."""
+    with open(os.path.join(base_dir, "config.json")) as f:
+        config = json.load(f)
+    name = str(dtype).removeprefix("torch.")
+    for key in ("torch_dtype", "dtype"):
+        if key in config:
+            config[key] = name
+    config.setdefault("torch_dtype", name)
+    with open(os.path.join(output_dir, "config.json"), 'w') as f:
+        json.dump(config, f, indent=2)
+
+
+def merge_lora_shards(adapter_path, output_dir, base=None, device=None, dtype=None):
+    """
+    Stream the base model's shards through the LoRA merge into `output_dir`:
+    the same shard layout, an updated index, the base config and the adapter's tokenizer.
+
+    Args:
+        adapter_path: Saved PEFT adapter folder
+        output_dir: Where the merged model is written
+        base: Base model folder or hub id (defaults to the adapter's `base_model_name_or_path`)
+        device: Where deltas are computed (defaults to CUDA if available, as Unsloth merges on the GPU)
+        dtype: Output dtype (defaults to the dtype recorded with the adapter, i.e. the training dtype)
+
+    Returns:
+        dict: Shards, merged tensors, seconds and peak RSS of the merge
+    """
+    device = device or ("cuda" if torch.cuda.is_available() else "cpu")
+    dtype = dtype or training_dtype(adapter_path)
+    base_dir = resolve_base_dir(base or _adapter_config(adapter_path)["base_model_name_or_path"])
+    shards, weight_map = weight_shards(base_dir)
+    deltas = lora_deltas(adapter_path)
+    missing = set(deltas) - set(weight_map)
+    if missing:
+        raise ValueError(f"Adapter targets weights missing from {base_dir}: {sorted(missing)[:5]}")
+
+    os.makedirs(output_dir, exist_ok=True)
+    start, merged, total_size = time.perf_counter(), 0, 0
+    for shard in shards:
+        tensors = {}
+        with safe_open(os.path.join(base_dir, shard), framework="pt") as f:
+            metadata = f.metadata()
+            for name in f.keys():
+                tensor = f.get_tensor(name)
+                if tensor.is_floating_point():
+                    # The trained model holds (and save_pretrained_merged writes) every weight in the training dtype
+                    tensor = tensor.to(dtype)
+                if name in deltas:
+                    tensor = merge_lora_weight(tensor, *deltas[name], device=device)
+                    merged += 1
+                tensors[name] = tensor
+                total_size += tensor.numel() * tensor.element_size()
+        save_file(tensors, os.path.join(output_dir, shard), metadata=metadata or {"format": "pt"})
+        del tensors
+        print(f"   🧩 {shard} merged ({merged}/{len(deltas)} LoRA weights so far)")
+
+    if len(shards) > 1:
+        with open(os.path.join(output_dir, SAFETENSORS_INDEX_FILE), 'w') as f:
+            json.dump({"metadata": {"total_size": total_size}, "weight_map": weight_map}, f, indent=2)
+    _write_config(base_dir, output_dir, dtype)
+    if os.path.exists(os.path.join(base_dir, "generation_config.json")):
+        shutil.copyfile(os.path.join(base_dir, "generation_config.json"), os.path.join(output_dir, "generation_config.json"))
+    # The trained tokenizer is saved with the adapter
+    for name in _TOKENIZER_FILES:
+        if os.path.exists(os.path.join(adapter_path, name)):
+            shutil.copyfile(os.path.join(adapter_path, name), os.path.join(output_dir, name))
+
+    return {"shards": len(shards), "merged_weights": merged, "seconds": time.perf_counter() - start,
+            "peak_rss_mb": _peak_rss_mb()}
+
+
+def merge_version(model_path, device=None):
+    """
+    Write the merged 16-bit weights of an adapter-only model version into its
+    folder (no-op for merged versions, hub ids and plain model folders).
+
+    An adapter trained on an adapter-only version is merged after that version.
+    The weights are written to a temporary folder and moved in with
+    `config.json` last, so a half-written merge is never taken for a merged version.
+
+    Returns:
+        str: model_path
+    """
+    if not os.path.isdir(model_path) or _is_merged(model_path):
+        return model_path
+    adapter_path = os.path.join(model_path, cfg.ADAPTER_SUBDIR)
+    if not os.path.exists(os.path.join(adapter_path, "adapter_config.json")):
+        raise FileNotFoundError(f"{model_path} has neither merged weights nor a LoRA adapter")
+
+    base = adapter_base(model_path)
+    if base and os.path.isdir(base):
+        merge_version(base, device)
+
+    print("\n" + "="*80)
+    print(f"🔀 MERGING THE ADAPTER OF {model_path} INTO {base} (shard by shard)")
+    print("="*80)
+
+    tmp_path = f"{model_path.rstrip(os.sep)}.merging"
+    shutil.rmtree(tmp_path, ignore_errors=True)
+    stats = merge_lora_shards(adapter_path, tmp_path, base=base, device=device)
+
+    merged_bytes = folder_size(tmp_path)
+    for name in sorted(os.listdir(tmp_path), key=lambda name: name == "config.json"):
+        os.replace(os.path.join(tmp_path, name), os.path.join(model_path, name))
+    os.rmdir(tmp_path)
+    print(f"✅ Merged weights ({merged_bytes / 2**20:.0f} MB, {stats['shards']} shard(s)) written to {model_path} "
+          f"in {stats['seconds']:.1f}s, peak RSS {stats['peak_rss_mb']:.0f} MB")
+    return model_path
+
+
+def verify_merge(model_dir, reference_dir):
+    """
+    Compare two merged models tensor by tensor (streamed, one tensor of each at a time).
+
+    Returns:
+        list: Names of tensors that are missing on either side or not bit-identical
+    """
+    _, weight_map = weight_shards(model_dir)
+    _, reference_map = weight_shards(reference_dir)
+    mismatched = sorted(set(weight_map) ^ set(reference_map))
+    for name in sorted(set(weight_map) & set(reference_map)):
+        with safe_open(os.path.join(model_dir, weight_map[name]), framework="pt") as f:
+            tensor = f.get_tensor(name)
+        with safe_open(os.path.join(reference_dir, reference_map[name]), framework="pt") as f:
+            reference = f.get_tensor(name)
+        if tensor.dtype != reference.dtype or not torch.equal(tensor, reference):
+            mismatched.append(name)
+    print(f"🔍 {len(reference_map) - len(mismatched)}/{len(reference_map)} tensors bit-identical to {reference_dir}")
+    return mismatched
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Merge a version's LoRA adapter into 16-bit weights, one shard at a time.")
+    parser.add_argument("--model-path", required=True, help="Adapter-only model version folder")
+    parser.add_argument("--output-dir", default=None, help="Write the merged model here instead of into the version folder")
+    parser.add_argument("--device", default=None, help="cpu / cuda (defaults to cuda if available, like Unsloth)")
+    parser.add_argument("--verify", default=None, metavar="REFERENCE_DIR",
+                        help="Check the result is bit-identical to a reference merge (e.g. a save_pretrained_merged folder)")
+    args = parser.parse_args()
+
+    if args.output_dir:
+        base = adapter_base(args.model_path)
+        if base and os.path.isdir(base):
+            merge_version(base, args.device)
+        stats = merge_lora_shards(os.path.join(args.model_path, cfg.ADAPTER_SUBDIR), args.output_dir, base=base,
+                                  device=args.device)
+        print(f"✅ Merged {stats['merged_weights']} LoRA weights ({stats['shards']} shard(s)) into {args.output_dir} "
+              f"in {stats['seconds']:.1f}s, peak RSS {stats['peak_rss_mb']:.0f} MB")
+        merged_dir = args.output_dir
+    else:
+        merged_dir = merge_version(args.model_path, args.device)
+
+    if args.verify and verify_merge(merged_dir, args.verify):
+        print(f"❌ {merged_dir} differs from {args.verify}")
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
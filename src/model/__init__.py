@@ -1,4 +1,20 @@
-from .loader import load_base_model, load_validator_model, load_final_model
-from .lora_config import setup_lora
+import importlib
 
-__all__ = ['load_base_model', 'load_validator_model', 'load_final_model', 'setup_lora']
\ No newline at end of file
+# Loaded on first use: `loader` / `lora_config` import Unsloth (GPU only), the
+# rest of the codebase (training helpers, serving) must import without it
+_EXPORTS = {
+    'load_base_model': 'loader', 'load_training_model': 'loader', 'load_validator_model': 'loader',
+    'load_final_model': 'loader', 'load_resident_model': 'loader', 'to_inference_mode': 'loader',
+    'to_training_mode': 'loader', 'setup_lora': 'lora_config',
+    'save_adapter': 'adapter_loader', 'save_optimizer_state': 'adapter_loader', 'resumable_adapter': 'adapter_loader',
+    'model_load_path': 'adapter_loader', 'load_adapter_version': 'adapter_loader',
+    'unload_adapter_version': 'adapter_loader',
+}
+
+__all__ = list(_EXPORTS)
+
+
+def __getattr__(name):
+    if name not in _EXPORTS:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    return getattr(importlib.import_module(f".{_EXPORTS[name]}", __name__), name)
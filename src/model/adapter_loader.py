@@ -0,0 +1,125 @@
+"""
+Adapter Loader
+Loads and swaps LoRA adapter versions on top of a resident base model
+"""
+
+import os
+import json
+from config import model_config as cfg
+
+
+def adapter_dir(model_path):
+    """Folder holding the LoRA adapter of a saved model version."""
+    return os.path.join(model_path, cfg.ADAPTER_SUBDIR)
+
+
+def has_adapter(model_path):
+    return os.path.exists(os.path.join(adapter_dir(model_path), "adapter_config.json"))
+
+
+def has_merged_weights(model_path):
+    """True if a model version folder holds full (merged) weights, not only its adapter."""
+    return os.path.exists(os.path.join(model_path, "config.json"))
+
+
+def model_load_path(model_path):
+    """
+    What to load a model version from: its merged weights or, for an
+    adapter-only version (merge deferred, see `cfg.MERGE_VERSIONS`), its adapter
+    folder, which Unsloth loads on top of the adapter's base model.
+    Hub ids and other plain model folders are returned unchanged.
+    """
+    if os.path.isdir(model_path) and not has_merged_weights(model_path) and has_adapter(model_path):
+        return adapter_dir(model_path)
+    return model_path
+
+
+def save_adapter(model, tokenizer, model_path):
+    """
+    Save only the LoRA weights (a few MB) next to a model version.
+
+    Returns:
+        str: The adapter folder
+    """
+    path = adapter_dir(model_path)
+    model.save_pretrained(path)
+    tokenizer.save_pretrained(path)
+    # What save_pretrained_merged would write: the merge reproduces it later (src.export.shard_merge)
+    dtype = str(model.get_input_embeddings().weight.dtype).removeprefix("torch.")
+    with open(os.path.join(path, cfg.ADAPTER_DTYPE_FILE), 'w') as f:
+        json.dump({"dtype": dtype}, f)
+    print(f"LoRA adapter saved to {path}")
+    return path
+
+
+def optimizer_state_file(model_path):
+    """Optimizer state of the run that trained a version's adapter (saved next to it)."""
+    return os.path.join(adapter_dir(model_path), cfg.OPTIMIZER_STATE_FILE)
+
+
+def save_optimizer_state(trainer, model_path):
+    """Keep the trained adapter's optimizer moments so the next run can continue from them."""
+    import torch
+
+    path = optimizer_state_file(model_path)
+    torch.save(trainer.optimizer.state_dict(), path)
+    print(f"Optimizer state saved to {path}")
+    return path
+
+
+def resumable_adapter(model_path):
+    """
+    The adapter folder of `model_path` if continual training can resume from it, else None.
+
+    The adapter must use the current LoRA settings (Unsloth refuses to re-wrap
+    it otherwise) and, in "adapter" serving mode, sit on the base model. Adapter
+    serving mode continues even without `cfg.CONTINUAL_TRAINING`: its versions
+    are all adapters over the base model, there are no merged weights to stack on.
+    """
+    if not (cfg.CONTINUAL_TRAINING or cfg.SERVING_MODE == "adapter") or not has_adapter(model_path):
+        return None
+    with open(os.path.join(adapter_dir(model_path), "adapter_config.json")) as f:
+        adapter_config = json.load(f)
+
+    base = adapter_config.get("base_model_name_or_path")
+    same_lora = (adapter_config.get("r") == cfg.LORA_R and adapter_config.get("lora_alpha") == cfg.LORA_ALPHA
+                 and set(adapter_config.get("target_modules") or []) == set(cfg.LORA_TARGET_MODULES))
+    if not same_lora:
+        print(f"⚠️ Adapter of {model_path} uses different LoRA settings. Starting a fresh adapter.")
+        return None
+    if cfg.SERVING_MODE == "adapter" and base != cfg.BASE_MODEL_ID:
+        print(f"⚠️ Adapter of {model_path} was trained on {base}, not the served base model. Starting a fresh adapter.")
+        return None
+    if os.path.isabs(base or "") and not os.path.exists(base):
+        print(f"⚠️ Base model {base} of the adapter of {model_path} is gone. Starting a fresh adapter.")
+        return None
+    return adapter_dir(model_path)
+
+
+def load_adapter_version(model, model_path, adapter_name):
+    """
+    Load a version's adapter onto the resident base model and make it active.
+
+    Args:
+        model: The base model, or a PeftModel that already holds other adapters
+        model_path: Saved model version (its adapter lives in `adapter_dir(model_path)`)
+        adapter_name: Name to register the adapter under (e.g. "v3")
+
+    Returns:
+        PeftModel: The model with `adapter_name` active
+    """
+    from peft import PeftModel
+
+    path = adapter_dir(model_path)
+    if isinstance(model, PeftModel):
+        model.load_adapter(path, adapter_name=adapter_name)
+    else:
+        model = PeftModel.from_pretrained(model, path, adapter_name=adapter_name)
+    model.set_adapter(adapter_name)
+    return model
+
+
+def unload_adapter_version(model, adapter_name):
+    """Drop an adapter that is no longer served (frees its GPU memory)."""
+    if adapter_name in getattr(model, "peft_config", {}):
+        model.delete_adapter(adapter_name)
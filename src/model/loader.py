@@ -3,9 +3,13 @@ Model Loader
 Loads the base Qwen2 model using Unsloth with dynamic path support
 """
 
+import os
 import torch
 from unsloth import FastLanguageModel
 from config import model_config as cfg
+from src.model.lora_config import setup_lora
+from src.training.distributed import device_map
+from src.model.adapter_loader import resumable_adapter, optimizer_state_file, model_load_path
 
 
 def load_base_model():
@@ -24,12 +28,87 @@ def load_base_model():
         max_seq_length=cfg.MAX_SEQ_LENGTH,
         dtype=cfg.DTYPE,
         load_in_4bit=cfg.LOAD_IN_4BIT,
+        device_map=device_map(),  # One replica per GPU in a data-parallel run
     )
 
     print("\nBase model loaded successfully.")
     return model, tokenizer
 
 
+def load_training_model(model_path=cfg.CURRENT_CHATBOT_PATH, dtype=cfg.DTYPE):
+    """
+    Load the model to fine-tune, with its LoRA adapter.
+
+    With `cfg.CONTINUAL_TRAINING` the adapter of the previous version
+    (`model_path`) is loaded trainable on top of the model it was trained on,
+    and its optimizer state is handed back, so the run only has to absorb the
+    new facts. Otherwise (or on the first run) a fresh adapter is put on the base model.
+
+    Returns:
+        tuple: (model, tokenizer, optimizer state file or None)
+    """
+    resume_from = resumable_adapter(model_path)
+    if resume_from is None:
+        model, tokenizer = load_base_model()
+        return setup_lora(model), tokenizer, None
+
+    print("\n" + "="*80)
+    print(f"🔁 CONTINUAL TRAINING: RESUMING THE ADAPTER OF {model_path}...")
+    print("="*80)
+
+    # Unsloth loads the adapter's own base model and keeps the LoRA weights trainable
+    model, tokenizer = FastLanguageModel.from_pretrained(
+        model_name=resume_from,
+        max_seq_length=cfg.MAX_SEQ_LENGTH,
+        dtype=dtype,
+        load_in_4bit=cfg.LOAD_IN_4BIT,
+        device_map=device_map(),
+    )
+    model = setup_lora(model)  # Same LoRA settings: Unsloth keeps the loaded adapter
+
+    state_file = optimizer_state_file(model_path)
+    return model, tokenizer, state_file if os.path.exists(state_file) else None
+
+
+def load_resident_model(model_path=cfg.CURRENT_CHATBOT_PATH):
+    """
+    Load the current chatbot model once for the whole pipeline (`cfg.RESIDENT_MODEL`).
+
+    The model is loaded the way training needs it (`load_training_model`, LoRA
+    attached and trainable) and switched to inference mode for validation. This
+    is the same model the validator would load as long as training starts from
+    the current chatbot model: its resumable adapter, or a fresh adapter
+    (zero-initialized, so a no-op) on the base model.
+
+    Returns:
+        tuple: (model, tokenizer, optimizer state file or None), or None if
+        training would start from a different model (load per phase instead)
+    """
+    if resumable_adapter(model_path) is None and model_path != cfg.BASE_MODEL_ID:
+        print(f"⚠️ Training would not start from {model_path}. Loading the model per phase.")
+        return None
+
+    print("\n" + "="*80)
+    print(f"🧠 LOADING RESIDENT MODEL {model_path} (VALIDATION, TRAINING AND TESTING)...")
+    print("="*80)
+
+    model, tokenizer, optimizer_state = load_training_model(model_path)
+    FastLanguageModel.for_inference(model)
+    return model, tokenizer, optimizer_state
+
+
+def to_inference_mode(model):
+    """Switch a resident model to generation (eval mode, Unsloth's fast inference path)."""
+    FastLanguageModel.for_inference(model)
+    return model
+
+
+def to_training_mode(model):
+    """Switch a resident model back to training (train mode, gradient checkpointing)."""
+    FastLanguageModel.for_training(model)
+    return model
+
+
 def load_validator_model():
     """
     Load the current chatbot model for validation (can be base or fine-tuned).
@@ -45,7 +124,7 @@ def load_validator_model():
 
     print(f"Loading fine-tuned model: {cfg.CURRENT_CHATBOT_PATH}")
     validator_model, validator_tokenizer = FastLanguageModel.from_pretrained(
-        model_name=cfg.CURRENT_CHATBOT_PATH,
+        model_name=model_load_path(cfg.CURRENT_CHATBOT_PATH),
         max_seq_length=cfg.MAX_SEQ_LENGTH,
         dtype=cfg.DTYPE,
         load_in_4bit=cfg.LOAD_IN_4BIT,
@@ -70,9 +149,9 @@ def load_final_model(model_path):
     print(f"CELL 11: LOADING SAVED MODEL FROM {model_path} AND TESTING...")
     print("="*80)
 
-    # Reload the saved model
+    # Reload the saved model (an adapter-only version loads its adapter over its base model)
     final_model, final_tokenizer = FastLanguageModel.from_pretrained(
-        model_name=model_path,
+        model_name=model_load_path(model_path),
         max_seq_length=cfg.MAX_SEQ_LENGTH,
         dtype=cfg.DTYPE,
         load_in_4bit=cfg.LOAD_IN_4BIT,
@@ -105,7 +184,7 @@ def ask_model(question, model, tokenizer):
         add_generation_prompt=True
     )
 
-    inputs = tokenizer(prompt, return_tensors="pt").to("cuda")
+    inputs = tokenizer(prompt, return_tensors="pt").to(model.device)
 
     with torch.no_grad():
         outputs = model.generate(
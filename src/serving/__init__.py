@@ -0,0 +1,10 @@
+"""
+Serving Module
+Model serving, web API and background training shared by Modal and the local server
+"""
+from .storage import LocalStorage, VolumeStorage
+from .training_writer import BufferedTrainingWriter
+from .training_coordinator import TrainingCoordinator
+from .model_service import ModelService
+
+__all__ = ['LocalStorage', 'VolumeStorage', 'BufferedTrainingWriter', 'TrainingCoordinator', 'ModelService']
@@ -0,0 +1,67 @@
+"""
+Merge Job
+Deferred merge of adapter-only model versions, shared by the Modal `merge_job`
+and the local training process (`cfg.MERGE_VERSIONS = "background"`)
+"""
+
+import os
+import sys
+import argparse
+import subprocess
+from config import model_config as cfg
+from src.serving.storage import LocalStorage
+from src.serving.rollouts import RolloutLog
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def merge_job(storage, model_path=None):
+    """
+    Write the merged weights of a model version next to its adapter.
+
+    Args:
+        storage: LocalStorage / VolumeStorage holding the model versions
+        model_path: Version folder to merge (defaults to the latest version that was not rolled back)
+
+    Returns:
+        dict: Status and model path (None if there is no trained version yet)
+    """
+    from src.export.shard_merge import merge_version
+
+    storage.reload()
+    if model_path is None:
+        model_path, version = RolloutLog(storage).serving_model_info()
+        if version == 0:
+            print("⚠️ No trained version to merge yet.")
+            return
+    merge_version(model_path)
+    storage.commit()
+    return {"status": "success", "model_path": model_path}
+
+
+def launch_local_merge(storage, model_path):
+    """
+    Start `merge_job` in a separate local process (the local stand-in for `merge_job.spawn()`).
+
+    Returns:
+        subprocess.Popen: Handle of the merge process
+    """
+    print(f"🚀 Launching background merge of {model_path}...")
+    return subprocess.Popen(
+        [sys.executable, "-m", "src.serving.merge_job", "--storage-dir", os.path.abspath(storage.root),
+         "--model-path", os.path.abspath(model_path)],
+        cwd=PROJECT_ROOT,
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Write the merged weights of an adapter-only model version.")
+    parser.add_argument("--storage-dir", default=cfg.LOCAL_STORAGE_DIR, help="Directory holding model versions")
+    parser.add_argument("--model-path", default=None, help="Version folder to merge (defaults to the latest version)")
+    args = parser.parse_args()
+
+    merge_job(LocalStorage(args.storage_dir), args.model_path)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,509 @@
+"""
+Model Service
+Serving logic for the chatbot: load, hot-swap, generate, validate and trigger training.
+Runs the 'run_interactive_validation.py' cycle silently on every chat request.
+"""
+
+import time
+import threading
+import contextlib
+import torch
+from collections import namedtuple
+from config import model_config as cfg
+from src.serving.traffic_router import TrafficRouter
+from src.serving.rollouts import RolloutLog
+from src.serving.training_writer import BufferedTrainingWriter
+from src.serving.training_coordinator import TrainingCoordinator
+from src.serving.version_watcher import VersionWatcher
+
+# Model-loading imports (unsloth, src.model) stay inside methods: this module is
+# also imported by the GPU-less web container.
+
+# Everything a request needs from the served model, swapped as one reference
+ActiveModel = namedtuple("ActiveModel", ["model", "tokenizer", "path", "version"])
+
+
+class ModelService:
+    """
+    Serves one model and runs the hidden validation cycle.
+
+    Used by the Modal `ModelService` class (Volume storage, `train_job.spawn`)
+    and by the local server (local directory, local training process).
+
+    Serving modes (`cfg.SERVING_MODE`):
+        "merged":  every version is a full merged model, reloaded on swap
+        "adapter": the base model stays resident, only LoRA adapters are swapped
+
+    In adapter mode a new version first runs as a canary next to the stable
+    version (`cfg.CANARY_TRAFFIC_FRACTION` of traffic) and is promoted or
+    rolled back automatically by the TrafficRouter. Decisions are shared
+    through the storage (RolloutLog): every container adopts the first one
+    recorded, and a rolled-back version is skipped by new containers and by
+    train_job.
+    """
+
+    def __init__(self, storage, launch_training, serving_mode=cfg.SERVING_MODE):
+        """
+        Args:
+            storage: LocalStorage / VolumeStorage holding model versions and training data
+            launch_training: Callable that runs the training job for a recorded trigger
+                and returns when it is done (it is called from a background thread)
+            serving_mode: "merged" or "adapter"
+        """
+        self.storage = storage
+        self.launch_training = launch_training
+        self.coordinator = TrainingCoordinator(storage)
+        self.serving_mode = serving_mode
+        self.active = None
+        self.canary = None
+        self.router = TrafficRouter()
+        self.rollouts = RolloutLog(storage)
+        self.last_swap = None
+        self.cycle_count = 0
+        self.correct_answers = 0
+        # Adapter switches change the weights of the shared model in place,
+        # so they must not interleave with a request that is generating
+        self._model_lock = threading.Lock()
+        self.watcher = VersionWatcher(storage, on_new_version=self.hot_swap)
+        # Validated samples are group-committed instead of one volume commit per request
+        self.writer = BufferedTrainingWriter(storage)
+
+    @property
+    def current_version(self):
+        return self.active.version if self.active else 0
+
+    @property
+    def current_model_path(self):
+        return self.active.path if self.active else cfg.BASE_MODEL_ID
+
+    def get_latest_model_info(self):
+        """Latest model version that was not rolled back."""
+        self.storage.reload()
+        return self.rollouts.serving_model_info()
+
+    def _load_model(self, model_path):
+        from unsloth import FastLanguageModel
+        from src.model.adapter_loader import model_load_path
+
+        # FIX: dtype=None allows auto-detection (T4->FP16, A10G->BF16)
+        # Versions whose merge is deferred load as their adapter over its base model
+        model, tokenizer = FastLanguageModel.from_pretrained(
+            model_name=model_load_path(model_path),
+            max_seq_length=cfg.MAX_SEQ_LENGTH,
+            dtype=None,
+            load_in_4bit=cfg.LOAD_IN_4BIT,
+        )
+        FastLanguageModel.for_inference(model)
+        return model, tokenizer
+
+    def _load_adapter(self, model, model_path, version):
+        from unsloth import FastLanguageModel
+        from src.model.adapter_loader import load_adapter_version
+
+        model = load_adapter_version(model, model_path, adapter_name=f"v{version}")
+        FastLanguageModel.for_inference(model)
+        return model
+
+    def _measure_swap(self, version, load):
+        """Run `load()` and record its wall time and peak GPU memory in `self.last_swap`."""
+        if torch.cuda.is_available():
+            torch.cuda.reset_peak_memory_stats()
+        start = time.perf_counter()
+
+        result = load()
+
+        seconds = time.perf_counter() - start
+        peak_gb = torch.cuda.max_memory_allocated() / 1024**3 if torch.cuda.is_available() else None
+        self.last_swap = {
+            "mode": self.serving_mode,
+            "version": version,
+            "seconds": round(seconds, 3),
+            "peak_gpu_memory_gb": round(peak_gb, 3) if peak_gb is not None else None,
+        }
+        print(f"⏱️ Swap to v{version} ({self.serving_mode}): {seconds:.2f}s, peak GPU memory: "
+              f"{'n/a' if peak_gb is None else f'{peak_gb:.2f} GB'}")
+        return result
+
+    def initialize(self):
+        from src.model.adapter_loader import has_adapter
+
+        model_path, version = self.get_latest_model_info()
+
+        if self.serving_mode == "adapter" and version > 0 and not has_adapter(model_path):
+            print(f"⚠️ v{version} has no LoRA adapter. Falling back to merged serving mode.")
+            self.serving_mode = "merged"
+
+        print(f"🔄 Initializing Model: {model_path} (v{version}, {self.serving_mode} mode)")
+
+        # Try to load the model with fallback to base model if it fails
+        try:
+            if self.serving_mode == "adapter":
+                model, tokenizer = self._load_model(cfg.BASE_MODEL_ID)
+                if version > 0:
+                    model = self._load_adapter(model, model_path, version)
+            else:
+                model, tokenizer = self._load_model(model_path)
+            self.active = ActiveModel(model, tokenizer, model_path, version)
+            print(f"✅ Successfully loaded model v{version}")
+
+        except Exception as e:
+            print(f"❌ Error loading model v{version}: {e}")
+            print(f"⚠️ Falling back to base model: {cfg.BASE_MODEL_ID}")
+
+            # Load base model as fallback
+            model, tokenizer = self._load_model(cfg.BASE_MODEL_ID)
+            self.active = ActiveModel(model, tokenizer, cfg.BASE_MODEL_ID, 0)
+            print(f"✅ Base model loaded successfully")
+
+        self.cycle_count = 0
+        self.correct_answers = 0
+        self.router.set_stable(self.active.version)
+
+        # New versions are picked up in the background from now on
+        self.watcher.start(current_version=version)
+        self.writer.start()
+
+        print("✅ System Ready!")
+
+    def shutdown(self):
+        """Stop background threads and flush buffered training data."""
+        self.watcher.stop()
+        self.writer.stop()
+        self.writer.flush(reason="shutdown")
+
+    def hot_swap(self, latest_path, latest_ver):
+        """
+        Hot-swap model reload: Keeps old model running while loading new one.
+        This prevents errors when requests come in during model reload.
+        Runs on the version watcher thread.
+
+        Also called when the served version (or the canary) was rolled back by
+        another container; `latest_ver` is then the version to return to.
+
+        Returns:
+            bool: True if the new version is now being served
+        """
+        if latest_ver == self.current_version:
+            # Only the canary was rolled back elsewhere
+            with self._model_lock:
+                if self.canary is not None:
+                    self.router.conclude("rollback")
+                    self._finish_canary("rollback")
+            return True
+
+        if latest_ver < self.current_version:
+            print(f"\n↩️ v{self.current_version} WAS ROLLED BACK BY ANOTHER CONTAINER. Returning to v{latest_ver}...")
+        else:
+            print(f"\n🆕 NEW MODEL DETECTED (v{latest_ver}). Starting hot-swap reload...")
+
+        if self.serving_mode == "adapter":
+            return self._swap_adapter(latest_path, latest_ver)
+
+        try:
+            # Keep references to old model (still serving requests)
+            old_version = self.current_version
+
+            print(f"📥 Loading new model v{latest_ver} (old model v{old_version} still serving)...")
+
+            # Load new model in the background
+            new_model, new_tokenizer = self._measure_swap(latest_ver, lambda: self._load_model(latest_path))
+
+            print(f"✅ New model v{latest_ver} loaded successfully!")
+
+            # Atomic swap: a single reference assignment, requests pick it up on their next read
+            self.active = ActiveModel(new_model, new_tokenizer, latest_path, latest_ver)
+            self.router.set_stable(latest_ver)
+
+            # Reset counters
+            self.cycle_count = 0
+            self.correct_answers = 0
+
+            print(f"🔄 Hot-swap complete! Now serving v{latest_ver}")
+            print(f"   Old model v{old_version} will be garbage collected")
+            return True
+
+        except Exception as e:
+            print(f"❌ Error during model reload: {e}")
+            print(f"⚠️ Continuing with old model v{self.current_version}")
+            return False
+
+    def _swap_adapter(self, latest_path, latest_ver):
+        """
+        Load only the new version's LoRA weights onto the resident base model.
+        With canary routing enabled the stable adapter stays loaded next to it.
+        """
+        from src.model.adapter_loader import has_adapter, unload_adapter_version
+
+        if latest_ver == 0 and self.current_version > 0:
+            # Rolled back to the base model: just drop the served adapter
+            with self._model_lock:
+                stable = self.active
+                unload_adapter_version(stable.model, f"v{stable.version}")
+                self.active = ActiveModel(stable.model, stable.tokenizer, latest_path, 0)
+                self.router.set_stable(0)
+            print("🔄 Now serving the base model v0")
+            return True
+
+        if not has_adapter(latest_path):
+            print(f"⚠️ v{latest_ver} has no LoRA adapter at {latest_path}. Continuing with v{self.current_version}")
+            return False
+
+        stable = self.active
+        # A rollback to an older version switches at once
+        use_canary = self.router.canary_fraction > 0 and latest_ver > stable.version
+        try:
+            with self._model_lock:
+                model = self._measure_swap(
+                    latest_ver, lambda: self._load_adapter(stable.model, latest_path, latest_ver)
+                )
+                new_entry = ActiveModel(model, stable.tokenizer, latest_path, latest_ver)
+
+                if use_canary:
+                    stable = stable._replace(model=model)
+                    self.active = stable
+                    replaced = self.router.start_canary(latest_ver)
+                    if replaced is not None:
+                        unload_adapter_version(model, f"v{replaced}")
+                        print(f"   Canary v{replaced} replaced by v{latest_ver} before a decision")
+                    self.canary = new_entry
+                else:
+                    if stable.version > 0:
+                        unload_adapter_version(model, f"v{stable.version}")
+                    self.active = new_entry
+                    self.router.set_stable(latest_ver)
+
+            if use_canary:
+                print(f"🐤 Canary v{latest_ver} loaded: {self.router.canary_fraction:.0%} of traffic, "
+                      f"v{stable.version} keeps the rest")
+            else:
+                self.cycle_count = 0
+                self.correct_answers = 0
+                print(f"🔄 Adapter hot-swap complete! Now serving v{latest_ver} (base model stayed resident)")
+            return True
+
+        except Exception as e:
+            print(f"❌ Error during adapter swap: {e}")
+            print(f"⚠️ Continuing with v{self.current_version}")
+            unload_adapter_version(stable.model, f"v{latest_ver}")
+            return False
+
+    def _use_version(self, entry):
+        """
+        Make `entry`'s adapter the active one on the shared model.
+
+        In merged mode every version is its own model (an adapter-only version is
+        a PeftModel whose single adapter is "default"), so there is nothing to switch.
+
+        Returns:
+            A context manager to generate under (disables adapters for the base version)
+        """
+        if self.serving_mode != "adapter" or not hasattr(entry.model, "peft_config"):
+            return contextlib.nullcontext()
+        if entry.version == 0:
+            return entry.model.disable_adapter()
+        entry.model.set_adapter(f"v{entry.version}")
+        return contextlib.nullcontext()
+
+    @contextlib.contextmanager
+    def _model_for(self, entry):
+        """
+        Hold the model lock with `entry`'s adapter active (for judge / augmentation calls).
+
+        Yields:
+            bool: False if the version was unloaded meanwhile (e.g. a rolled-back canary)
+        """
+        with self._model_lock:
+            peft_config = getattr(entry.model, "peft_config", None) if self.serving_mode == "adapter" else None
+            if peft_config is not None and entry.version > 0 and f"v{entry.version}" not in peft_config:
+                yield False
+                return
+            with self._use_version(entry):
+                yield True
+
+    def _apply_canary_decision(self):
+        """
+        Promote or roll back the canary: adopt a decision another container
+        already recorded, otherwise decide once the router has enough judged
+        requests and record it for everyone. Called under the model lock.
+        """
+        canary = self.canary
+        if canary is None:
+            return
+
+        shared = self.watcher.decisions.get(canary.version)
+        if shared is not None:
+            decision, version = shared["decision"], self.router.conclude(shared["decision"])
+            print(f"📣 Adopting the {decision} of canary v{version} recorded by another container")
+        else:
+            decision, version = self.router.evaluate()
+            if decision is None:
+                return
+            stable = self.active
+            self.rollouts.record(version, decision, stable.path, stable.version)
+
+        self._finish_canary(decision)
+
+    def _finish_canary(self, decision):
+        """Serve the canary at 100% (promote) or unload it (rollback)."""
+        from src.model.adapter_loader import unload_adapter_version
+
+        stable, canary = self.active, self.canary
+        version = canary.version
+        self.canary = None
+        if decision == "promote":
+            if stable.version > 0:
+                unload_adapter_version(stable.model, f"v{stable.version}")
+            self.active = canary
+            self.cycle_count = 0
+            self.correct_answers = 0
+            print(f"🏆 CANARY v{version} PROMOTED. Now serving 100% of traffic.")
+        else:
+            unload_adapter_version(canary.model, f"v{version}")
+            print(f"↩️ CANARY v{version} ROLLED BACK. v{stable.version} keeps serving 100% of traffic.")
+
+    def _run_training(self):
+        """
+        Record a trigger and run the training job to completion, then wake the watcher
+        for an immediate reload. A job queued behind a run in progress finds its trigger
+        already consumed by the next run and exits at once.
+        """
+        try:
+            self.coordinator.request()
+            self.launch_training()
+        except Exception as e:
+            print(f"❌ Training job failed: {e}")
+        finally:
+            self.watcher.notify()
+
+    def save_to_training_file(self, question, answer, is_stable, active=None):
+        num_samples = cfg.NUM_SAMPLES_STABLE if is_stable else cfg.NUM_SAMPLES_NEW
+
+        from src.data.generator import create_training_samples
+
+        active = active or self.active
+        entries = create_training_samples(question, answer, num_samples, active.model, active.tokenizer, active.version,
+                                          verdict="stable" if is_stable else "outdated",
+                                          # Shared by every container through the storage
+                                          cache_dir=self.storage.path(cfg.AUGMENTATION_CACHE_DIR))
+        # Compaction keeps only the latest judgement of each question
+        judged_at = time.time()
+        for e in entries:
+            e["judged_at"] = judged_at
+
+        self.writer.write(entries)
+        print(f"💾 Buffered {num_samples} samples (Stable: {is_stable}, {self.writer.pending} records pending)")
+
+    def _generate(self, question, active):
+        messages = [{"role": "user", "content": question}]
+        prompt = active.tokenizer.apply_chat_template(messages, tokenize=False, add_generation_prompt=True)
+        inputs = active.tokenizer(prompt, return_tensors="pt").to(active.model.device)
+
+        with torch.no_grad():
+            outputs = active.model.generate(
+                **inputs,
+                max_new_tokens=cfg.GENERATION_MAX_NEW_TOKENS,
+                temperature=cfg.GENERATION_TEMPERATURE,
+                do_sample=cfg.GENERATION_DO_SAMPLE
+            )
+
+        generated_ids = outputs[0][len(inputs.input_ids[0]):]
+        return active.tokenizer.decode(generated_ids, skip_special_tokens=True).strip()
+
+    def _validate(self, question, model_answer, active):
+        """
+        Judge the answer against the web and save the training samples.
+
+        Returns:
+            bool or None: True if correct, False if outdated, None if the judge was skipped
+        """
+        from src.validator.web_search import get_web_answer
+        from src.validator.llm_judge import get_clean_fact_from_web, is_answer_outdated_llm_judge
+
+        # Network I/O: other requests and hot-swaps keep using the model meanwhile
+        web_context = get_web_answer(question)
+        if not web_context:
+            print("⚠️ Judge Skipped: No web results.")
+            return None
+
+        # The judge and sample generation run on the served model: only they take the model lock
+        with self._model_for(active) as loaded:
+            if not loaded:
+                print(f"⚠️ Judge Skipped: v{active.version} was unloaded.")
+                return None
+
+            extracted_fact = get_clean_fact_from_web(web_context, question, active.model, active.tokenizer)
+            if "[NO_ANSWER]" in extracted_fact:
+                print("⚠️ Judge Skipped: Fact extraction failed.")
+                return None
+
+            is_outdated = is_answer_outdated_llm_judge(model_answer, extracted_fact, active.model, active.tokenizer)
+            if is_outdated:
+                print(f"❌ RESULT: OUTDATED/INCORRECT -> Saving new fact: {extracted_fact}")
+                self.save_to_training_file(question, extracted_fact, is_stable=False, active=active)
+                return False
+
+            print(f"✅ RESULT: CORRECT/STABLE -> Saving reinforcement.")
+            self.save_to_training_file(question, model_answer, is_stable=True, active=active)
+            return True
+
+    def generate_answer(self, question):
+        print("\n" + "-"*50)
+        print(f"❓ User asked: {question}")
+        print(f"📊 Cycle Progress: {self.cycle_count + 1}/{cfg.VALIDATION_CYCLE_SIZE}")
+
+        with self._model_lock:
+            # 1. Route: stable version, or the canary for its share of traffic
+            version = self.router.route()
+            canary = self.canary
+            active = canary if canary is not None and canary.version == version else self.active
+
+            with self._use_version(active):
+                # 2. Generate
+                start = time.perf_counter()
+                model_answer = self._generate(question, active)
+                latency = time.perf_counter() - start
+
+        # 3. Validation Logic (Hidden), without holding the model lock during the web search
+        is_correct = self._validate(question, model_answer, active)
+
+        with self._model_lock:
+            self.router.record(active.version, latency, is_correct)
+            self._apply_canary_decision()
+
+        # 4. Cycle Logic (a skipped judgement counts as correct)
+        self.cycle_count += 1
+        if is_correct is not False: self.correct_answers += 1
+
+        if self.cycle_count >= cfg.VALIDATION_CYCLE_SIZE:
+            print(f"\n📊 CYCLE DONE. Score: {self.correct_answers}/{cfg.VALIDATION_CYCLE_SIZE}")
+            if self.correct_answers <= cfg.TRAINING_TRIGGER_THRESHOLD:
+                print(f"🚨 SCORE <= {cfg.TRAINING_TRIGGER_THRESHOLD}. TRIGGERING TRAINING...")
+                self.cycle_count = 0
+                self.correct_answers = 0
+                # The training job must see every sample of this cycle
+                self.writer.end_cycle(keep=True)
+                threading.Thread(target=self._run_training, name="train-job", daemon=True).start()
+            else:
+                print(f"✅ SCORE > {cfg.TRAINING_TRIGGER_THRESHOLD}. NO TRAINING.")
+                self.cycle_count = 0
+                self.correct_answers = 0
+                # Only this container's samples; other containers' segments stay
+                self.writer.end_cycle(keep=False)
+
+        # 5. Return Answer
+        return {
+            "answer": model_answer,
+            "model_version": f"v{active.version}"
+        }
+
+    def model_info(self):
+        """Currently served model, for `/api/model/current`."""
+        return {
+            "model_path": self.current_model_path,
+            "model_version": f"v{self.current_version}",
+            "is_base_model": self.current_version == 0,
+            "serving_mode": self.serving_mode,
+            "last_swap": self.last_swap,
+            "traffic": self.router.snapshot(),
+            "training_writes": self.writer.snapshot(),
+        }
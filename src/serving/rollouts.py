@@ -0,0 +1,81 @@
+"""
+Canary Rollouts
+Promote / rollback decisions shared by all serving containers, new containers
+and the training job through the storage, so a rolled-back version is never
+served or trained on again.
+"""
+
+import os
+import json
+import time
+from config import model_config as cfg
+from src.serving.segments import default_writer_id
+
+
+class RolloutLog:
+    """
+    One immutable file per decision in `cfg.ROLLOUT_DIR`
+    (`v<version>-<decision>-<writer id>.json`, written under a temporary name
+    and renamed), so containers never overwrite each other's decisions.
+
+    A container adopts a decision already recorded for its canary instead of
+    evaluating its own counts. If two containers still decide a version
+    differently at the same time, the rollback wins everywhere.
+    """
+
+    def __init__(self, storage):
+        self.storage = storage
+        self.directory = storage.path(cfg.ROLLOUT_DIR)
+
+    def record(self, version, decision, stable_path, stable_version, writer_id=None):
+        """
+        Publish a decision on `version`. A rollback names the version that keeps serving.
+
+        Returns:
+            str: The decision file
+        """
+        os.makedirs(self.directory, exist_ok=True)
+        path = os.path.join(self.directory, f"v{version}-{decision}-{writer_id or default_writer_id()}.json")
+        with open(f"{path}.tmp", 'w') as f:
+            json.dump({"version": version, "decision": decision, "stable_path": stable_path,
+                       "stable_version": stable_version, "decided_at": time.time()}, f)
+        os.replace(f"{path}.tmp", path)
+        self.storage.commit()
+        return path
+
+    def decisions(self):
+        """
+        Decisions as read from the storage (call `storage.reload()` first to see other containers').
+
+        Returns:
+            dict: version -> decision record (a rollback overrides a promotion)
+        """
+        if not os.path.isdir(self.directory):
+            return {}
+        decisions = {}
+        for name in sorted(os.listdir(self.directory)):
+            if not name.endswith(".json"):
+                continue
+            with open(os.path.join(self.directory, name)) as f:
+                record = json.load(f)
+            if decisions.get(record["version"], {}).get("decision") != "rollback":
+                decisions[record["version"]] = record
+        return decisions
+
+    def resolve(self, model_path, version, decisions=None):
+        """Follow rollbacks from `version` to the version that serves in its place."""
+        decisions = self.decisions() if decisions is None else decisions
+        seen = set()
+        while decisions.get(version, {}).get("decision") == "rollback" and version not in seen:
+            seen.add(version)
+            model_path, version = decisions[version]["stable_path"], decisions[version]["stable_version"]
+        return model_path, version
+
+    def serving_model_info(self):
+        """
+        The latest model pointer with rolled-back versions skipped.
+
+        Returns:
+            tuple: (model_path, version)
+        """
+        return self.resolve(*self.storage.read_latest_model_info())
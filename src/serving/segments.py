@@ -0,0 +1,98 @@
+"""
+Training Data Segments
+Each writer (container / worker process) seals its own immutable segment files;
+`compact_segments` merges them into the training file before a training run.
+"""
+
+import os
+import json
+import socket
+from config import model_config as cfg
+from src.data.augmentation import normalize_question
+
+SEGMENT_SUFFIX = ".jsonl"
+
+
+def default_writer_id():
+    """Modal task id inside a container, otherwise host + pid (one per local worker)."""
+    return os.getenv("MODAL_TASK_ID") or f"{socket.gethostname()}-{os.getpid()}"
+
+
+def segment_dir(storage):
+    return storage.path(cfg.TRAINING_SEGMENTS_DIR)
+
+
+def write_segment(storage, writer_id, seq, records):
+    """
+    Write records to a new segment `<writer_id>-<seq>.jsonl`.
+
+    The file is written under a temporary name and renamed, so readers only
+    ever see complete segments and no two writers share a file.
+    """
+    os.makedirs(segment_dir(storage), exist_ok=True)
+    path = os.path.join(segment_dir(storage), f"{writer_id}-{seq:06d}{SEGMENT_SUFFIX}")
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'w') as f:
+        f.write("".join(json.dumps(r) + "\n" for r in records))
+    os.replace(tmp_path, path)
+    return path
+
+
+def list_segments(storage):
+    """Sealed segment paths (in-progress `.tmp` files are skipped)."""
+    directory = segment_dir(storage)
+    if not os.path.isdir(directory):
+        return []
+    return sorted(os.path.join(directory, name) for name in os.listdir(directory) if name.endswith(SEGMENT_SUFFIX))
+
+
+def _read_records(path):
+    with open(path) as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def _fact_key(record):
+    return normalize_question(record["question"]) if "question" in record else record["text"]
+
+
+def compact_segments(storage, output_file=cfg.DATA_FOR_FINETUNING_FILE):
+    """
+    Merge all sealed segments (and any earlier compaction output) into `output_file`.
+
+    Facts are deduplicated by normalized question: only the records of the latest
+    judgement (`judged_at`) of each question are kept. The output is replaced
+    atomically, then the merged segments are deleted; segments sealed after the
+    listing are left for the next compaction.
+
+    Returns:
+        tuple: (segments merged, records written)
+    """
+    storage.reload()
+    output_path = storage.path(output_file)
+    segments = list_segments(storage)
+    if not segments:
+        return 0, 0
+
+    sources = ([output_path] if os.path.exists(output_path) else []) + segments
+    latest = {}  # fact key -> (judged_at, records)
+    for path in sources:
+        for record in _read_records(path):
+            key, judged_at = _fact_key(record), record.get("judged_at", 0)
+            kept_at, kept = latest.get(key, (None, None))
+            if kept_at is None or judged_at > kept_at:
+                latest[key] = (judged_at, [record])
+            elif judged_at == kept_at and record not in kept:
+                kept.append(record)
+
+    records = [r for _, group in sorted(latest.values(), key=lambda item: item[0]) for r in group]
+    tmp_path = f"{output_path}.tmp"
+    with open(tmp_path, 'w') as f:
+        f.write("".join(json.dumps(r) + "\n" for r in records))
+    os.replace(tmp_path, output_path)
+
+    for path in segments:
+        os.remove(path)
+    storage.commit()
+
+    print(f"🗜️ Compacted {len(segments)} segment(s) into {output_path}: {len(latest)} facts, {len(records)} records")
+    return len(segments), len(records)
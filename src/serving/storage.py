@@ -0,0 +1,67 @@
+"""
+Model Storage
+Root directory for model versions and training data (local disk or Modal Volume)
+"""
+
+import os
+import json
+from config import model_config as cfg
+
+
+class LocalStorage:
+    """
+    A plain directory on the local filesystem.
+
+    Holds the same layout as the Modal Volume: model version folders,
+    the training data file and `_latest_model_config.json`.
+    """
+
+    def __init__(self, root):
+        self.root = os.path.abspath(root)
+        os.makedirs(self.root, exist_ok=True)
+
+    def path(self, *parts):
+        """Absolute path of a file inside the storage root."""
+        return os.path.join(self.root, *parts)
+
+    def reload(self):
+        """Pick up changes written by other processes (nothing to do on local disk)."""
+
+    def commit(self):
+        """Publish local changes to other processes (nothing to do on local disk)."""
+
+    def read_latest_model_info(self):
+        """
+        Read the latest model pointer.
+
+        Returns:
+            tuple: (model_path, version), falling back to the base model
+        """
+        config_file = self.path(cfg.LATEST_MODEL_CONFIG_FILE)
+        if os.path.exists(config_file):
+            try:
+                with open(config_file, 'r') as f:
+                    saved = json.load(f)
+                return saved.get("latest_model_path", cfg.BASE_MODEL_ID), saved.get("latest_version", 0)
+            except Exception as e:
+                print(f"Warning: Could not read {config_file}. Defaulting to base model. Error: {e}")
+        return cfg.BASE_MODEL_ID, 0
+
+    def write_latest_model_info(self, model_path, version):
+        """Point `_latest_model_config.json` at a new model version."""
+        with open(self.path(cfg.LATEST_MODEL_CONFIG_FILE), 'w') as f:
+            json.dump({"latest_model_path": model_path, "latest_version": version}, f)
+
+
+class VolumeStorage(LocalStorage):
+    """A Modal Volume mounted at `root`; reload/commit sync it with other containers."""
+
+    def __init__(self, volume, root):
+        self.volume = volume
+        super().__init__(root)
+
+    def reload(self):
+        self.volume.reload()
+
+    def commit(self):
+        self.volume.commit()
@@ -0,0 +1,158 @@
+"""
+Traffic Router
+Splits chat traffic between a stable and a canary model version, tracks per-version
+judge accuracy and latency, and decides when to promote or roll back the canary.
+"""
+
+import random
+import threading
+from collections import deque
+from config import model_config as cfg
+
+
+class VersionStats:
+    """Request, judge and latency counters for one served version."""
+
+    def __init__(self, latency_window=200):
+        self.requests = 0
+        self.judged = 0
+        self.correct = 0
+        self.latencies = deque(maxlen=latency_window)
+
+    @property
+    def accuracy(self):
+        return self.correct / self.judged if self.judged else None
+
+    @property
+    def median_latency(self):
+        if not self.latencies:
+            return None
+        ordered = sorted(self.latencies)
+        return ordered[len(ordered) // 2]
+
+    def as_dict(self):
+        return {
+            "requests": self.requests,
+            "judged": self.judged,
+            "accuracy": round(self.accuracy, 3) if self.accuracy is not None else None,
+            "median_latency_s": round(self.median_latency, 3) if self.median_latency is not None else None,
+        }
+
+
+class TrafficRouter:
+    """
+    Routes each request to the stable version or, with probability
+    `canary_fraction`, to the canary version.
+
+    The canary is promoted once it has `min_judged` judged requests and its
+    accuracy / latency are within the configured margins of the stable
+    version; otherwise it is rolled back.
+    """
+
+    def __init__(self,
+                 canary_fraction=cfg.CANARY_TRAFFIC_FRACTION,
+                 min_judged=cfg.CANARY_MIN_JUDGED_REQUESTS,
+                 max_accuracy_drop=cfg.CANARY_MAX_ACCURACY_DROP,
+                 max_latency_ratio=cfg.CANARY_MAX_LATENCY_RATIO):
+        self.canary_fraction = canary_fraction
+        self.min_judged = min_judged
+        self.max_accuracy_drop = max_accuracy_drop
+        self.max_latency_ratio = max_latency_ratio
+        self.stable = None
+        self.canary = None
+        self.stats = {}
+        self._lock = threading.Lock()
+
+    def set_stable(self, version):
+        with self._lock:
+            self.stable = version
+            self.stats.setdefault(version, VersionStats())
+
+    def start_canary(self, version):
+        """
+        Send `canary_fraction` of traffic to `version`.
+
+        Returns:
+            int or None: A previous canary that was replaced (caller should unload it)
+        """
+        with self._lock:
+            replaced = self.canary
+            self.canary = version
+            self.stats[version] = VersionStats()
+            return replaced
+
+    def route(self):
+        """Pick the version that serves the next request."""
+        canary = self.canary
+        if canary is not None and random.random() < self.canary_fraction:
+            return canary
+        return self.stable
+
+    def record(self, version, latency, is_correct=None):
+        """Record one request; `is_correct` is None when the judge was skipped."""
+        with self._lock:
+            stats = self.stats.setdefault(version, VersionStats())
+            stats.requests += 1
+            stats.latencies.append(latency)
+            if is_correct is not None:
+                stats.judged += 1
+                stats.correct += int(is_correct)
+
+    def evaluate(self):
+        """
+        Decide the canary's fate.
+
+        Returns:
+            tuple: ("promote" | "rollback" | None, canary version)
+        """
+        with self._lock:
+            canary = self.canary
+            if canary is None:
+                return None, None
+            canary_stats = self.stats[canary]
+            if canary_stats.judged < self.min_judged:
+                return None, canary
+
+            stable_stats = self.stats.get(self.stable)
+            stable_accuracy = stable_stats.accuracy if stable_stats else None
+            if stable_accuracy is not None and canary_stats.accuracy < stable_accuracy - self.max_accuracy_drop:
+                decision = "rollback"
+            elif (stable_stats and stable_stats.median_latency and canary_stats.median_latency
+                  and canary_stats.median_latency > stable_stats.median_latency * self.max_latency_ratio):
+                decision = "rollback"
+            else:
+                decision = "promote"
+
+            self._conclude(decision)
+            return decision, canary
+
+    def conclude(self, decision):
+        """
+        Apply a decision made elsewhere (e.g. by another container) to the current canary.
+
+        Returns:
+            int or None: The canary version it was applied to
+        """
+        with self._lock:
+            canary = self.canary
+            if canary is not None:
+                self._conclude(decision)
+            return canary
+
+    def _conclude(self, decision):
+        if decision == "promote":
+            self.stats.pop(self.stable, None)
+            self.stable = self.canary
+        else:
+            self.stats.pop(self.canary, None)
+        self.canary = None
+
+    def snapshot(self):
+        """Routing table and per-version stats, for `/api/model/current`."""
+        with self._lock:
+            return {
+                "stable": self.stable,
+                "canary": self.canary,
+                "canary_fraction": self.canary_fraction if self.canary is not None else 0.0,
+                "versions": {f"v{v}": s.as_dict() for v, s in self.stats.items()},
+            }
@@ -0,0 +1,294 @@
+"""
+Training Job
+Background fine-tuning job shared by the Modal `train_job` and the local server
+"""
+
+import os
+import sys
+import time
+import shutil
+import argparse
+import subprocess
+from config import model_config as cfg
+from src.data.tokenizer import read_training_file
+from src.data.arrow_dataset import arrow_dir
+from src.data.streaming import stream_training_dataset
+from src.data.replay_buffer import ReplayBuffer, mix_replay
+from src.model.adapter_loader import save_adapter, save_optimizer_state, resumable_adapter
+from src.serving.storage import LocalStorage
+from src.serving.segments import compact_segments
+from src.serving.rollouts import RolloutLog
+from src.serving.training_coordinator import TrainingCoordinator
+from src.serving.merge_job import launch_local_merge
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def train_job(storage, launch_merge=None, coalesce=False):
+    """
+    Single-flight training: runs never overlap (one Modal container, a file
+    lock between local processes). A run consumes every pending trigger, so
+    triggers that arrive while it trains are served by one follow-up run.
+
+    Args:
+        storage: LocalStorage / VolumeStorage holding the data file and model versions
+        launch_merge: Callable starting the deferred merge of a new version
+            (`cfg.MERGE_VERSIONS = "background"`)
+        coalesce: Launched for a serving trigger: skip the run if an earlier run
+            already consumed every trigger (a manual run always trains)
+
+    Returns:
+        dict: Status, new version and model path (status "coalesced" if the run was skipped)
+    """
+    from src.training.checkpointing import TrainingRun
+
+    coordinator = TrainingCoordinator(storage)
+    with coordinator.exclusive():
+        triggers = coordinator.pending()
+        # An interrupted run (e.g. a Modal retry) resumes even though its triggers were consumed
+        if coalesce and not triggers and TrainingRun(storage).state is None:
+            print("⏳ No pending training triggers. An earlier run already trained on them.")
+            return {"status": "coalesced"}
+        coordinator.consume(triggers)
+        if len(triggers) > 1:
+            print(f"🔁 {len(triggers)} training triggers coalesced into this run")
+        return _train_once(storage, coordinator, launch_merge)
+
+
+def _train_once(storage, coordinator, launch_merge=None):
+    """
+    Replicates 'run_training_only.py' but overrides precision settings dynamically.
+
+    Returns:
+        dict: Status ("success", "refused", "no_data" or "failed"), new version and model path
+    """
+    from unsloth import FastLanguageModel, is_bfloat16_supported
+    from transformers import TrainingArguments
+    from src.training.weighted_trainer import WeightedSFTTrainer
+    from src.training.batching import resolve_batching, report_throughput
+    from src.training.early_stopping import early_stopping_callbacks
+    from src.training.metrics import metrics_file
+    from src.training.checkpointing import TrainingRun, CheckpointCallback
+    from src.export.shard_merge import merge_version, folder_size
+
+    print("\n" + "="*80)
+    print("🏋️ TRAINING JOB STARTED")
+    print("="*80)
+
+    # 1. Resolve Paths, Base Model & Version
+    data_file = storage.path(cfg.DATA_FOR_FINETUNING_FILE)
+    # Continue from the version being served: a rolled-back canary is skipped
+    base_path, prev_ver = RolloutLog(storage).serving_model_info()
+
+    resume_adapter = resumable_adapter(base_path)
+    if not resume_adapter and cfg.SERVING_MODE == "adapter" and prev_ver > 0:
+        # A fresh adapter on the base model would silently drop everything v1..v{prev_ver} learned
+        print(f"❌ Cannot continue the adapter of v{prev_ver} ({base_path}) and adapter serving mode "
+              f"would restart from the bare base model, losing every learned fact. Training refused.")
+        print(f"   Restore the LoRA settings v{prev_ver} was trained with, "
+              f"or use SERVING_MODE=merged to stack a fresh adapter on its merged weights.")
+        return {"status": "refused", "new_version": None, "model_path": base_path}
+
+    replay = ReplayBuffer(storage.path(cfg.REPLAY_BUFFER_FILE))
+    run = TrainingRun(storage)
+    if run.resumable(base_path, prev_ver):
+        # 2. An interrupted run on this version: keep its data snapshot, continue from its last checkpoint
+        print(f"♻️ Resuming the interrupted run for data snapshot {run.state['snapshot']}")
+        new_ver = run.state.get("new_version", prev_ver + 1)
+    else:
+        # 2. Seal the serving containers' segments into the data file
+        compact_segments(storage)
+        if not os.path.exists(data_file):
+            print(f"❌ No training data found at {data_file}. Aborting.")
+            return {"status": "no_data", "new_version": None, "model_path": base_path}
+
+        # Mix in past facts from the replay buffer (built from the processed_v* archives)
+        replay.ingest_archives(storage.root)
+        train_file = data_file
+        if cfg.REPLAY_RATIO > 0 and len(replay):
+            train_file = storage.path(cfg.REPLAY_MIX_FILE)
+            mix_replay(data_file, train_file, replay)
+
+        # Version numbers are never handed out twice, even to a run that failed
+        new_ver = coordinator.allocate_version(prev_ver)
+        # Freeze what this run trains on, so a restarted job resumes on exactly the same data
+        run.start(train_file, base_path, prev_ver, new_ver)
+    train_file = run.data_file
+    new_path = storage.path(f"{cfg.MODEL_SAVE_PREFIX}{new_ver}")
+
+    try:
+        if cfg.STREAM_TRAINING_DATA:
+            dataset = stream_training_dataset(train_file)
+            print(f"✅ Streaming {train_file} (shuffle buffer {cfg.STREAM_SHUFFLE_BUFFER}, {cfg.MAX_STEPS} steps)")
+        else:
+            dataset = read_training_file(train_file)
+            print(f"✅ Loaded {len(dataset)} records ({sum(dataset['weight'])} weighted samples) from {train_file}")
+    except Exception as e:
+        # A snapshot that cannot be loaded must not be resumed by every retry and later trigger
+        print(f"❌ Error loading data: {e}. Discarding snapshot {run.state['snapshot']}.")
+        run.discard()
+        storage.commit()
+        return {"status": "failed", "new_version": None, "model_path": base_path, "error": str(e)}
+
+    optimizer_state = None
+    if resume_adapter:
+        # 4-5. Continual training: resume the previous adapter + optimizer state, train on the new facts only
+        from src.model.loader import load_training_model
+
+        print(f"🔄 Continuing the LoRA adapter of: {base_path} (v{prev_ver})")
+        model, tokenizer, optimizer_state = load_training_model(base_path, dtype=None)
+    else:
+        # Adapters are served over the resident base model, so they must be trained on it too
+        # (only reached for v0 in adapter mode, where base_path already is the base model)
+        if cfg.SERVING_MODE == "adapter":
+            base_path = cfg.BASE_MODEL_ID
+        else:
+            # A fresh adapter is stacked on the full weights of the previous version
+            merge_version(base_path)
+
+        print(f"🔄 Fine-tuning on top of: {base_path} (v{prev_ver})")
+
+        # 4. Load Model
+        # FIX: We use dtype=None to let Unsloth automatically pick FP16 (T4) or BF16 (A10G)
+        model, tokenizer = FastLanguageModel.from_pretrained(
+            model_name=base_path,
+            max_seq_length=cfg.MAX_SEQ_LENGTH,
+            load_in_4bit=cfg.LOAD_IN_4BIT,
+            dtype=None,
+        )
+
+        # 5. Apply LoRA
+        model = FastLanguageModel.get_peft_model(
+            model,
+            r=cfg.LORA_R,
+            target_modules=cfg.LORA_TARGET_MODULES,
+            lora_alpha=cfg.LORA_ALPHA,
+            lora_dropout=cfg.LORA_DROPOUT,
+            bias=cfg.LORA_BIAS,
+            use_gradient_checkpointing=cfg.USE_GRADIENT_CHECKPOINTING,
+        )
+
+    # 6. Train with DYNAMIC PRECISION
+    # FIX: We calculate support dynamically instead of trusting the config file
+    supports_bf16 = is_bfloat16_supported()
+    print(f"⚙️ GPU Support: BF16={supports_bf16}. Overriding config precision settings.")
+
+    trainer = WeightedSFTTrainer(
+        model=model,
+        tokenizer=tokenizer,
+        train_dataset=dataset,
+        dataset_text_field="text",
+        max_seq_length=cfg.MAX_SEQ_LENGTH,
+        # Kept on the volume so the next training container reuses the tokens
+        token_cache_dir=storage.path(cfg.TOKEN_CACHE_DIR) if cfg.USE_TOKEN_CACHE else None,
+        batching=resolve_batching(model),
+        optimizer_state=optimizer_state,
+        callbacks=early_stopping_callbacks(tokenizer, train_file) + [CheckpointCallback(storage)],
+        metrics_file=metrics_file(new_path) if cfg.TRAINING_METRICS else None,
+        args=TrainingArguments(
+            # Checkpoints go to the volume (time-based, see CheckpointCallback); only the latest is kept
+            output_dir=run.checkpoint_dir,
+            save_total_limit=1,
+            per_device_train_batch_size=cfg.BATCH_SIZE,
+            num_train_epochs=cfg.NUM_EPOCHS,
+            # A streamed dataset has no length, so its run length is a step count
+            max_steps=cfg.MAX_STEPS if cfg.STREAM_TRAINING_DATA else -1,
+            learning_rate=cfg.LEARNING_RATE,
+
+            # --- DYNAMIC OVERRIDE ---
+            fp16 = not supports_bf16,
+            bf16 = supports_bf16,
+            # ------------------------
+
+            logging_steps=cfg.LOGGING_STEPS,
+            optim=cfg.OPTIM,
+            weight_decay=cfg.WEIGHT_DECAY,
+            lr_scheduler_type=cfg.LR_SCHEDULER_TYPE,
+            save_strategy="no",
+            report_to="none"
+        )
+    )
+    resume_from = run.last_checkpoint()
+    if resume_from:
+        print(f"♻️ Resuming from {resume_from}")
+    start_time = time.time()
+    trainer.train(resume_from_checkpoint=resume_from)
+    report_throughput(trainer, time.time() - start_time)
+
+    # 7. Save New Version
+    train_end = time.time()
+    print(f"💾 Saving fine-tuned model to {new_path}...")
+
+    # The LoRA adapter is all serving needs; merged weights are deferred unless cfg.MERGE_VERSIONS is "sync"
+    if cfg.MERGE_VERSIONS == "sync":
+        # Save the merged model (using transformers 4.57.1 for compatibility)
+        model.save_pretrained_merged(new_path, tokenizer, save_method="merged_16bit")
+    save_adapter(model, tokenizer, new_path)
+    save_optimizer_state(trainer, new_path)
+
+    print(f"✅ Model saved successfully ({folder_size(new_path) / 2**20:.0f} MB written)")
+
+    # 8. Commit model to storage FIRST (before updating config)
+    print(f"💾 Committing model to storage...")
+    storage.commit()
+    print(f"✅ Model committed to storage")
+
+    # 9. Update Config to point to new model
+    print(f"📝 Updating config to v{new_ver}...")
+    storage.write_latest_model_info(new_path, new_ver)
+
+    # 10. Archive Data
+    if os.path.exists(data_file):
+        shutil.move(data_file, f"{data_file}.processed_v{new_ver}")
+    if os.path.exists(arrow_dir(data_file)):
+        shutil.move(arrow_dir(data_file), arrow_dir(f"{data_file}.processed_v{new_ver}"))
+
+    # The archived facts become replay candidates for later versions
+    replay.ingest_archives(storage.root)
+    replay.save()
+
+    # The run is complete: drop its snapshot and checkpoints
+    run.discard()
+
+    # 11. Final commit with config update
+    storage.commit()
+    print(f"⏱️ v{new_ver} servable {time.time() - train_end:.1f}s after training ended")
+
+    # 12. Merged weights are produced off the critical path
+    if cfg.MERGE_VERSIONS == "background" and launch_merge is not None:
+        launch_merge(new_path)
+
+    print(f"\n" + "="*80)
+    print(f"✅ TRAINING COMPLETE!")
+    print(f"="*80)
+    print(f"   New model: v{new_ver} at {new_path}")
+    print(f"   Serving containers pick it up on their next version watcher poll")
+    return {"status": "success", "new_version": new_ver, "model_path": new_path}
+
+
+def launch_local_training(storage):
+    """
+    Start `train_job` for a serving trigger in a separate local process (the local
+    stand-in for `train_job.spawn()`).
+
+    Returns:
+        subprocess.Popen: Handle of the training process
+    """
+    print(f"🚀 Launching local training process on {storage.root}...")
+    command = [sys.executable, "-m", "src.serving.train_job", "--storage-dir", storage.root, "--coalesce"]
+    return subprocess.Popen(command, cwd=PROJECT_ROOT)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the fine-tuning job against a local storage directory.")
+    parser.add_argument("--storage-dir", default=cfg.LOCAL_STORAGE_DIR, help="Directory holding model versions and training data")
+    parser.add_argument("--coalesce", action="store_true",
+                        help="Skip the run if no training trigger is pending (set by the server that triggered it)")
+    args = parser.parse_args()
+
+    storage = LocalStorage(args.storage_dir)
+    train_job(storage, launch_merge=lambda model_path: launch_local_merge(storage, model_path), coalesce=args.coalesce)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+"""
+Training Coordinator
+Single-flight training across all serving containers / worker processes.
+Training runs are serialized where they execute (one `train_job` container on
+Modal, `max_containers=1`; an exclusive file lock between local processes),
+triggers are immutable files on the storage that the next run consumes all
+at once, and model version numbers are allocated monotonically.
+"""
+
+import os
+import json
+import uuid
+import time
+import fcntl
+import contextlib
+from config import model_config as cfg
+from src.serving.segments import default_writer_id
+
+TRIGGER_SUFFIX = ".json"
+
+
+class TrainingCoordinator:
+    """
+    Triggers: one file per request in `cfg.TRAINING_TRIGGERS_DIR`
+    (`<writer id>-<uuid>.json`, written under a temporary name and renamed),
+    so serving containers never write the same file. A training job consumes
+    every trigger it finds before it trains; a job queued behind it that
+    finds none has been coalesced and exits before loading a model.
+
+    Versions: `cfg.TRAINING_COORDINATOR_FILE` holds the highest version ever
+    allocated. Only the running training job writes it, and runs never
+    overlap, so no cross-container locking is needed.
+    """
+
+    def __init__(self, storage):
+        self.storage = storage
+        self.path = storage.path(cfg.TRAINING_COORDINATOR_FILE)
+        self.directory = storage.path(cfg.TRAINING_TRIGGERS_DIR)
+
+    def request(self, writer_id=None):
+        """
+        Record a training trigger; the caller then launches the training job.
+
+        Returns:
+            str: The trigger file
+        """
+        os.makedirs(self.directory, exist_ok=True)
+        path = os.path.join(self.directory, f"{writer_id or default_writer_id()}-{uuid.uuid4().hex}{TRIGGER_SUFFIX}")
+        with open(f"{path}.tmp", 'w') as f:
+            json.dump({"requested_at": time.time()}, f)
+        os.replace(f"{path}.tmp", path)
+        self.storage.commit()
+        return path
+
+    def pending(self):
+        """Trigger files not yet consumed by a run (reloads the storage to see every container's)."""
+        self.storage.reload()
+        if not os.path.isdir(self.directory):
+            return []
+        return sorted(os.path.join(self.directory, name) for name in os.listdir(self.directory)
+                      if name.endswith(TRIGGER_SUFFIX))
+
+    def consume(self, triggers):
+        """Mark `triggers` as handled by the run about to start."""
+        for path in triggers:
+            with contextlib.suppress(FileNotFoundError):
+                os.remove(path)
+        self.storage.commit()
+
+    @contextlib.contextmanager
+    def exclusive(self):
+        """Block until no other local training process runs, for the duration of the block."""
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        with open(f"{self.path}.lock", 'a') as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock, fcntl.LOCK_UN)
+
+    def allocate_version(self, latest_version):
+        """Next model version number: above both the latest model and every number handed out before."""
+        last_version = 0
+        if os.path.exists(self.path):
+            with open(self.path) as f:
+                last_version = json.load(f).get("last_version", 0)
+        version = max(last_version, latest_version) + 1
+        with open(f"{self.path}.tmp", 'w') as f:
+            json.dump({"last_version": version}, f)
+        os.replace(f"{self.path}.tmp", self.path)
+        self.storage.commit()
+        return version
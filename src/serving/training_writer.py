@@ -0,0 +1,149 @@
+"""
+Buffered Training Data Writer
+Collects validated training records in memory and writes them with one volume commit
+"""
+
+import os
+import time
+import atexit
+import threading
+from config import model_config as cfg
+from src.serving.segments import default_writer_id, write_segment
+
+
+class BufferedTrainingWriter:
+    """
+    Group-commit writer for validated training records.
+
+    Records are appended to an in-memory buffer and flushed (one new segment
+    file + one `storage.commit()`) when the buffer holds `max_records`, when the
+    oldest record is `max_delay` seconds old, or when `flush()` is called
+    explicitly (cycle end, shutdown). Records still buffered when the process
+    dies are lost unless `flush_on_exit` is set, which registers an `atexit` flush.
+
+    Every flush seals a segment `<writer_id>-<seq>.jsonl` owned by this writer
+    only, so containers never append to a shared file (see `segments.py`).
+    """
+
+    def __init__(self, storage, writer_id=None,
+                 max_records=cfg.TRAINING_WRITE_MAX_RECORDS,
+                 max_delay=cfg.TRAINING_WRITE_MAX_DELAY_SECONDS,
+                 flush_on_exit=cfg.TRAINING_WRITE_FLUSH_ON_EXIT):
+        self.storage = storage
+        self.writer_id = writer_id or default_writer_id()
+        self._seq = 0
+        # Segments written during the current validation cycle
+        self.cycle_segments = []
+        self.max_records = max_records
+        self.max_delay = max_delay
+        self._buffer = []
+        self._oldest = None
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+        self.stats = {"records_written": 0, "flushes": 0, "commits": 0,
+                      "last_flush_ms": None, "total_flush_ms": 0.0}
+        if flush_on_exit:
+            atexit.register(self.flush, reason="exit")
+
+    def start(self):
+        """Start the background thread that enforces `max_delay`."""
+        if self._thread is None and self.max_delay:
+            self._thread = threading.Thread(target=self._run, name="training-writer", daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+    def write(self, records):
+        """Buffer records; flushes right away once the size threshold is reached."""
+        with self._lock:
+            if not self._buffer:
+                self._oldest = time.monotonic()
+            self._buffer.extend(records)
+            full = len(self._buffer) >= self.max_records
+        if full:
+            self.flush(reason="size")
+
+    def flush(self, reason="manual"):
+        """
+        Write every buffered record to a new segment and commit once.
+
+        Returns:
+            int: Number of records written
+        """
+        with self._lock:
+            if not self._buffer:
+                return 0
+            records, self._buffer, self._oldest = self._buffer, [], None
+
+            start = time.perf_counter()
+            try:
+                path = write_segment(self.storage, self.writer_id, self._seq, records)
+                self._seq += 1
+                self.cycle_segments.append(path)
+                self.storage.commit()
+            except Exception:
+                # Keep the records for the next attempt
+                self._buffer = records + self._buffer
+                self._oldest = self._oldest or time.monotonic()
+                raise
+            elapsed_ms = (time.perf_counter() - start) * 1000
+
+            self.stats["records_written"] += len(records)
+            self.stats["flushes"] += 1
+            self.stats["commits"] += 1
+            self.stats["last_flush_ms"] = round(elapsed_ms, 2)
+            self.stats["total_flush_ms"] += elapsed_ms
+
+        print(f"💾 Flushed {len(records)} training records ({reason}) in {elapsed_ms:.1f} ms "
+              f"[{self.stats['commits']} commits so far]")
+        return len(records)
+
+    def end_cycle(self, keep):
+        """
+        Close the validation cycle.
+
+        Args:
+            keep: True to flush for training; False to drop this cycle's buffered
+                records and the segments this writer sealed during it (the cycle passed)
+        """
+        if keep:
+            self.flush(reason="cycle end")
+            with self._lock:
+                self.cycle_segments = []
+            return
+
+        with self._lock:
+            self._buffer, self._oldest = [], None
+            segments, self.cycle_segments = self.cycle_segments, []
+        # Segments already merged by a compaction are gone; nothing to undo there
+        for path in segments:
+            if os.path.exists(path):
+                os.remove(path)
+        if segments:
+            self.storage.commit()
+
+    @property
+    def pending(self):
+        return len(self._buffer)
+
+    def snapshot(self):
+        """Commit count and write latency, for `/api/model/current`."""
+        flushes = self.stats["flushes"]
+        return {
+            "pending_records": self.pending,
+            "records_written": self.stats["records_written"],
+            "commits": self.stats["commits"],
+            "last_flush_ms": self.stats["last_flush_ms"],
+            "avg_flush_ms": round(self.stats["total_flush_ms"] / flushes, 2) if flushes else None,
+        }
+
+    def _run(self):
+        while not self._stop.wait(min(self.max_delay, 1.0)):
+            oldest = self._oldest
+            if oldest is not None and time.monotonic() - oldest >= self.max_delay:
+                try:
+                    self.flush(reason="time")
+                except Exception as e:
+                    print(f"⚠️ Training data flush failed: {e}")
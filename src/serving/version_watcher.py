@@ -0,0 +1,71 @@
+"""
+Model Version Watcher
+Background thread that tracks the latest model version so requests never touch the volume
+"""
+
+import time
+import threading
+from config import model_config as cfg
+from src.serving.rollouts import RolloutLog
+
+
+class VersionWatcher:
+    """
+    Polls `_latest_model_config.json` every `interval` seconds (or right away
+    when notified, e.g. after `train_job` finishes) and caches the result.
+
+    Rolled-back versions are skipped (see RolloutLog). When the resulting
+    version differs from the served one (a new version, or the served version
+    was rolled back by another container), `on_new_version(path, version)`
+    runs on the watcher thread, so the hot-swap never blocks a chat request.
+    """
+
+    def __init__(self, storage, on_new_version, interval=cfg.MODEL_WATCH_INTERVAL_SECONDS):
+        self.storage = storage
+        self.on_new_version = on_new_version
+        self.interval = interval
+        self.rollouts = RolloutLog(storage)
+        # Canary decisions recorded by any container, as of the last poll
+        self.decisions = {}
+        # (model_path, version, checked_at) - replaced as a whole, never mutated
+        self.latest = (cfg.BASE_MODEL_ID, 0, 0.0)
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self, current_version):
+        """Start polling; `current_version` is the version already served."""
+        self._served_version = current_version
+        self._thread = threading.Thread(target=self._run, name="version-watcher", daemon=True)
+        self._thread.start()
+        print(f"👀 Version watcher started (every {self.interval}s)")
+
+    def stop(self):
+        self._stop.set()
+        self._wake.set()
+
+    def notify(self):
+        """Check for a new version now instead of waiting for the next poll."""
+        self._wake.set()
+
+    def poll(self):
+        """Read the latest model pointer once and hot-swap if it changed."""
+        self.storage.reload()
+        self.decisions = self.rollouts.decisions()
+        latest_path, latest_ver = self.rollouts.resolve(*self.storage.read_latest_model_info(), self.decisions)
+        self.latest = (latest_path, latest_ver, time.time())
+
+        if latest_ver != self._served_version:
+            if self.on_new_version(latest_path, latest_ver):
+                self._served_version = latest_ver
+
+    def _run(self):
+        while not self._stop.is_set():
+            self._wake.wait(self.interval)
+            self._wake.clear()
+            if self._stop.is_set():
+                break
+            try:
+                self.poll()
+            except Exception as e:
+                print(f"⚠️ Version watcher poll failed: {e}")
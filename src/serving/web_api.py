@@ -0,0 +1,53 @@
+"""
+Web API
+FastAPI app exposing the chat endpoints (shared by Modal and the local server)
+"""
+
+from fastapi import FastAPI
+from fastapi.middleware.cors import CORSMiddleware
+from fastapi.staticfiles import StaticFiles
+from pydantic import BaseModel
+
+
+class QuestionRequest(BaseModel):
+    question: str
+
+
+def create_web_app(ask, get_model_info, frontend_dir):
+    """
+    Build the FastAPI app.
+
+    Args:
+        ask: Callable(question) -> {"answer", "model_version"}
+        get_model_info: Callable() -> dict served at /api/model/current
+        frontend_dir: Directory with the static web UI
+
+    Returns:
+        FastAPI: The web app
+    """
+    web_app = FastAPI()
+    web_app.add_middleware(
+        CORSMiddleware,
+        allow_origins=["*"],
+        allow_credentials=True,
+        allow_methods=["*"],
+        allow_headers=["*"],
+    )
+
+    # Plain `def` handlers run in FastAPI's threadpool, so a blocking
+    # generate call never stalls /api/health.
+    @web_app.post("/api/chat")
+    def chat(req: QuestionRequest):
+        return ask(req.question)
+
+    @web_app.get("/api/health")
+    def health():
+        return {"status": "online"}
+
+    @web_app.get("/api/model/current")
+    def model_info():
+        return get_model_info()
+
+    web_app.mount("/", StaticFiles(directory=frontend_dir, html=True, check_dir=False))
+
+    return web_app
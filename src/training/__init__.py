@@ -1,4 +1,5 @@
- 
 from .trainer import train_model, save_model
+from .weighted_trainer import WeightedSFTTrainer, RepeatWeightedSampler
+from .early_stopping import FactRecallEarlyStoppingCallback
 
-__all__ = ['train_model', 'save_model']
+__all__ = ['train_model', 'save_model', 'WeightedSFTTrainer', 'RepeatWeightedSampler', 'FactRecallEarlyStoppingCallback']
@@ -0,0 +1,79 @@
+"""
+Batching
+Short Q&A samples waste most of a padded batch. This module picks a batching
+mode (padding-free packing or length-grouped batches) and derives the
+effective max_seq_length from the dataset's token-length distribution.
+"""
+
+import math
+import numpy as np
+from config import model_config as cfg
+
+
+def token_lengths(dataset):
+    """Token count of every row of a pre-tokenized dataset (`input_ids` column)."""
+    import pyarrow.compute as pc
+
+    column = dataset.select_columns(["input_ids"]).with_format("arrow")[:]["input_ids"]
+    return pc.list_value_length(column).to_numpy(zero_copy_only=False).astype(np.int64)
+
+
+def effective_max_seq_length(lengths, weights=None, percentile=cfg.AUTO_MAX_SEQ_LENGTH_PERCENTILE,
+                             ceiling=cfg.MAX_SEQ_LENGTH, multiple=8):
+    """
+    Sample-weighted `percentile` of the token lengths, rounded up to `multiple`
+    and never above `ceiling`. Longer samples are truncated to it.
+    """
+    lengths = np.asarray(lengths)
+    if len(lengths) == 0:
+        return ceiling
+    weights = np.ones_like(lengths) if weights is None else np.asarray(weights)
+    order = np.argsort(lengths)
+    cumulative = np.cumsum(weights[order]) / weights.sum()
+    length = int(lengths[order][min(np.searchsorted(cumulative, percentile / 100), len(lengths) - 1)])
+    return min(ceiling, multiple * math.ceil(length / multiple))
+
+
+def supports_packing(model):
+    """Padding-free packing keeps samples apart only with variable-length (flash) attention."""
+    return getattr(getattr(model, "config", None), "_attn_implementation", None) == "flash_attention_2"
+
+
+def resolve_batching(model, mode=cfg.TRAINING_BATCHING):
+    """The batching mode to use for `model`: "packed" falls back to "group_by_length" without flash attention."""
+    if mode == "packed" and not supports_packing(model):
+        print("--- Packing needs flash_attention_2 to keep sample boundaries; using group_by_length instead ---")
+        return "group_by_length"
+    return mode
+
+
+def processed_tokens(lengths, batch_size, mode, seed=0):
+    """
+    Tokens one epoch pushes through the model (real + padding) for a batching mode.
+
+    Returns:
+        tuple: (real tokens, processed tokens)
+    """
+    lengths = np.asarray(lengths)
+    real = int(lengths.sum())
+    if mode == "packed":
+        return real, real
+
+    order = np.random.default_rng(seed).permutation(len(lengths))
+    if mode == "group_by_length":
+        mega = batch_size * cfg.LENGTH_GROUP_MEGABATCH
+        order = np.concatenate([chunk[np.argsort(-lengths[chunk], kind="stable")]
+                                for chunk in np.split(order, range(mega, len(order), mega))])
+    batches = np.split(lengths[order], range(batch_size, len(order), batch_size))
+    return real, int(sum(batch.max() * len(batch) for batch in batches))
+
+
+def report_throughput(trainer, elapsed):
+    """Print training time and (when token lengths are known) real tokens/sec."""
+    tokens_per_epoch = getattr(trainer, "real_tokens_per_epoch", None)
+    if not tokens_per_epoch:
+        print(f"⏱️ Training time: {elapsed:.1f}s ({getattr(trainer, 'batching', 'padded')} batching)")
+        return
+    tokens = int(tokens_per_epoch * trainer.state.epoch)
+    print(f"⏱️ Training time: {elapsed:.1f}s, {tokens} real tokens, {tokens / elapsed:.0f} tokens/s "
+          f"({trainer.batching} batching)")
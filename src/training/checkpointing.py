@@ -0,0 +1,108 @@
+"""
+Training Checkpoints
+Keeps `train_job` resumable after a preemption or timeout. The run's training
+data is frozen as a snapshot identified by its content hash, and lightweight
+checkpoints (LoRA adapter + optimizer/scheduler state + trainer state, which
+holds the data cursor) are written to storage every few minutes. A restarted
+job resumes the run for the same snapshot instead of starting over.
+"""
+
+import os
+import json
+import time
+import shutil
+import hashlib
+from transformers import TrainerCallback
+from transformers.trainer_utils import get_last_checkpoint
+from config import model_config as cfg
+
+
+def snapshot_hash(path):
+    """Content hash of a training data file."""
+    with open(path, 'rb') as f:
+        return hashlib.file_digest(f, "sha256").hexdigest()[:16]
+
+
+class TrainingRun:
+    """
+    The in-progress run in `<storage>/cfg.TRAINING_RUN_DIR`: `run.json`
+    (snapshot hash, the model version it trains on and the version it produces), the frozen `data.jsonl`
+    and the trainer's `checkpoints/`. Removed once the new version is saved.
+    """
+
+    def __init__(self, storage):
+        self.storage = storage
+        self.root = storage.path(cfg.TRAINING_RUN_DIR)
+        self.data_file = os.path.join(self.root, "data.jsonl")
+        self.checkpoint_dir = os.path.join(self.root, "checkpoints")
+        self.state = None
+        state_file = os.path.join(self.root, "run.json")
+        if os.path.exists(state_file):
+            with open(state_file) as f:
+                self.state = json.load(f)
+
+    def resumable(self, model_path, version):
+        """
+        True if an interrupted run on the same model version and intact data
+        snapshot exists. Any other leftover run is discarded.
+        """
+        if self.state is None:
+            return False
+        if (self.state["model_path"] == model_path and self.state["version"] == version
+                and os.path.exists(self.data_file) and snapshot_hash(self.data_file) == self.state["snapshot"]):
+            return True
+        print(f"⚠️ Discarding the interrupted run for snapshot {self.state['snapshot']} (model or data changed)")
+        self.discard()
+        return False
+
+    def start(self, train_file, model_path, version, new_version):
+        """Freeze `train_file` as this run's data snapshot (later segments wait for the next run)."""
+        self.discard()
+        os.makedirs(self.root)
+        shutil.copyfile(train_file, self.data_file)
+        self.state = {"snapshot": snapshot_hash(self.data_file), "model_path": model_path, "version": version,
+                      "new_version": new_version, "started_at": time.time()}
+        with open(os.path.join(self.root, "run.json.tmp"), 'w') as f:
+            json.dump(self.state, f)
+        os.replace(os.path.join(self.root, "run.json.tmp"), os.path.join(self.root, "run.json"))
+        self.storage.commit()
+        print(f"🧊 Training data frozen as snapshot {self.state['snapshot']}")
+
+    def last_checkpoint(self):
+        """The newest checkpoint folder, or None."""
+        return get_last_checkpoint(self.checkpoint_dir) if os.path.isdir(self.checkpoint_dir) else None
+
+    def discard(self):
+        shutil.rmtree(self.root, ignore_errors=True)
+        self.state = None
+
+
+class CheckpointCallback(TrainerCallback):
+    """
+    Requests a checkpoint every `interval_minutes` of training (time-based, so
+    the write overhead is a fixed share of the run whatever the step time) and
+    commits it to storage. Each write is timed; the total share is printed.
+    """
+
+    def __init__(self, storage, interval_minutes=cfg.CHECKPOINT_INTERVAL_MINUTES):
+        self.storage = storage
+        self.interval = interval_minutes * 60
+        self.saves = 0
+        self.save_seconds = 0.0
+
+    def on_train_begin(self, args, state, control, **kwargs):
+        self.train_start = self.last_save = time.perf_counter()
+
+    def on_step_end(self, args, state, control, **kwargs):
+        self.step_end = time.perf_counter()
+        if self.step_end - self.last_save >= self.interval and state.global_step < state.max_steps:
+            control.should_save = True
+
+    def on_save(self, args, state, control, **kwargs):
+        self.storage.commit()
+        self.last_save = time.perf_counter()
+        seconds = self.last_save - self.step_end
+        self.saves += 1
+        self.save_seconds += seconds
+        print(f"💾 Checkpoint {self.saves} at step {state.global_step}/{state.max_steps}: {seconds:.2f}s "
+              f"(checkpoints = {self.save_seconds / (self.last_save - self.train_start):.1%} of training time)")
@@ -0,0 +1,87 @@
+"""
+Distributed Training
+Data-parallel launch mode for the training phase: one process per GPU (or per
+CPU process with the gloo backend), started by `accelerate launch` or
+`torchrun`. The Trainer (through accelerate) gives every process its own slice
+of each epoch's batches; only rank 0 writes the new version, its config and metrics.
+
+Usage:
+    accelerate launch --num_processes 4 run_training_only.py
+    DISTRIBUTED_BACKEND=gloo torchrun --nproc_per_node 4 run_training_only.py
+"""
+
+import os
+import contextlib
+import torch
+import torch.distributed as dist
+from config import model_config as cfg
+
+
+def world_size():
+    """Number of training processes (1 without a distributed launcher)."""
+    return int(os.environ.get("WORLD_SIZE", 1))
+
+
+def rank():
+    return int(os.environ.get("RANK", 0))
+
+
+def local_rank():
+    return int(os.environ.get("LOCAL_RANK", 0))
+
+
+def is_distributed():
+    return world_size() > 1
+
+
+def is_main_process():
+    return rank() == 0
+
+
+def device_map():
+    """Model placement for `from_pretrained`: each process loads its replica on its own GPU."""
+    if is_distributed() and torch.cuda.is_available():
+        return {"": local_rank()}
+    return "sequential"
+
+
+def _initialized():
+    return dist.is_available() and dist.is_initialized()
+
+
+@contextlib.contextmanager
+def main_process_first():
+    """
+    Run the block on rank 0 first, then on the other ranks (e.g. rank 0 writes
+    the Arrow shards / token cache, the others read them). Plain block otherwise.
+    """
+    if not is_distributed():
+        yield
+        return
+    from accelerate import PartialState
+
+    with PartialState(backend=cfg.DISTRIBUTED_BACKEND).main_process_first():
+        yield
+
+
+def all_ranks_agree(flag):
+    """True only if `flag` is true on every rank (keeps stop decisions identical across replicas)."""
+    if not _initialized():
+        return flag
+    value = torch.tensor(int(bool(flag)), device=_collective_device())
+    dist.all_reduce(value, op=dist.ReduceOp.MIN)
+    return bool(value.item())
+
+
+def sum_across_ranks(values):
+    """Sum a dict of numbers over all ranks (returned unchanged when not distributed)."""
+    if not _initialized():
+        return values
+    keys = sorted(values)
+    totals = torch.tensor([float(values[k]) for k in keys], dtype=torch.float64, device=_collective_device())
+    dist.all_reduce(totals)
+    return {k: type(values[k])(total) for k, total in zip(keys, totals.tolist())}
+
+
+def _collective_device():
+    return torch.device("cuda", local_rank()) if dist.get_backend() == "nccl" else torch.device("cpu")
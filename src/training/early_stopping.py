@@ -0,0 +1,166 @@
+"""
+Fact-Recall Early Stopping
+A handful of facts is often memorized long before NUM_EPOCHS is over. This
+callback periodically asks the model the training questions (one batched
+greedy generate call) and stops training once the new facts are recalled and
+the stable ones retained.
+"""
+
+import os
+import re
+import json
+import time
+import random
+import torch
+from transformers import TrainerCallback
+from config import model_config as cfg
+from src.data.augmentation import normalize_question
+from src.data.generator import parse_training_text
+from src.training.distributed import all_ranks_agree
+
+_ARTICLES = re.compile(r"\b(a|an|the)\b")
+
+
+def normalize_answer(text):
+    """Lowercase, drop punctuation and articles, collapse whitespace."""
+    text = re.sub(r"[^\w\s]", " ", text.lower())
+    return " ".join(_ARTICLES.sub(" ", text).split())
+
+
+def answer_matches(prediction, target):
+    """Normalized match: the target answer appears in the model's answer."""
+    target = normalize_answer(target)
+    return bool(target) and target in normalize_answer(prediction)
+
+
+def fact_probes(path, max_probes=cfg.EARLY_STOP_MAX_PROBES, seed=cfg.EARLY_STOP_SEED):
+    """
+    One probe per fact of a training JSONL: its original question, target answer
+    and whether it is a new fact (judged outdated) or one to retain (stable or
+    replayed). Records without a verdict count as new.
+
+    At most `max_probes` facts are kept (a seeded sample, split evenly between the groups).
+
+    Returns:
+        list: dicts with `question`, `answer` and `new`
+    """
+    probes = {}
+    with open(path) as f:
+        for line in f:
+            if not line.strip():
+                continue
+            record = json.loads(line)
+            question, answer = parse_training_text(record["text"])
+            question = record.get("question", question)
+            if question is None or normalize_question(question) in probes:
+                continue
+            new = record.get("verdict", "outdated") == "outdated" and not record.get("replayed")
+            probes[normalize_question(question)] = {"question": question, "answer": answer, "new": new}
+
+    rng = random.Random(seed)
+    groups = [[p for p in probes.values() if p["new"]], [p for p in probes.values() if not p["new"]]]
+    for i, group in enumerate(groups):
+        quota = max(max_probes // 2, max_probes - len(groups[1 - i]))
+        groups[i] = rng.sample(group, quota) if len(group) > quota else group
+    return groups[0] + groups[1]
+
+
+def recall_scores(model, tokenizer, probes, batch_size=cfg.EARLY_STOP_BATCH_SIZE):
+    """
+    Greedy answers to every probe question, scored with `answer_matches`.
+
+    Returns:
+        tuple: (recall of new facts, retention of stable facts); None for an empty group
+    """
+    hits = {True: [], False: []}
+    padding_side = tokenizer.padding_side
+    tokenizer.padding_side = "left"  # decoder-only models generate after the prompt
+    try:
+        for start in range(0, len(probes), batch_size):
+            batch = probes[start:start + batch_size]
+            prompts = [tokenizer.apply_chat_template([{"role": "user", "content": p["question"]}],
+                                                     tokenize=False, add_generation_prompt=True) for p in batch]
+            inputs = tokenizer(prompts, return_tensors="pt", padding=True).to(model.device)
+            # Room for the longest target answer plus a few tokens
+            max_new_tokens = max(len(tokenizer(p["answer"]).input_ids) for p in batch) + 8
+            with torch.no_grad():
+                outputs = model.generate(**inputs, max_new_tokens=max_new_tokens, do_sample=False,
+                                         pad_token_id=tokenizer.pad_token_id)
+            for probe, output in zip(batch, outputs):
+                prediction = tokenizer.decode(output[inputs.input_ids.shape[1]:], skip_special_tokens=True)
+                hits[probe["new"]].append(answer_matches(prediction, probe["answer"]))
+    finally:
+        tokenizer.padding_side = padding_side
+
+    return tuple(sum(group) / len(group) if group else None for group in (hits[True], hits[False]))
+
+
+class FactRecallEarlyStoppingCallback(TrainerCallback):
+    """
+    Every `check_fraction` of the run, score the probes; stop once recall of
+    new facts >= `min_recall` and retention of stable facts >= `min_retention`.
+    The stopping step and the steps / time saved are printed and kept on the
+    callback (`stopped_at_step`, `saved_steps`, `saved_seconds`).
+    """
+
+    def __init__(self, tokenizer, probes, min_recall=cfg.EARLY_STOP_MIN_RECALL,
+                 min_retention=cfg.EARLY_STOP_MIN_RETENTION, check_fraction=cfg.EARLY_STOP_CHECK_FRACTION):
+        self.tokenizer = tokenizer
+        self.probes = probes
+        self.min_recall = min_recall
+        self.min_retention = min_retention
+        self.check_fraction = check_fraction
+        self.interval = None
+        self.check_seconds = 0.0
+        self.stopped_at_step = None
+        self.saved_steps = 0
+        self.saved_seconds = 0.0
+
+    def on_train_begin(self, args, state, control, **kwargs):
+        self.interval = max(1, round(state.max_steps * self.check_fraction))
+        self.start_time = time.time()
+        print(f"--- Fact-recall early stopping: {len(self.probes)} probe(s) every {self.interval} steps "
+              f"(recall >= {self.min_recall:.0%}, retention >= {self.min_retention:.0%}) ---")
+
+    def on_step_end(self, args, state, control, model=None, **kwargs):
+        if state.global_step % self.interval or state.global_step >= state.max_steps:
+            return
+
+        from src.model.loader import to_inference_mode, to_training_mode
+
+        check_start = time.time()
+        # Unsloth's inference path (KV cache, no gradient checkpointing), as for serving
+        to_inference_mode(model)
+        try:
+            recall, retention = recall_scores(model, self.tokenizer, self.probes)
+        finally:
+            to_training_mode(model)
+        self.check_seconds += time.time() - check_start
+
+        passed = (recall is None or recall >= self.min_recall) and (retention is None or retention >= self.min_retention)
+        # Data-parallel replicas must stop at the same step
+        passed = all_ranks_agree(passed)
+        recall_text = "n/a" if recall is None else f"{recall:.0%}"
+        retention_text = "n/a" if retention is None else f"{retention:.0%}"
+        print(f"🔎 Step {state.global_step}/{state.max_steps}: new-fact recall {recall_text}, "
+              f"stable retention {retention_text}")
+        state.log_history.append({"step": state.global_step, "fact_recall": recall, "fact_retention": retention})
+        if not passed:
+            return
+
+        elapsed = time.time() - self.start_time
+        self.stopped_at_step = state.global_step
+        self.saved_steps = state.max_steps - state.global_step
+        self.saved_seconds = self.saved_steps * (elapsed - self.check_seconds) / state.global_step
+        print(f"🛑 Early stop at step {state.global_step}/{state.max_steps} (epoch {state.epoch:.2f}): "
+              f"saved {self.saved_steps} steps ({self.saved_steps / state.max_steps:.0%} of the run, "
+              f"~{self.saved_seconds:.0f}s); recall checks took {self.check_seconds:.1f}s")
+        control.should_training_stop = True
+
+
+def early_stopping_callbacks(tokenizer, data_file):
+    """The callbacks list for a trainer: fact-recall early stopping when enabled and `data_file` has facts."""
+    if not cfg.EARLY_STOPPING or not os.path.isfile(data_file):
+        return []
+    probes = fact_probes(data_file)
+    return [FactRecallEarlyStoppingCallback(tokenizer, probes)] if probes else []
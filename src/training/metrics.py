@@ -0,0 +1,149 @@
+"""
+Training Metrics
+Per-step throughput and resource records (wall time, tokens/sec, samples/sec,
+padding, data-loader wait, peak GPU/CPU memory) written as JSONL next to the
+saved model version. `run_training_metrics.py` summarizes and compares runs.
+"""
+
+import os
+import json
+import time
+import resource
+import torch
+from transformers import TrainerCallback
+from config import model_config as cfg
+from src.training.distributed import world_size, sum_across_ranks
+
+
+def metrics_file(model_path):
+    """The metrics JSONL of a saved model version."""
+    return os.path.join(model_path, cfg.TRAINING_METRICS_FILE)
+
+
+def _peak_cpu_mb():
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024  # KB on Linux
+
+
+def batch_token_counts(inputs):
+    """
+    (processed tokens, real tokens, samples) of one collated batch.
+
+    Padded batches count real tokens from the attention mask; packed batches
+    (one flattened row, no mask) are all real, with a sample per position_ids restart.
+    """
+    input_ids = inputs["input_ids"]
+    processed = input_ids.numel()
+    if inputs.get("attention_mask") is not None:
+        return processed, int(inputs["attention_mask"].sum()), input_ids.shape[0]
+    if inputs.get("position_ids") is not None:
+        return processed, processed, int((inputs["position_ids"] == 0).sum())
+    return processed, processed, input_ids.shape[0]
+
+
+class StepCounters:
+    """Token / sample counts and data-loader wait time accumulated between two optimizer steps."""
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        values = getattr(self, "values", None)
+        self.values = {"data_wait_seconds": 0.0, "tokens": 0, "real_tokens": 0, "samples": 0}
+        return values
+
+    def add_batch(self, inputs, data_wait_seconds):
+        processed, real, samples = batch_token_counts(inputs)
+        self.values["tokens"] += processed
+        self.values["real_tokens"] += real
+        self.values["samples"] += samples
+        self.values["data_wait_seconds"] += data_wait_seconds
+
+
+class TrainingMetricsCallback(TrainerCallback):
+    """
+    Appends one record per optimizer step to `path` ("run" header first,
+    "summary" last). Token and data-wait counts are collected by the trainer
+    (`WeightedSFTTrainer.step_counters`) and reset here every step.
+
+    In a data-parallel run token / sample counts are summed over all ranks
+    (data wait is the mean) and only rank 0 writes; memory is rank 0's.
+    """
+
+    def __init__(self, trainer, path):
+        self.trainer = trainer
+        self.path = path
+        self.file = None
+        self.totals = {}
+
+    def _write(self, record):
+        self.file.write(json.dumps(record) + "\n")
+
+    def on_train_begin(self, args, state, control, **kwargs):
+        self.trainer.step_counters.reset()
+        self.step_start = time.perf_counter()
+        if not state.is_world_process_zero:
+            return
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        # A run resumed from a checkpoint continues its file
+        self.file = open(self.path, 'a' if state.global_step else 'w', buffering=1)
+        cuda = torch.cuda.is_available()
+        if cuda:
+            torch.cuda.reset_peak_memory_stats()
+        self._write({
+            "type": "run",
+            "started_at": time.time(),
+            "device": torch.cuda.get_device_name() if cuda else "cpu",
+            "gpu_total_mb": torch.cuda.get_device_properties(0).total_memory / 2**20 if cuda else None,
+            "batching": getattr(self.trainer, "batching", "padded"),
+            "batch_size": args.per_device_train_batch_size,
+            "gradient_accumulation_steps": args.gradient_accumulation_steps,
+            "world_size": world_size(),
+            "max_steps": state.max_steps,
+        })
+        self.totals = {"steps": 0, "seconds": 0.0, "data_wait_seconds": 0.0, "tokens": 0, "real_tokens": 0,
+                       "samples": 0, "gpu_peak_mb": 0.0 if cuda else None}
+
+    def on_step_end(self, args, state, control, **kwargs):
+        now = time.perf_counter()
+        seconds, self.step_start = now - self.step_start, now
+        # Collective: every rank takes part, only rank 0 records
+        counters = sum_across_ranks(self.trainer.step_counters.reset())
+        counters["data_wait_seconds"] /= world_size()
+        if self.file is None:
+            return
+
+        gpu_peak_mb = None
+        if torch.cuda.is_available():
+            gpu_peak_mb = torch.cuda.max_memory_allocated() / 2**20
+            torch.cuda.reset_peak_memory_stats()
+            self.totals["gpu_peak_mb"] = max(self.totals["gpu_peak_mb"], gpu_peak_mb)
+
+        self._write({
+            "type": "step",
+            "step": state.global_step,
+            "epoch": state.epoch,
+            "seconds": seconds,
+            "data_wait_seconds": counters["data_wait_seconds"],
+            "tokens": counters["tokens"],
+            "real_tokens": counters["real_tokens"],
+            "samples": counters["samples"],
+            "tokens_per_second": counters["real_tokens"] / seconds,
+            "samples_per_second": counters["samples"] / seconds,
+            "padding_ratio": 1 - counters["real_tokens"] / counters["tokens"] if counters["tokens"] else 0.0,
+            "gpu_peak_mb": gpu_peak_mb,
+            "cpu_peak_mb": _peak_cpu_mb(),
+        })
+        self.totals["steps"] += 1
+        self.totals["seconds"] += seconds
+        for key in ("data_wait_seconds", "tokens", "real_tokens", "samples"):
+            self.totals[key] += counters[key]
+
+    def on_train_end(self, args, state, control, **kwargs):
+        if self.file is None:
+            return
+        totals = self.totals
+        self._write({"type": "summary", **totals, "cpu_peak_mb": _peak_cpu_mb(),
+                     "tokens_per_second": totals["real_tokens"] / totals["seconds"] if totals["seconds"] else 0.0})
+        self.file.close()
+        self.file = None
+        print(f"📈 Training metrics ({totals['steps']} steps) written to {self.path}")
@@ -3,22 +3,32 @@ Model Trainer
 Handles model training and saving
 """
 
+import os
 import torch
 import time
 import json
-from trl import SFTTrainer
+from datasets import IterableDataset
 from transformers import TrainingArguments
 from config import model_config as cfg
+from src.model.adapter_loader import save_adapter, save_optimizer_state
+from src.export.shard_merge import folder_size
+from src.training.weighted_trainer import WeightedSFTTrainer
+from src.training.batching import resolve_batching, report_throughput
+from src.training.early_stopping import early_stopping_callbacks
+from src.training.metrics import metrics_file
+from src.training.distributed import world_size, is_main_process
 
 
-def train_model(model, tokenizer, new_dataset):
+def train_model(model, tokenizer, new_dataset, optimizer_state=None):
     """
     Train the model using SFTTrainer.
 
     Args:
         model: Model with LoRA adapters
         tokenizer: Model tokenizer
-        new_dataset: Prepared training dataset
+        new_dataset: Prepared training dataset (`text` + optional `weight` column),
+            or a streamed IterableDataset (trained for `cfg.MAX_STEPS` steps)
+        optimizer_state: Previous run's optimizer state file (continual training)
 
     Returns:
         SFTTrainer: Trained trainer object
@@ -32,6 +42,8 @@ def train_model(model, tokenizer, new_dataset):
         output_dir=cfg.TRAINING_OUTPUT_DIR,
         per_device_train_batch_size=cfg.BATCH_SIZE,
         num_train_epochs=cfg.NUM_EPOCHS,
+        # A streamed dataset has no length, so its run length is a step count
+        max_steps=cfg.MAX_STEPS if isinstance(new_dataset, IterableDataset) else -1,
         learning_rate=cfg.LEARNING_RATE,
         logging_steps=cfg.LOGGING_STEPS,
         save_strategy=cfg.SAVE_STRATEGY,
@@ -43,18 +55,33 @@ def train_model(model, tokenizer, new_dataset):
         warmup_steps=cfg.WARMUP_STEPS,
         report_to=cfg.REPORT_TO,
         max_grad_norm=cfg.MAX_GRAD_NORM,
+        # Data-parallel launch (see src.training.distributed); only LoRA weights train, all get gradients
+        ddp_backend=cfg.DISTRIBUTED_BACKEND,
+        ddp_find_unused_parameters=False,
     )
-
-    # Create Unsloth trainer
-    trainer = SFTTrainer(
-        model=model,
-        tokenizer=tokenizer,
-        train_dataset=new_dataset,
-        dataset_text_field="text",
-        max_seq_length=cfg.MAX_SEQ_LENGTH,
-        args=training_args,
-        packing=False,
-    )
+    if world_size() > 1:
+        print(f"--- Data-parallel training on {world_size()} processes "
+              f"(global batch {cfg.BATCH_SIZE * world_size()}) ---")
+
+    # Create Unsloth trainer (weights are expanded by the sampler, not on disk)
+    # Rank 0 fills the token cache first, the other ranks then read it
+    with training_args.main_process_first(desc="training data preparation"):
+        trainer = WeightedSFTTrainer(
+            model=model,
+            tokenizer=tokenizer,
+            train_dataset=new_dataset,
+            dataset_text_field="text",
+            max_seq_length=cfg.MAX_SEQ_LENGTH,
+            args=training_args,
+            packing=False,
+            token_cache_dir=cfg.TOKEN_CACHE_DIR if cfg.USE_TOKEN_CACHE else None,
+            batching=resolve_batching(model),
+            optimizer_state=optimizer_state,
+            # Stops once the facts in the training file are recalled (cfg.EARLY_STOPPING)
+            callbacks=early_stopping_callbacks(tokenizer, cfg.DATA_FOR_FINETUNING_FILE),
+            # Per-step throughput / memory, kept next to the new version
+            metrics_file=metrics_file(cfg.NEW_MODEL_SAVE_PATH) if cfg.TRAINING_METRICS else None,
+        )
 
     # Start training
     print("\n--- Starting Unsloth fine-tuning... ---")
@@ -64,27 +91,38 @@ def train_model(model, tokenizer, new_dataset):
 
     elapsed = time.time() - start_time
     print(f"\nTraining complete in {elapsed/60:.1f} minutes!")
+    report_throughput(trainer, elapsed)
     print("Cell 9: Fine-tuning finished.")
 
     return trainer
 
 
-def save_model(model, tokenizer):
+def save_model(model, tokenizer, trainer=None):
     """
     Save the trained model and update config file.
+    With a trainer, its optimizer state is kept for the next continual run.
+    In a data-parallel run only rank 0 writes (the replicas hold the same weights).
     """
+    if not is_main_process():
+        return
+
     print("\n" + "="*80)
-    print(f"CELL 10: SAVING NEW MERGED MODEL to {cfg.NEW_MODEL_SAVE_PATH} (v{cfg.NEW_VERSION})...")
+    print(f"CELL 10: SAVING NEW MODEL to {cfg.NEW_MODEL_SAVE_PATH} (v{cfg.NEW_VERSION})...")
     print("="*80)
 
-    # Save with Unsloth
-    model.save_pretrained_merged(
-        cfg.NEW_MODEL_SAVE_PATH,
-        tokenizer,
-        save_method="merged_16bit",
-    )
+    # The LoRA adapter is enough to load the version; merged weights only with MERGE_VERSIONS="sync"
+    if cfg.MERGE_VERSIONS == "sync":
+        model.save_pretrained_merged(
+            cfg.NEW_MODEL_SAVE_PATH,
+            tokenizer,
+            save_method="merged_16bit",
+        )
 
-    print(f"Model saved to {cfg.NEW_MODEL_SAVE_PATH}")
+    save_adapter(model, tokenizer, cfg.NEW_MODEL_SAVE_PATH)
+    if trainer is not None:
+        save_optimizer_state(trainer, cfg.NEW_MODEL_SAVE_PATH)
+
+    print(f"Model saved to {cfg.NEW_MODEL_SAVE_PATH} ({folder_size(cfg.NEW_MODEL_SAVE_PATH) / 2**20:.0f} MB)")
 
     # DYNAMIC PATH LOGIC
 
@@ -100,4 +138,10 @@ def save_model(model, tokenizer):
     except Exception as e:
         print(f"Warning: Could not save new model config file. You will need to update manually next time. Error: {e}")
 
+    if cfg.MERGE_VERSIONS == "background":
+        from src.serving.storage import LocalStorage
+        from src.serving.merge_job import launch_local_merge
+
+        launch_local_merge(LocalStorage(os.getcwd()), cfg.NEW_MODEL_SAVE_PATH)
+
     print("\nALL DONE! You can now restart and the notebook will *automatically* use this new model.")
@@ -0,0 +1,177 @@
+"""
+Weighted Trainer
+Expands per-record `weight` values virtually at training time, so a fact stored
+once with weight 500 is seen exactly as often as 500 identical lines used to be.
+"""
+
+import time
+import torch
+from torch.utils.data import Sampler
+from datasets import Dataset
+from trl import SFTTrainer
+from config import model_config as cfg
+
+
+class RepeatWeightedSampler(Sampler):
+    """
+    Yields every dataset index `weight` times per epoch, in a fresh shuffled order.
+    Same multiset of samples as the old expanded file, without storing the copies.
+    """
+
+    def __init__(self, weights, seed=0):
+        self.weights = torch.as_tensor([int(w) for w in weights], dtype=torch.long)
+        self.seed = seed
+        self.epoch = 0
+
+    def __len__(self):
+        return int(self.weights.sum())
+
+    def set_epoch(self, epoch):
+        self.epoch = epoch
+
+    def _shuffled(self):
+        generator = torch.Generator()
+        generator.manual_seed(self.seed + self.epoch)
+        self.epoch += 1
+
+        indices = torch.repeat_interleave(torch.arange(len(self.weights)), self.weights)
+        return indices[torch.randperm(len(indices), generator=generator)], generator
+
+    def __iter__(self):
+        return iter(self._shuffled()[0].tolist())
+
+
+class LengthGroupedWeightedSampler(RepeatWeightedSampler):
+    """
+    Same samples as RepeatWeightedSampler, but each window of
+    `batch_size * megabatch` shuffled samples is sorted by token length, so a
+    batch holds similar lengths (little padding). Batch order is shuffled again.
+    """
+
+    def __init__(self, weights, lengths, batch_size, seed=0, megabatch=cfg.LENGTH_GROUP_MEGABATCH):
+        super().__init__(weights, seed)
+        self.lengths = torch.as_tensor(lengths, dtype=torch.long)
+        self.batch_size = batch_size
+        self.megabatch = megabatch
+
+    def __iter__(self):
+        indices, generator = self._shuffled()
+        batches = []
+        for window in indices.split(self.batch_size * self.megabatch):
+            window = window[torch.argsort(self.lengths[window], descending=True, stable=True)]
+            batches.extend(window.split(self.batch_size))
+        order = torch.randperm(len(batches), generator=generator)
+        return iter(torch.cat([batches[i] for i in order]).tolist() if batches else [])
+
+
+class WeightedSFTTrainer(SFTTrainer):
+    """
+    SFTTrainer that reads (and drops) the dataset's `weight` column and samples
+    with RepeatWeightedSampler. Datasets without weights train as before.
+
+    With `token_cache_dir` the `text` column is swapped for cached `input_ids`
+    (see `src.data.token_cache`) and SFTTrainer's own tokenization is skipped.
+    Pre-tokenized data can then be packed or length-grouped (`batching`, see
+    `src.training.batching`) with an effective max_seq_length taken from the
+    token-length distribution.
+
+    `optimizer_state` (continual training) restores the previous run's
+    optimizer moments; learning rate and schedule come from this run's args.
+
+    `metrics_file` records per-step throughput and memory there (see
+    `src.training.metrics`); tokens and data-loader wait are counted as
+    batches are fetched.
+    """
+
+    def __init__(self, *args, train_dataset=None, token_cache_dir=None, batching="padded", optimizer_state=None,
+                 metrics_file=None, **kwargs):
+        column_names = (train_dataset.column_names or []) if train_dataset is not None else []
+
+        # Only map-style datasets are pre-tokenized; streamed ones are tokenized lazily by SFTTrainer
+        if token_cache_dir is not None and isinstance(train_dataset, Dataset) and "text" in column_names:
+            from src.data.token_cache import pretokenize
+
+            train_dataset = pretokenize(train_dataset, kwargs["tokenizer"], cache_dir=token_cache_dir,
+                                        max_seq_length=kwargs.get("max_seq_length", cfg.MAX_SEQ_LENGTH))
+            kwargs["dataset_kwargs"] = {**(kwargs.get("dataset_kwargs") or {}), "skip_prepare_dataset": True}
+        elif batching != "padded":
+            print(f"--- {batching} batching needs pre-tokenized data (token cache); using padded batches ---")
+            batching = "padded"
+
+        self.batching = batching
+        self.optimizer_state = optimizer_state
+        self.sample_lengths = None
+        self.real_tokens_per_epoch = None
+        if batching != "padded":
+            train_dataset, kwargs = self._prepare_batching(train_dataset, kwargs)
+
+        self.sample_weights = None
+        if "weight" in column_names:
+            self.sample_weights = train_dataset["weight"]
+            train_dataset = train_dataset.remove_columns("weight")
+        super().__init__(*args, train_dataset=train_dataset, **kwargs)
+
+        self.step_counters = None
+        if metrics_file is not None:
+            from src.training.metrics import StepCounters, TrainingMetricsCallback
+
+            self.step_counters = StepCounters()
+            self.add_callback(TrainingMetricsCallback(self, metrics_file))
+
+    def _prepare_batching(self, train_dataset, kwargs):
+        from transformers import DataCollatorWithFlattening
+        from src.training.batching import token_lengths, effective_max_seq_length
+
+        lengths = token_lengths(train_dataset)
+        weights = train_dataset["weight"] if "weight" in train_dataset.column_names else None
+        max_length = effective_max_seq_length(lengths, weights, ceiling=kwargs.get("max_seq_length", cfg.MAX_SEQ_LENGTH))
+        if lengths.max(initial=0) > max_length:
+            train_dataset = train_dataset.map(
+                lambda batch: {"input_ids": [ids[:max_length] for ids in batch["input_ids"]]}, batched=True
+            )
+            lengths = lengths.clip(max=max_length)
+        kwargs["max_seq_length"] = max_length
+
+        if self.batching == "packed":
+            # One flattened row per batch; position_ids restart at every sample boundary
+            kwargs["data_collator"] = DataCollatorWithFlattening()
+        self.sample_lengths = lengths
+        self.real_tokens_per_epoch = int((lengths * (weights if weights is not None else 1)).sum())
+        print(f"--- Batching: {self.batching}, effective max_seq_length {max_length} "
+              f"(p{cfg.AUTO_MAX_SEQ_LENGTH_PERCENTILE} of {len(lengths)} samples, longest {lengths.max(initial=0)}) ---")
+        return train_dataset, kwargs
+
+    def create_optimizer(self, *args, **kwargs):
+        optimizer = super().create_optimizer(*args, **kwargs)
+        if self.optimizer_state is None:
+            return optimizer
+
+        hyperparameters = [{k: v for k, v in group.items() if k != "params"} for group in optimizer.param_groups]
+        try:
+            optimizer.load_state_dict(torch.load(self.optimizer_state, map_location="cpu"))
+            for group, fresh in zip(optimizer.param_groups, hyperparameters):
+                group.pop("initial_lr", None)
+                group.update(fresh)
+            print(f"--- Restored optimizer state from {self.optimizer_state} ---")
+        except (ValueError, KeyError, RuntimeError) as e:
+            print(f"Warning: Could not restore optimizer state from {self.optimizer_state}. "
+                  f"Starting with a fresh optimizer. Error: {e}")
+        self.optimizer_state = None
+        return optimizer
+
+    def get_batch_samples(self, *args, **kwargs):
+        start = time.perf_counter()
+        batch_samples, num_items_in_batch = super().get_batch_samples(*args, **kwargs)
+        if self.step_counters is not None:
+            data_wait = time.perf_counter() - start
+            for i, inputs in enumerate(batch_samples):
+                self.step_counters.add_batch(inputs, data_wait if i == 0 else 0.0)
+        return batch_samples, num_items_in_batch
+
+    def _get_train_sampler(self, *args, **kwargs):
+        if self.sample_weights is None:
+            return super()._get_train_sampler(*args, **kwargs)
+        if self.batching == "group_by_length":
+            return LengthGroupedWeightedSampler(self.sample_weights, self.sample_lengths,
+                                                self.args.per_device_train_batch_size, seed=self.args.seed)
+        return RepeatWeightedSampler(self.sample_weights, seed=self.args.seed)
@@ -4,14 +4,14 @@ Main validator that orchestrates the fact-checking pipeline
 """
 
 import torch
-import json
 import os
+import time
 import random
-import pandas as pd
 from config import model_config as cfg
 from src.validator.web_search import get_web_answer
 from src.validator.llm_judge import get_clean_fact_from_web, is_answer_outdated_llm_judge
-from src.data.generator import create_training_samples
+from src.data.augmentation import generate_question_variants
+from src.data.fact_store import FactStore, VERDICT_STABLE, VERDICT_OUTDATED
 
 
 def get_model_answer(question, validator_model, validator_tokenizer):
@@ -22,7 +22,7 @@ def get_model_answer(question, validator_model, validator_tokenizer):
         tokenize=False,
         add_generation_prompt=True
     )
-    inputs = validator_tokenizer(prompt, return_tensors="pt").to("cuda")
+    inputs = validator_tokenizer(prompt, return_tensors="pt").to(validator_model.device)
     with torch.no_grad():
         outputs = validator_model.generate(
             **inputs,
@@ -35,36 +35,41 @@ def get_model_answer(question, validator_model, validator_tokenizer):
     return answer.strip()
 
 
-def trigger_update_pipeline(question, already_extracted_fact, num_samples):
-    """Saves the new, correct Q&A pair to our training file."""
+def trigger_update_pipeline(question, already_extracted_fact, num_samples, judge_confidence=None):
+    """Saves the new, correct Q&A pair to our fact store (replacing any older answer)."""
     print(f"\n---  TRIGGERING UPDATE --- ")
 
-    new_samples = create_training_samples(question, already_extracted_fact, num_samples)
-
     try:
-        with open(cfg.DATA_FOR_FINETUNING_FILE, 'a') as f:
-            for sample in new_samples:
-                f.write(json.dumps(sample) + "\n")
-        print(f"{len(new_samples)} NEW facts saved to {cfg.DATA_FOR_FINETUNING_FILE}")
+        FactStore().upsert(question, already_extracted_fact, VERDICT_OUTDATED, num_samples,
+                           judge_confidence=judge_confidence)
+        print(f"NEW fact saved to {cfg.FACT_STORE_FILE} ({num_samples} samples)")
     except Exception as e:
         print(f"Error saving new fact: {e}")
 
 
-def trigger_save_stable_fact(question, stable_answer, num_samples):
-    """Saves the model's OWN correct answer to the training file."""
+def trigger_save_stable_fact(question, stable_answer, num_samples, judge_confidence=None):
+    """Saves the model's OWN correct answer to the fact store."""
     print(f"\n---  SAVING STABLE FACT --- ")
 
-    new_samples = create_training_samples(question, stable_answer, num_samples)
-
     try:
-        with open(cfg.DATA_FOR_FINETUNING_FILE, 'a') as f:
-            for sample in new_samples:
-                f.write(json.dumps(sample) + "\n")
-        print(f"{len(new_samples)} STABLE facts saved to {cfg.DATA_FOR_FINETUNING_FILE}")
+        FactStore().upsert(question, stable_answer, VERDICT_STABLE, num_samples,
+                           judge_confidence=judge_confidence)
+        print(f"STABLE fact saved to {cfg.FACT_STORE_FILE} ({num_samples} samples)")
     except Exception as e:
         print(f"Error saving stable fact: {e}")
 
 
+def export_training_data(since, validator_model=None, validator_tokenizer=None):
+    """
+    Write the facts judged since `since` to the training file.
+
+    Returns:
+        tuple: (facts exported, total weighted samples)
+    """
+    return FactStore().export_training_file(cfg.DATA_FOR_FINETUNING_FILE, since=since,
+                                            model=validator_model, tokenizer=validator_tokenizer)
+
+
 def run_chatbot_check(user_question, validator_model, validator_tokenizer):
     """
     Runs the full validation pipeline using a 3-step check.
@@ -92,15 +97,17 @@ def run_chatbot_check(user_question, validator_model, validator_tokenizer):
         print(f"SKIPPED JUDGEMENT: Extractor found no answer in web snippet.")
         return False
 
-    # 5. Step 3: Fact-Check - call the LLM-as-a-Judge
-    if is_answer_outdated_llm_judge(model_answer, extracted_web_fact, validator_model, validator_tokenizer):
+    # 5. Step 3: Fact-Check - call the LLM-as-a-Judge (its confidence feeds the sample scheduler)
+    is_outdated, confidence = is_answer_outdated_llm_judge(model_answer, extracted_web_fact, validator_model,
+                                                           validator_tokenizer, return_confidence=True)
+    if is_outdated:
         # 6. If outdated, trigger update *with the NEW (larger) sample count*
-        trigger_update_pipeline(user_question, extracted_web_fact, cfg.NUM_SAMPLES_NEW)
+        trigger_update_pipeline(user_question, extracted_web_fact, cfg.NUM_SAMPLES_NEW, confidence)
         return True
     else:
         # 7. If up-to-date, save this stable fact *with the STABLE (smaller) sample count*
         print("Model answer is up-to-date.")
-        trigger_save_stable_fact(user_question, model_answer, cfg.NUM_SAMPLES_STABLE)
+        trigger_save_stable_fact(user_question, model_answer, cfg.NUM_SAMPLES_STABLE, confidence)
         return False
 
 
@@ -110,8 +117,9 @@ def run_validation_test(validator_model, validator_tokenizer, all_questions):
     Returns the count of updates triggered.
     """
     print(f"--- STARTING 20-QUESTION VALIDATOR TEST ---")
+    cycle_start = time.time()
 
-    # Clear old data file
+    # Clear old data file (the fact store keeps the history)
     if os.path.exists(cfg.DATA_FOR_FINETUNING_FILE):
         os.remove(cfg.DATA_FOR_FINETUNING_FILE)
         print(f"Removed old data file '{cfg.DATA_FOR_FINETUNING_FILE}' to start fresh.\n")
@@ -122,6 +130,10 @@ def run_validation_test(validator_model, validator_tokenizer, all_questions):
     shuffled_questions = all_questions.copy()
     random.shuffle(shuffled_questions)
 
+    # Paraphrase every question in one batched call up front; per-fact saves then hit the cache
+    if cfg.AUGMENTATION_USE_LLM:
+        generate_question_variants(shuffled_questions, model=validator_model, tokenizer=validator_tokenizer)
+
     update_count = 0
 
     for i, question in enumerate(shuffled_questions):
@@ -137,10 +149,12 @@ def run_validation_test(validator_model, validator_tokenizer, all_questions):
     print(f"Facts Identified as UP-TO-DATE: {len(shuffled_questions) - update_count}")
     print(f"Facts Identified as OUTDATED (and saved for training): {update_count}")
 
-    if os.path.exists(cfg.DATA_FOR_FINETUNING_FILE):
-        df = pd.read_json(cfg.DATA_FOR_FINETUNING_FILE, lines=True)
-        print(f"\nSuccessfully created '{cfg.DATA_FOR_FINETUNING_FILE}' with {len(df)} total training samples.")
+    num_facts, total_samples = export_training_data(cycle_start, validator_model, validator_tokenizer)
+    if num_facts:
+        print(f"\nSuccessfully created '{cfg.DATA_FOR_FINETUNING_FILE}' with {total_samples} total training samples "
+              f"({num_facts} facts; {FactStore().count()} unique facts in {cfg.FACT_STORE_FILE}).")
     else:
+        os.remove(cfg.DATA_FOR_FINETUNING_FILE)
         print(f"\nNo facts were found to be outdated or stable. No training file was created.")
 
     return update_count
@@ -37,7 +37,7 @@ def get_clean_fact_from_web(context, question, validator_model, validator_tokeni
         add_generation_prompt=True
     )
 
-    inputs = validator_tokenizer(prompt, return_tensors="pt").to("cuda")
+    inputs = validator_tokenizer(prompt, return_tensors="pt").to(validator_model.device)
 
     with torch.no_grad():
         outputs = validator_model.generate(
@@ -55,10 +55,28 @@ def get_clean_fact_from_web(context, question, validator_model, validator_tokeni
     return clean_fact
 
 
-def is_answer_outdated_llm_judge(model_answer, extracted_web_fact, validator_model, validator_tokenizer):
+def _decision_confidence(first_step_logits, tokenizer, said_yes):
+    """Probability of the judge's YES/NO decision, renormalized over the two answers."""
+    probs = torch.softmax(first_step_logits.float(), dim=-1)
+
+    def answer_prob(word):
+        ids = {tokenizer.encode(variant, add_special_tokens=False)[0] for variant in (word, f" {word}", word.capitalize())}
+        return max(probs[i].item() for i in ids)
+
+    p_yes, p_no = answer_prob("YES"), answer_prob("NO")
+    if p_yes + p_no == 0:
+        return None
+    return (p_yes if said_yes else p_no) / (p_yes + p_no)
+
+
+def is_answer_outdated_llm_judge(model_answer, extracted_web_fact, validator_model, validator_tokenizer,
+                                 return_confidence=False):
     """
     Uses the validator_model itself to judge if the model's answer
     matches the web-extracted fact.
+
+    With `return_confidence=True` returns `(is_outdated, confidence)`, where
+    confidence is the judge's probability for its decision (from the first token's logits).
     """
     print(f"--- 1. Comparing answers (LLM-as-a-Judge)...")
     print(f"Model Answer: '{model_answer}'")
@@ -84,7 +102,7 @@ def is_answer_outdated_llm_judge(model_answer, extracted_web_fact, validator_mod
         add_generation_prompt=True
     )
 
-    inputs = validator_tokenizer(prompt, return_tensors="pt").to("cuda")
+    inputs = validator_tokenizer(prompt, return_tensors="pt").to(validator_model.device)
 
     with torch.no_grad():
         outputs = validator_model.generate(
@@ -92,17 +110,22 @@ def is_answer_outdated_llm_judge(model_answer, extracted_web_fact, validator_mod
             max_new_tokens=cfg.JUDGE_MAX_NEW_TOKENS,
             temperature=cfg.GENERATION_TEMPERATURE,
             do_sample=cfg.GENERATION_DO_SAMPLE,
+            output_scores=return_confidence,
+            return_dict_in_generate=return_confidence,
         )
 
-    generated_ids = outputs[0][len(inputs.input_ids[0]):]
+    sequences = outputs.sequences if return_confidence else outputs
+    generated_ids = sequences[0][len(inputs.input_ids[0]):]
     decision = validator_tokenizer.decode(generated_ids, skip_special_tokens=True)
     decision = decision.strip().upper().strip('."').strip()
 
     print(f"Judge's Decision (Raw): '{decision}'")
 
-    if decision.startswith("YES"):
-        print("Judge's Decision (Parsed): YES")
-        return False  # Not outdated
-    else:
-        print("Judge's Decision (Parsed): NO")
-        return True  # Is outdated
+    is_outdated = not decision.startswith("YES")
+    print(f"Judge's Decision (Parsed): {'NO' if is_outdated else 'YES'}")
+
+    if not return_confidence:
+        return is_outdated
+    confidence = _decision_confidence(outputs.scores[0][0], validator_tokenizer, said_yes=not is_outdated)
+    print(f"Judge's Confidence: {confidence if confidence is None else f'{confidence:.2f}'}")
+    return is_outdated, confidence
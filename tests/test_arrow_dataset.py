@@ -0,0 +1,49 @@
+"""
+sync_from_jsonl: incremental conversion of the training JSONL into Arrow shards.
+"""
+
+import os
+import json
+from src.data.arrow_dataset import sync_from_jsonl, shard_paths, load_arrow_dataset, _read_metadata
+
+
+def append(path, texts, partial=None):
+    with open(path, 'a') as f:
+        f.write("".join(json.dumps({"text": t, "weight": 2}) + "\n" for t in texts))
+        if partial:
+            f.write(partial)
+
+
+def test_only_appended_lines_are_converted(tmp_path):
+    path = str(tmp_path / "data.jsonl")
+    append(path, ["a", "b", "c"])
+    directory = sync_from_jsonl(path, chunk_rows=2)
+    assert len(shard_paths(directory)) == 2
+
+    # A half-written line is left for the next sync
+    append(path, ["d"], partial='{"text": "e"')
+    sync_from_jsonl(path, chunk_rows=2)
+    assert _read_metadata(directory)["source"]["offset"] < os.path.getsize(path)
+    with open(path, 'a') as f:
+        f.write(', "weight": 1}\n')
+    sync_from_jsonl(path, chunk_rows=2)
+
+    shards = shard_paths(directory)
+    assert len(shards) == 4
+    dataset = load_arrow_dataset(directory)
+    assert dataset["text"] == ["a", "b", "c", "d", "e"]
+    assert dataset["weight"] == [2, 2, 2, 2, 1]
+
+    assert sync_from_jsonl(path) == directory
+    assert shard_paths(directory) == shards  # Up to date: nothing converted
+
+
+def test_replaced_file_is_rebuilt(tmp_path):
+    path = str(tmp_path / "data.jsonl")
+    append(path, ["a", "b"])
+    directory = sync_from_jsonl(path)
+
+    os.remove(path)
+    append(path, ["x", "y"])
+    sync_from_jsonl(path)
+    assert load_arrow_dataset(directory)["text"] == ["x", "y"]
@@ -0,0 +1,45 @@
+"""
+Length-grouped batching: LengthGroupedWeightedSampler and the effective
+max_seq_length derived from the token-length distribution.
+"""
+
+from collections import Counter
+from src.training.batching import effective_max_seq_length
+from src.training.weighted_trainer import LengthGroupedWeightedSampler, RepeatWeightedSampler
+
+
+def test_effective_max_seq_length_is_a_weighted_percentile():
+    lengths = [10, 20, 30, 200]
+    assert effective_max_seq_length(lengths, percentile=75, ceiling=512) == 32
+    # The long sample carries most of the weight, so the percentile reaches it
+    assert effective_max_seq_length(lengths, weights=[1, 1, 1, 97], percentile=50, ceiling=512) == 200
+    assert effective_max_seq_length(lengths, percentile=100, ceiling=128) == 128
+    assert effective_max_seq_length([], ceiling=256) == 256
+
+
+def test_length_grouped_sampler_keeps_the_weighted_samples():
+    weights, lengths = [3, 1, 4, 2, 5, 1], [50, 10, 40, 30, 20, 60]
+    sampler = LengthGroupedWeightedSampler(weights, lengths, batch_size=2, seed=3, megabatch=2)
+    indices = list(sampler)
+    assert len(indices) == len(sampler) == 16
+    assert Counter(indices) == Counter(RepeatWeightedSampler(weights, seed=3))
+
+
+def test_batches_within_a_window_are_sorted_by_length():
+    lengths = list(range(40))
+    sampler = LengthGroupedWeightedSampler([1] * 40, lengths, batch_size=4, seed=0, megabatch=10)
+    indices = list(sampler)
+    # One window holds every sample: each batch is 4 consecutive lengths
+    batches = [indices[i:i + 4] for i in range(0, 40, 4)]
+    assert all(max(b) - min(b) == 3 for b in batches)
+
+
+def test_order_depends_only_on_seed_and_epoch():
+    args = ([2, 3, 1, 4], [5, 9, 7, 3], 2)
+    first = LengthGroupedWeightedSampler(*args, seed=5)
+    epochs = [list(first), list(first)]
+    second = LengthGroupedWeightedSampler(*args, seed=5)
+    second.set_epoch(1)
+    assert list(second) == epochs[1]
+    second.set_epoch(0)
+    assert list(second) == epochs[0]
@@ -0,0 +1,45 @@
+"""
+FactStore: upserts keyed by normalized question, history counters and the
+trigger-maintained fact count.
+"""
+
+import pytest
+from contextlib import closing
+from src.data.fact_store import FactStore
+
+
+@pytest.fixture
+def store(tmp_path):
+    return FactStore(str(tmp_path / "facts.sqlite3"))
+
+
+def test_rephrased_question_updates_the_same_fact(store):
+    store.upsert("Who is the CEO of X?", "Alice", "outdated", 500, model_version=1, judge_confidence=0.9)
+    store.upsert("who is the ceo of x", "Bob", "stable", 100, model_version=1)
+
+    fact = store.get("WHO is the CEO of X")
+    assert store.count() == 1
+    assert (fact["answer"], fact["verdict"], fact["num_samples"]) == ("Bob", "stable", 100)
+    assert (fact["times_seen"], fact["times_outdated"]) == (2, 1)
+    assert fact["judge_confidence"] is None
+
+
+def test_still_wrong_after_a_retrained_version(store):
+    store.upsert("Q?", "A", "outdated", 500, model_version=1)
+    store.upsert("Q?", "A", "outdated", 500, model_version=1)
+    assert store.get("Q?")["still_wrong"] == 0
+    store.upsert("Q?", "A", "outdated", 500, model_version=2)
+    assert store.get("Q?")["still_wrong"] == 1
+    store.upsert("Q?", "A", "stable", 100, model_version=3)
+    assert store.get("Q?")["still_wrong"] == 0
+
+
+def test_count_follows_inserts_and_deletes(store):
+    for i in range(5):
+        store.upsert(f"Question {i}?", "A", "stable", 100)
+    store.upsert("Question 0?", "B", "stable", 100)
+    assert store.count() == 5
+
+    with closing(store._connect()) as conn, conn:
+        conn.execute("DELETE FROM facts WHERE key = ?", ("question 3",))
+    assert store.count() == 4 == len(store.facts())
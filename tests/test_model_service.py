@@ -0,0 +1,45 @@
+"""
+ModelService request path with an adapter-only version (a PeftModel whose only
+adapter is "default", as loaded from `model_load_path`) in merged serving mode.
+"""
+
+import pytest
+import torch
+
+peft = pytest.importorskip("peft")
+from tokenizers import Tokenizer, models, pre_tokenizers
+from transformers import PreTrainedTokenizerFast, Qwen2Config, Qwen2ForCausalLM
+from src.serving.storage import LocalStorage
+from src.serving.model_service import ModelService, ActiveModel
+
+
+def tiny_tokenizer():
+    words = ["[UNK]", "[EOS]", "who", "won", "the", "cup", "?"]
+    tokenizer = Tokenizer(models.WordLevel({w: i for i, w in enumerate(words)}, unk_token="[UNK]"))
+    tokenizer.pre_tokenizer = pre_tokenizers.Whitespace()
+    tokenizer = PreTrainedTokenizerFast(tokenizer_object=tokenizer, unk_token="[UNK]", eos_token="[EOS]")
+    tokenizer.chat_template = "{% for m in messages %}{{ m['content'] }} {% endfor %}"
+    return tokenizer
+
+
+@pytest.fixture
+def service(tmp_path):
+    torch.manual_seed(0)
+    config = Qwen2Config(vocab_size=16, hidden_size=32, intermediate_size=64, num_hidden_layers=1,
+                         num_attention_heads=4, num_key_value_heads=2, eos_token_id=1)
+    model = peft.get_peft_model(Qwen2ForCausalLM(config), peft.LoraConfig(r=4, target_modules=["q_proj"]))
+    service = ModelService(LocalStorage(str(tmp_path)), launch_training=lambda: None, serving_mode="merged")
+    service.active = ActiveModel(model.eval(), tiny_tokenizer(), str(tmp_path / "qwen-finetuned-v1"), 1)
+    service.router.set_stable(1)
+    return service
+
+
+def test_merged_mode_serves_an_adapter_only_version(service, monkeypatch):
+    monkeypatch.setattr(service, "_validate", lambda question, answer, active: None)
+    assert service.generate_answer("who won the cup ?")["model_version"] == "v1"
+    assert service.active.model.active_adapter == "default"
+
+
+def test_merged_mode_judges_an_adapter_only_version(service):
+    with service._model_for(service.active) as loaded:
+        assert loaded
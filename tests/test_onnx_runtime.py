@@ -0,0 +1,40 @@
+"""
+OnnxGreedyModel vs. transformers greedy decoding on a tiny randomly initialised
+Qwen2 exported with `export_to_onnx` (skipped without onnxruntime / optimum).
+"""
+
+import pytest
+import torch
+
+pytest.importorskip("onnxruntime")
+pytest.importorskip("optimum.exporters.onnx")
+from transformers import Qwen2Config, Qwen2ForCausalLM
+from src.export.onnx_export import export_to_onnx
+from src.export.onnx_runtime import OnnxGreedyModel
+
+
+@pytest.fixture(scope="module")
+def exported(tmp_path_factory):
+    torch.manual_seed(0)
+    model_dir = str(tmp_path_factory.mktemp("tiny"))
+    config = Qwen2Config(vocab_size=128, hidden_size=32, intermediate_size=64, num_hidden_layers=2,
+                         num_attention_heads=4, num_key_value_heads=2, eos_token_id=127)
+    model = Qwen2ForCausalLM(config).eval()
+    model.save_pretrained(model_dir)
+    output_dir = str(tmp_path_factory.mktemp("onnx"))
+    export_to_onnx(model_dir, output_dir)
+    return model, OnnxGreedyModel(output_dir)
+
+
+def test_greedy_decoding_matches_transformers(exported):
+    model, onnx_model = exported
+    input_ids = torch.tensor([[3, 17, 42, 99, 5]])
+    expected = model.generate(input_ids, attention_mask=torch.ones_like(input_ids), max_new_tokens=12,
+                              do_sample=False, pad_token_id=0)
+    assert torch.equal(onnx_model.generate(input_ids, max_new_tokens=12), expected)
+
+
+def test_batches_are_rejected(exported):
+    _, onnx_model = exported
+    with pytest.raises(ValueError):
+        onnx_model.generate(torch.ones((2, 4), dtype=torch.long), max_new_tokens=2)
@@ -0,0 +1,46 @@
+"""
+ReplayBuffer: bounded reservoir of past facts from the processed_v* archives.
+"""
+
+import json
+from collections import Counter
+from src.data.replay_buffer import ReplayBuffer
+
+
+def test_reservoir_stays_bounded_and_unique(tmp_path):
+    buffer = ReplayBuffer(str(tmp_path / "replay.json"), capacity=10, seed=1)
+    for i in range(1000):
+        buffer.add(f"fact {i}", [{"text": str(i)}])
+    kept = buffer.facts[0]["key"]
+    buffer.add(kept, [{"text": "updated"}])  # Seen again: updated in place, not counted twice
+
+    assert len(buffer) == 10 and buffer.seen == 1000
+    assert buffer.facts[0] == {"key": kept, "records": [{"text": "updated"}]}
+    assert len({fact["key"] for fact in buffer.facts}) == 10
+
+
+def test_every_fact_is_equally_likely_to_be_kept(tmp_path):
+    kept = Counter()
+    for seed in range(400):
+        buffer = ReplayBuffer(str(tmp_path / "replay.json"), capacity=5, seed=seed)
+        for i in range(20):
+            buffer.add(i, [])
+        kept.update(fact["key"] for fact in buffer.facts)
+    # Each of the 20 facts is kept with probability 5/20, i.e. ~100 times out of 400
+    assert all(60 < kept[i] < 140 for i in range(20)), kept
+
+
+def test_ingestion_is_idempotent_and_state_survives_a_restart(tmp_path):
+    for version, questions in ((1, ["Q1?", "Q2?"]), (2, ["q1", "Q3?"])):
+        with open(tmp_path / f"data.jsonl.processed_v{version}", 'w') as f:
+            f.writelines(json.dumps({"question": q, "text": f"{q} v{version}"}) + "\n" for q in questions)
+    path = str(tmp_path / "replay.json")
+    buffer = ReplayBuffer(path, capacity=10)
+    assert buffer.ingest_archives(str(tmp_path), "data.jsonl") == 2
+    assert buffer.ingest_archives(str(tmp_path), "data.jsonl") == 0
+    buffer.save()
+
+    restored = ReplayBuffer(path, capacity=10)
+    assert len(restored) == 3 and restored.seen == 3
+    assert {f["key"]: f["records"][0]["text"] for f in restored.facts}["q1"] == "q1 v2"
+    assert sorted(f["key"] for f in restored.sample(5, exclude=["q2"])) == ["q1", "q3"]
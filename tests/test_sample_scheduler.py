@@ -0,0 +1,31 @@
+"""
+Sample Scheduler: per-fact sample counts from judge confidence and history.
+"""
+
+from config import model_config as cfg
+from src.data.sample_scheduler import fact_samples
+
+
+def fact(verdict, confidence=None, times_outdated=1, still_wrong=0):
+    return {"verdict": verdict, "judge_confidence": confidence, "times_outdated": times_outdated,
+            "still_wrong": still_wrong}
+
+
+def test_missing_confidence_keeps_the_fixed_counts():
+    assert fact_samples(fact("stable")) == cfg.NUM_SAMPLES_STABLE
+    assert fact_samples(fact("outdated")) == cfg.NUM_SAMPLES_NEW
+    assert fact_samples({"verdict": "stable"}) == cfg.NUM_SAMPLES_STABLE
+
+
+def test_confidence_scales_between_the_bounds():
+    assert fact_samples(fact("stable", 1.0)) == cfg.SCHEDULE_STABLE_MIN_SAMPLES
+    assert fact_samples(fact("stable", 0.0)) == cfg.NUM_SAMPLES_STABLE
+    assert fact_samples(fact("outdated", 0.0)) == cfg.SCHEDULE_NEW_MIN_SAMPLES
+    assert fact_samples(fact("outdated", 1.0)) == cfg.NUM_SAMPLES_NEW
+
+
+def test_history_boosts_outdated_facts():
+    base = fact_samples(fact("outdated", 0.5))
+    assert fact_samples(fact("outdated", 0.5, times_outdated=2)) > base
+    assert fact_samples(fact("outdated", 0.5, still_wrong=1)) > base
+    assert fact_samples(fact("outdated", None, times_outdated=100)) == cfg.SCHEDULE_MAX_SAMPLES_PER_FACT
@@ -0,0 +1,41 @@
+"""
+compact_segments: per-writer segments merged into the training file, keeping
+only the latest judgement of each question.
+"""
+
+import json
+from src.serving.storage import LocalStorage
+from src.serving.segments import write_segment, list_segments, compact_segments
+
+
+def record(question, variant, judged_at, verdict="outdated"):
+    return {"question": question, "text": f"{variant} -> {verdict}", "weight": 10, "verdict": verdict,
+            "judged_at": judged_at}
+
+
+def read(storage):
+    with open(storage.path("data.jsonl")) as f:
+        return [json.loads(line) for line in f]
+
+
+def test_latest_judgement_per_question_wins(tmp_path):
+    storage = LocalStorage(str(tmp_path))
+    write_segment(storage, "a", 0, [record("Who won?", "v1", 5.0), record("Who won?", "v2", 5.0)])
+    write_segment(storage, "b", 0, [record("who WON", "v1", 9.0, "stable"), record("Capital?", "v1", 1.0)])
+    write_segment(storage, "a", 1, [record("Who won?", "v1", 7.0)])
+
+    assert compact_segments(storage, "data.jsonl") == (3, 2)
+    assert list_segments(storage) == []
+    assert [(r["question"], r["judged_at"]) for r in read(storage)] == [("Capital?", 1.0), ("who WON", 9.0)]
+
+
+def test_records_of_one_judgement_are_kept_together(tmp_path):
+    storage = LocalStorage(str(tmp_path))
+    write_segment(storage, "a", 0, [record("Q?", "v1", 2.0), record("Q?", "v2", 2.0)])
+    compact_segments(storage, "data.jsonl")
+    # An older judgement from a slower writer does not replace the earlier output
+    write_segment(storage, "b", 0, [record("Q?", "v3", 1.0), record("Q?", "v1", 2.0)])
+
+    assert compact_segments(storage, "data.jsonl") == (1, 2)
+    assert [r["text"] for r in read(storage)] == ["v1 -> outdated", "v2 -> outdated"]
+    assert compact_segments(storage, "data.jsonl") == (0, 0)
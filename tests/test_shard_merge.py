@@ -0,0 +1,80 @@
+"""
+Shard-by-shard merge vs. the merge Unsloth's save_pretrained_merged performs
+(tiny random Qwen2 on CPU, bf16 base weights, adapter trained in fp16).
+"""
+
+import os
+import json
+import pytest
+import torch
+
+peft = pytest.importorskip("peft")
+from transformers import Qwen2Config, Qwen2ForCausalLM
+from safetensors.torch import load_file
+from config import model_config as cfg
+from src.export.shard_merge import merge_lora_shards, verify_merge, training_dtype
+
+
+def unsloth_merge(layer):
+    """Unsloth's `_merge_lora`: W^T.addmm_(A^T, B^T, alpha=s) in fp32, cast back to the loaded dtype."""
+    weight = layer.base_layer.weight
+    merged = weight.to(torch.float32).t()
+    merged.addmm_(layer.lora_A["default"].weight.to(torch.float32).t(),
+                  layer.lora_B["default"].weight.to(torch.float32).t(), alpha=layer.scaling["default"])
+    return merged.t().to(weight.dtype)
+
+
+@pytest.fixture
+def version(tmp_path):
+    torch.manual_seed(0)
+    base_dir, version_dir = str(tmp_path / "base"), str(tmp_path / "v1")
+    config = Qwen2Config(vocab_size=128, hidden_size=32, intermediate_size=64, num_hidden_layers=2,
+                         num_attention_heads=4, num_key_value_heads=2, tie_word_embeddings=False)
+    Qwen2ForCausalLM(config).to(torch.bfloat16).save_pretrained(base_dir)
+
+    # Trained in fp16: the base weights are cast on load, as Unsloth does with dtype=float16
+    model = Qwen2ForCausalLM.from_pretrained(base_dir, dtype=torch.float16)
+    model = peft.get_peft_model(model, peft.LoraConfig(r=4, lora_alpha=8, target_modules=["q_proj", "down_proj"]))
+    for name, param in model.named_parameters():
+        if "lora_B" in name:
+            torch.nn.init.normal_(param, std=0.5)
+    adapter_dir = os.path.join(version_dir, cfg.ADAPTER_SUBDIR)
+    model.save_pretrained(adapter_dir)
+    with open(os.path.join(adapter_dir, cfg.ADAPTER_DTYPE_FILE), 'w') as f:
+        json.dump({"dtype": "float16"}, f)
+    return base_dir, adapter_dir, model
+
+
+def test_merge_matches_unsloth_merge_in_training_dtype(version, tmp_path):
+    base_dir, adapter_dir, model = version
+    output_dir = str(tmp_path / "merged")
+    stats = merge_lora_shards(adapter_dir, output_dir, base=base_dir, device="cpu")
+    merged = load_file(os.path.join(output_dir, "model.safetensors"))
+
+    assert training_dtype(adapter_dir) == torch.float16
+    assert stats["merged_weights"] == 4
+    expected = {}
+    for name, module in model.base_model.model.named_modules():
+        if hasattr(module, "lora_A"):
+            expected[f"{name}.weight"] = unsloth_merge(module)
+    for name, tensor in model.base_model.model.state_dict().items():
+        if "lora_" not in name:
+            expected.setdefault(name.replace(".base_layer.", "."), tensor)
+
+    assert set(merged) == set(expected)
+    for name, tensor in merged.items():
+        assert tensor.dtype == torch.float16, name
+        assert torch.equal(tensor, expected[name]), name
+    with open(os.path.join(output_dir, "config.json")) as f:
+        config = json.load(f)
+    assert config.get("torch_dtype", config.get("dtype")) == "float16"
+
+
+def test_verify_merge_reports_dtype_and_value_mismatches(version, tmp_path):
+    base_dir, adapter_dir, _ = version
+    fp16_dir, bf16_dir = str(tmp_path / "fp16"), str(tmp_path / "bf16")
+    merge_lora_shards(adapter_dir, fp16_dir, base=base_dir, device="cpu")
+    merge_lora_shards(adapter_dir, bf16_dir, base=base_dir, device="cpu", dtype=torch.bfloat16)
+
+    assert verify_merge(fp16_dir, fp16_dir) == []
+    assert len(verify_merge(fp16_dir, bf16_dir)) == len(load_file(os.path.join(fp16_dir, "model.safetensors")))
@@ -0,0 +1,44 @@
+"""
+Token cache bounds: older tokenizer fingerprints are pruned and an oversized
+fingerprint is compacted to the texts of the current run.
+"""
+
+import os
+from datasets import Dataset
+from tokenizers import Tokenizer, models, pre_tokenizers
+from transformers import PreTrainedTokenizerFast
+from src.data.token_cache import pretokenize, prune_cache, _shards
+
+
+def tiny_tokenizer(words=("[UNK]", "who", "won", "the", "cup")):
+    tokenizer = Tokenizer(models.WordLevel({w: i for i, w in enumerate(words)}, unk_token="[UNK]"))
+    tokenizer.pre_tokenizer = pre_tokenizers.Whitespace()
+    return PreTrainedTokenizerFast(tokenizer_object=tokenizer, unk_token="[UNK]")
+
+
+def test_new_fingerprint_prunes_the_least_recently_used(tmp_path):
+    cache_dir = str(tmp_path)
+    dataset = Dataset.from_dict({"text": ["who won the cup"]})
+    for max_seq_length in (8, 16, 32):
+        pretokenize(dataset, tiny_tokenizer(), cache_dir=cache_dir, max_seq_length=max_seq_length)
+        os.utime(cache_dir)  # Distinct mtimes on coarse filesystems
+    assert len(os.listdir(cache_dir)) == 2
+
+    # Reusing a fingerprint does not prune; both kept caches are still readable
+    result = pretokenize(dataset, tiny_tokenizer(), cache_dir=cache_dir, max_seq_length=16)
+    assert result["input_ids"] == [[1, 2, 3, 4]]
+    assert len(os.listdir(cache_dir)) == 2
+    assert prune_cache(cache_dir, keep_fingerprints=1) and len(os.listdir(cache_dir)) == 1
+
+
+def test_oversized_fingerprint_is_compacted_to_current_texts(tmp_path):
+    cache_dir = str(tmp_path)
+    pretokenize(Dataset.from_dict({"text": ["who won"]}), tiny_tokenizer(), cache_dir=cache_dir, max_cache_bytes=0)
+    result = pretokenize(Dataset.from_dict({"text": ["the cup", "the cup"], "weight": [1, 2]}), tiny_tokenizer(),
+                         cache_dir=cache_dir, max_cache_bytes=0)
+    assert result["input_ids"] == [[3, 4], [3, 4]] and result["weight"] == [1, 2]
+
+    (directory,) = [os.path.join(cache_dir, name) for name in os.listdir(cache_dir)]
+    shards = _shards(directory)
+    assert len(shards) == 1
+    assert Dataset.from_file(shards[0])["input_ids"] == [[3, 4]]
@@ -0,0 +1,80 @@
+"""
+Canary decisions: TrafficRouter promote/rollback thresholds and the RolloutLog
+shared through the storage.
+"""
+
+import pytest
+from src.serving.storage import LocalStorage
+from src.serving.traffic_router import TrafficRouter
+from src.serving.rollouts import RolloutLog
+
+
+def router_with(stable_correct, canary_correct, judged=10, stable_latency=1.0, canary_latency=1.0):
+    router = TrafficRouter(canary_fraction=0.5, min_judged=judged, max_accuracy_drop=0.1, max_latency_ratio=1.5)
+    router.set_stable(1)
+    router.start_canary(2)
+    for version, correct, latency in ((1, stable_correct, stable_latency), (2, canary_correct, canary_latency)):
+        for i in range(judged):
+            router.record(version, latency, is_correct=i < correct)
+    return router
+
+
+def test_no_decision_before_min_judged():
+    router = TrafficRouter(min_judged=5)
+    router.set_stable(1)
+    router.start_canary(2)
+    for _ in range(4):
+        router.record(2, 1.0, is_correct=True)
+        router.record(2, 1.0)  # Unjudged requests do not count
+    assert router.evaluate() == (None, 2)
+    assert router.canary == 2
+
+
+def test_promote_within_accuracy_margin():
+    router = router_with(stable_correct=10, canary_correct=9)
+    assert router.evaluate() == ("promote", 2)
+    assert (router.stable, router.canary) == (2, None)
+    assert 1 not in router.stats
+
+
+def test_rollback_on_accuracy_drop():
+    router = router_with(stable_correct=10, canary_correct=8)
+    assert router.evaluate() == ("rollback", 2)
+    assert (router.stable, router.canary) == (1, None)
+    assert 2 not in router.stats
+
+
+def test_rollback_on_latency():
+    assert router_with(10, 10, canary_latency=1.6).evaluate() == ("rollback", 2)
+    assert router_with(10, 10, canary_latency=1.4).evaluate() == ("promote", 2)
+
+
+def test_conclude_applies_a_remote_decision():
+    router = router_with(10, 10)
+    assert router.conclude("rollback") == 2
+    assert router.conclude("promote") is None
+    assert (router.stable, router.canary) == (1, None)
+
+
+@pytest.fixture
+def storage(tmp_path):
+    return LocalStorage(str(tmp_path))
+
+
+def test_rollback_wins_over_a_concurrent_promotion(storage):
+    rollouts = RolloutLog(storage)
+    rollouts.record(3, "promote", "v2", 2, writer_id="a")
+    rollouts.record(3, "rollback", "v2", 2, writer_id="b")
+    rollouts.record(3, "promote", "v2", 2, writer_id="c")
+    assert rollouts.decisions()[3]["decision"] == "rollback"
+
+
+def test_serving_model_info_skips_rolled_back_versions(storage):
+    rollouts = RolloutLog(storage)
+    storage.write_latest_model_info("v4", 4)
+    assert rollouts.serving_model_info() == ("v4", 4)
+
+    rollouts.record(4, "rollback", "v3", 3)
+    rollouts.record(3, "rollback", "v2", 2)
+    rollouts.record(2, "promote", "v1", 1)
+    assert rollouts.serving_model_info() == ("v2", 2)
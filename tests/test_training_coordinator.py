@@ -0,0 +1,63 @@
+"""
+TrainingCoordinator: trigger files coalesced into one run, serialized local
+runs and monotonic version numbers.
+"""
+
+import time
+import threading
+from src.serving.storage import LocalStorage
+from src.serving.training_coordinator import TrainingCoordinator
+
+
+def test_one_run_consumes_every_pending_trigger(tmp_path):
+    coordinator = TrainingCoordinator(LocalStorage(str(tmp_path)))
+    assert coordinator.pending() == []
+    triggers = [coordinator.request(f"container{i}") for i in range(3)] + [coordinator.request("container0")]
+    assert coordinator.pending() == sorted(triggers)
+
+    coordinator.consume(coordinator.pending())
+    assert coordinator.pending() == []
+    coordinator.consume(triggers)  # Already consumed: no error
+
+
+def test_versions_are_never_reused(tmp_path):
+    storage = LocalStorage(str(tmp_path))
+    assert TrainingCoordinator(storage).allocate_version(0) == 1
+    assert TrainingCoordinator(storage).allocate_version(0) == 2  # e.g. after a failed run
+    assert TrainingCoordinator(storage).allocate_version(5) == 6
+    assert TrainingCoordinator(storage).allocate_version(3) == 7
+
+
+def test_runs_are_serialized_and_queued_jobs_coalesce(tmp_path):
+    storage = LocalStorage(str(tmp_path))
+    active, overlaps, runs = [], [], []
+    running = threading.Event()
+
+    def job():
+        coordinator = TrainingCoordinator(storage)
+        with coordinator.exclusive():
+            pending = coordinator.pending()
+            if not pending:
+                return
+            coordinator.consume(pending)
+            running.set()
+            active.append(1)
+            overlaps.append(len(active) > 1)
+            time.sleep(0.2)
+            runs.append(coordinator.allocate_version(0))
+            active.pop()
+
+    coordinator = TrainingCoordinator(storage)
+    coordinator.request("a")
+    first = threading.Thread(target=job)
+    first.start()
+    running.wait()
+    jobs = []
+    for writer in "bcd":  # Triggers arriving during the first run
+        coordinator.request(writer)
+        jobs.append(threading.Thread(target=job))
+        jobs[-1].start()
+    for thread in [first] + jobs:
+        thread.join()
+
+    assert runs == [1, 2] and not any(overlaps)
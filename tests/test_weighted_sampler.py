@@ -0,0 +1,25 @@
+"""
+RepeatWeightedSampler: per-record weights expanded at sampling time.
+"""
+
+from collections import Counter
+from src.training.weighted_trainer import RepeatWeightedSampler
+
+
+def test_each_index_appears_weight_times():
+    sampler = RepeatWeightedSampler([3, 1, 0, 5], seed=7)
+    assert len(sampler) == 9
+    assert Counter(sampler) == {0: 3, 1: 1, 3: 5}
+
+
+def test_order_depends_only_on_seed_and_epoch():
+    weights = [4, 2, 7, 1, 3]
+    first, second = RepeatWeightedSampler(weights, seed=1), RepeatWeightedSampler(weights, seed=1)
+    epochs = [list(first), list(first)]
+    assert epochs[0] != epochs[1]  # A fresh shuffle every epoch
+
+    second.set_epoch(1)
+    assert list(second) == epochs[1]
+    second.set_epoch(0)
+    assert list(second) == epochs[0]
+    assert list(RepeatWeightedSampler(weights, seed=2)) != epochs[0]